@@ -0,0 +1,147 @@
+"""
+Volcado e importación de cuentas desde la línea de comandos.
+
+Usa directamente MongoDB (MONGO_URI) con el repositorio asíncrono, sin pasar por
+la API: la exportación lee del cursor por lotes y la importación valida e
+inserta por bloques, con memoria constante en ambos sentidos.
+
+Uso (desde src/):
+    # Volcado completo en CSV comprimido
+    python accounts_cli.py export --format csv --gzip -o accounts.csv.gz
+    # Volcado filtrado en NDJSON a la salida estándar
+    python accounts_cli.py export --currency EUR --fields account_number,balance
+    # Importación (formato y compresión deducidos de la extensión), con los
+    # rechazos en un archivo NDJSON
+    python accounts_cli.py import accounts.csv.gz --rejects rejects.ndjson
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from database import DATABASE_NAME, connect_to_mongo, connect_to_mongo_async
+from models import account_model
+from services import account_dump, account_service, admin_service
+
+# Bytes leídos del archivo de entrada por bloque
+READ_BLOCK_SIZE = 1 << 20
+
+
+async def read_file(path: str):
+    """
+    Lee un archivo (o la entrada estándar con "-") por bloques.
+
+    Yields:
+        bytes: Bloques de como mucho ``READ_BLOCK_SIZE`` bytes.
+    """
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while block := await asyncio.to_thread(stream.read, READ_BLOCK_SIZE):
+            yield block
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def input_format(path: str, value: str | None) -> tuple[str, bool]:
+    """
+    Deduce el formato y la compresión de la entrada de su extensión.
+
+    Args:
+        path (str): Ruta del archivo.
+        value (str, opcional): Formato indicado explícitamente.
+
+    Returns:
+        tuple[str, bool]: Formato ("ndjson" o "csv") y si está comprimida con gzip.
+    """
+    compressed = path.endswith(".gz")
+    name = path[:-3] if compressed else path
+    return value or ("csv" if name.endswith(".csv") else "ndjson"), compressed
+
+
+async def export(args):
+    query = account_model.AccountExportQuery(
+        currency=args.currency, account_type=args.account_type, fields=args.fields,
+        sort=args.sort, format=args.format, gzip=args.gzip, batch_size=args.batch_size
+    )
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    written = 0
+    started = time.perf_counter()
+    try:
+        async for chunk in account_dump.export_accounts(query):
+            await asyncio.to_thread(output.write, chunk)
+            written += len(chunk)
+    finally:
+        if output is sys.stdout.buffer:
+            output.flush()
+        else:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f"Exported {written / 2 ** 20:.1f} MiB in {elapsed:.1f}s", file=sys.stderr)
+
+
+async def import_(args):
+    format, compressed = input_format(args.input, args.format)
+    # El índice único de account_number es el que rechaza los duplicados
+    await admin_service.ensure_indexes()
+
+    rejects = open(args.rejects, "w") if args.rejects else None
+    started = time.perf_counter()
+    try:
+        items = account_dump.records(read_file(args.input), format, compressed)
+        async for progress in account_dump.import_accounts(items, args.chunk_size):
+            if rejects is not None:
+                rejects.writelines(reject.model_dump_json() + "\n" for reject in progress.rejects)
+            elapsed = time.perf_counter() - started
+            print(
+                f"processed={progress.processed} created={progress.created} "
+                f"rejected={progress.rejected} rate={progress.processed / elapsed:.0f}/s",
+                file=sys.stderr
+            )
+    finally:
+        if rejects is not None:
+            rejects.close()
+    return 1 if progress.rejected else 0
+
+
+async def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Volcar las cuentas")
+    export_parser.add_argument("-o", "--output", default="-", help="Archivo de salida ('-' = salida estándar)")
+    export_parser.add_argument("--format", choices=account_dump.FORMATS, default="ndjson")
+    export_parser.add_argument("--gzip", action="store_true", help="Comprimir con gzip")
+    export_parser.add_argument("--batch-size", type=int, default=5000, help="Cuentas por lote del cursor")
+    export_parser.add_argument("--currency", choices=("USD", "EUR"))
+    export_parser.add_argument("--account-type", choices=("saving", "checking"))
+    export_parser.add_argument("--fields", help="Campos separados por comas")
+    export_parser.add_argument("--sort", default="id")
+
+    import_parser = commands.add_parser("import", help="Importar un volcado")
+    import_parser.add_argument("input", help="Archivo .ndjson/.csv, opcionalmente .gz ('-' = entrada estándar)")
+    import_parser.add_argument("--format", choices=account_dump.FORMATS, help="Por defecto, según la extensión")
+    import_parser.add_argument("--chunk-size", type=int, default=5000, help="Elementos por inserción masiva")
+    import_parser.add_argument("--rejects", help="Archivo NDJSON donde escribir los rechazos")
+    args = parser.parse_args()
+
+    sync_client = connect_to_mongo()
+    async_client = connect_to_mongo_async()
+    try:
+        admin_service.configure(sync_client.get_database(DATABASE_NAME))
+        account_service.configure_repository("async", async_client.get_database(DATABASE_NAME))
+        if args.command == "export":
+            await export(args)
+            return 0
+        return await import_(args)
+    finally:
+        await async_client.close()
+        sync_client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
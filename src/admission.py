@@ -0,0 +1,253 @@
+from collections import deque
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+import asyncio
+import math
+import metrics
+import time
+import weakref
+
+
+class Overloaded(Exception):
+    """No hay capacidad para admitir la petición; debe rechazarse con 503."""
+
+
+class AdmissionLimiter:
+    """
+    Limitador de concurrencia con una cola de espera acotada y un plazo de espera.
+
+    Admite hasta ``limit`` peticiones a la vez. Las siguientes esperan en orden
+    de llegada mientras haya sitio en la cola y como mucho ``queue_timeout``
+    segundos; el resto se rechaza al instante. Así, cuando MongoDB se ralentiza,
+    las peticiones que no podrán atenderse a tiempo se rechazan enseguida en
+    lugar de acumularse en el threadpool y en el pool de conexiones.
+
+    Al terminar una petición su plaza pasa directamente a la primera en espera,
+    de modo que una petición nueva no adelanta a las encoladas.
+
+    Attributes:
+        name (str): Nombre del límite en las métricas ("read", "write" o una ruta).
+        limit (int): Peticiones admitidas a la vez.
+        queue_size (int): Peticiones que pueden esperar una plaza.
+        queue_timeout (float): Segundos máximos de espera en la cola.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int = 100, queue_timeout: float = 0.5):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        """
+        Ocupa una plaza, esperando en la cola si hace falta.
+
+        Raises:
+            Overloaded: Si la cola está llena o se agota el plazo de espera.
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            metrics.ADMISSION_REQUESTS.inc(self.name, "admitted")
+            return
+        if len(self._waiters) >= self.queue_size:
+            metrics.ADMISSION_REQUESTS.inc(self.name, "shed_queue_full")
+            raise Overloaded(f"Too many concurrent requests for {self.name}.")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        metrics.ADMISSION_QUEUED.inc(self.name)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            metrics.ADMISSION_REQUESTS.inc(self.name, "shed_timeout")
+            raise Overloaded(f"Timed out waiting for capacity for {self.name}.")
+        except asyncio.CancelledError:
+            # La plaza pudo asignarse justo antes de cancelar la espera
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            metrics.ADMISSION_QUEUED.dec(self.name)
+            metrics.ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - start, self.name)
+            if not future.done() or future.cancelled():
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+        metrics.ADMISSION_REQUESTS.inc(self.name, "admitted")
+
+    def release(self):
+        """
+        Libera una plaza, cediéndola a la primera petición en espera.
+        """
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        """
+        Retorna la ocupación del limitador.
+
+        Returns:
+            dict: Límite, peticiones admitidas y en espera.
+        """
+        return {"limit": self.limit, "active": self.active, "queued": len(self._waiters)}
+
+
+# Límites por presupuesto ("read" para GET, "write" para el resto) y por ruta
+# ("MÉTODO /plantilla"); se configuran al arranque con configure
+limiters = {}
+route_limiters = {}
+retry_after = 1
+
+def configure(read_limit: int = 100, write_limit: int = 50, queue_size: int = 100,
+              queue_timeout: float = 0.5, routes: dict | None = None, retry_after_seconds: int | None = None):
+    """
+    Configura los límites de admisión de las rutas de cuentas.
+
+    Args:
+        read_limit (int): Peticiones de lectura (GET) admitidas a la vez; 0 sin límite.
+        write_limit (int): Peticiones de escritura admitidas a la vez; 0 sin límite.
+        queue_size (int): Peticiones que pueden esperar plaza en cada límite.
+        queue_timeout (float): Segundos máximos de espera en la cola.
+        routes (dict, opcional): Límites propios de rutas concretas, por clave
+            ``"MÉTODO /plantilla"`` (p. ej. ``{"POST /transfers/batch": 4}``),
+            que sustituyen al presupuesto de lectura o escritura de esa ruta.
+        retry_after_seconds (int, opcional): Valor de ``Retry-After`` en los
+            rechazos; por defecto el plazo de espera redondeado hacia arriba.
+    """
+    global retry_after
+    limiters.clear()
+    route_limiters.clear()
+    for budget, limit in (("read", read_limit), ("write", write_limit)):
+        if limit > 0:
+            limiters[budget] = AdmissionLimiter(budget, limit, queue_size, queue_timeout)
+    for route, limit in (routes or {}).items():
+        route_limiters[route] = AdmissionLimiter(route, limit, queue_size, queue_timeout) if limit > 0 else None
+    retry_after = retry_after_seconds if retry_after_seconds is not None else max(1, math.ceil(queue_timeout))
+
+def parse_routes(value: str) -> dict:
+    """
+    Interpreta los límites por ruta de una variable de entorno.
+
+    Args:
+        value (str): Pares ``"MÉTODO /plantilla=límite"`` separados por comas.
+
+    Returns:
+        dict: Límite por clave de ruta.
+    """
+    routes = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        route, limit = item.rsplit("=", 1)
+        routes[" ".join(route.split())] = int(limit)
+    return routes
+
+def limiter_for(method: str, path: str):
+    """
+    Retorna el limitador que corresponde a una ruta.
+
+    Args:
+        method (str): Método HTTP.
+        path (str): Plantilla de la ruta.
+
+    Returns:
+        AdmissionLimiter: Límite propio de la ruta o el de su presupuesto.
+        None: Si la ruta no tiene límite.
+    """
+    key = f"{method} {path}"
+    if key in route_limiters:
+        return route_limiters[key]
+    return limiters.get("read" if method == "GET" else "write")
+
+def stats() -> dict:
+    """
+    Retorna la ocupación de todos los limitadores.
+
+    Returns:
+        dict: Ocupación por presupuesto y por ruta con límite propio.
+    """
+    return {
+        name: limiter.stats()
+        for name, limiter in {**limiters, **route_limiters}.items()
+        if limiter is not None
+    }
+
+
+def _release_after(body_iterator, limiter: AdmissionLimiter):
+    """
+    Envuelve el cuerpo de una respuesta en streaming para liberar la plaza al terminar.
+
+    La plaza se libera una sola vez: al agotarse el cuerpo, si falla o si su envío
+    se cancela (desconexión del cliente) y, si el cuerpo no llega a recorrerse por
+    completo, cuando se descarta.
+
+    Args:
+        body_iterator (AsyncIterator): Cuerpo de la respuesta.
+        limiter (AdmissionLimiter): Limitador que admitió la petición.
+
+    Returns:
+        AsyncIterator: Cuerpo que libera la plaza al terminar.
+    """
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            limiter.release()
+
+    async def body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            release()
+
+    wrapped = body()
+    weakref.finalize(wrapped, release)
+    return wrapped
+
+
+class AdmissionRoute(APIRoute):
+    """
+    Ruta de FastAPI sujeta a control de admisión.
+
+    La plaza se ocupa antes de leer y validar el cuerpo y se libera cuando el
+    endpoint retorna su respuesta o, en las respuestas en streaming (NDJSON,
+    importación y exportación, SSE), cuando termina o se interrumpe su envío: el
+    trabajo contra MongoDB de esas respuestas ocurre mientras se transmiten. Si
+    no hay capacidad se responde 503 con ``Retry-After``.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def admitted_handler(request):
+            limiter = limiter_for(request.method, path)
+            if limiter is None:
+                return await handler(request)
+            try:
+                await limiter.acquire()
+            except Overloaded as e:
+                return ORJSONResponse(
+                    {"detail": str(e)}, status_code=503, headers={"Retry-After": str(retry_after)}
+                )
+            try:
+                response = await handler(request)
+            except BaseException:
+                limiter.release()
+                raise
+            if isinstance(response, StreamingResponse):
+                response.body_iterator = _release_after(response.body_iterator, limiter)
+            else:
+                limiter.release()
+            return response
+
+        return admitted_handler
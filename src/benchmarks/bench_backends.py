@@ -0,0 +1,212 @@
+"""
+Benchmark comparativo de los backends de repositorio "sync" y "async".
+
+Levanta la API con uvicorn una vez por backend (variable REPOSITORY_BACKEND),
+siembra cuentas y ejecuta cargas de lectura (GET /accounts) y de escritura
+(PATCH /accounts/{account_number}) con N conexiones concurrentes, reportando
+peticiones por segundo y latencias p50/p99.
+
+Requiere un mongod accesible en MONGO_URI (por defecto localhost:27017).
+
+Uso (desde src/):
+    python -m benchmarks.bench_backends --concurrency 1000 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """
+    Calcula un percentil por el método del rango más cercano.
+
+    Args:
+        samples (list[float]): Muestras de latencia en segundos.
+        pct (float): Percentil entre 0 y 100.
+
+    Returns:
+        float: Valor del percentil, 0.0 si no hay muestras.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_load(client: httpx.AsyncClient, make_request, concurrency: int, duration: float):
+    """
+    Ejecuta una carga de duración fija con un número fijo de trabajadores concurrentes.
+
+    Args:
+        client (AsyncClient): Cliente HTTP compartido.
+        make_request (Callable): Corrutina que recibe el cliente y hace una petición.
+        concurrency (int): Número de peticiones en vuelo simultáneas.
+        duration (float): Duración de la carga en segundos.
+
+    Returns:
+        dict: Peticiones por segundo, errores y latencias p50/p95/p99 en milisegundos.
+    """
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await make_request(client)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def seed_accounts(client: httpx.AsyncClient, count: int) -> list[str]:
+    """
+    Crea cuentas de prueba y retorna sus IDs.
+
+    Args:
+        client (AsyncClient): Cliente HTTP apuntando a la API.
+        count (int): Número de cuentas a crear.
+
+    Returns:
+        list[str]: IDs de las cuentas creadas.
+    """
+    prefix = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(100)
+
+    async def create(i: int):
+        async with semaphore:
+            response = await client.post("/accounts", json={
+                "account_number": f"{prefix}{i:010d}",
+                "holder_name": f"Bench {i}",
+                "account_type": "saving",
+                "balance": 100.0,
+                "currency": "USD",
+            })
+            response.raise_for_status()
+            return response.json()["id"]
+
+    return await asyncio.gather(*(create(i) for i in range(count)))
+
+
+def start_server(backend: str, port: int, extra_env: dict | None = None) -> subprocess.Popen:
+    """
+    Arranca la API en un subproceso con el backend de repositorio indicado.
+
+    Args:
+        backend (str): Backend de repositorio ("sync", "async" o "memory").
+        port (int): Puerto TCP de escucha.
+        extra_env (dict, opcional): Variables de entorno adicionales del servidor.
+
+    Returns:
+        Popen: Proceso del servidor.
+    """
+    env = dict(os.environ, REPOSITORY_BACKEND=backend)
+    env.update(extra_env or {})
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning", "--backlog", "4096"],
+        env=env,
+    )
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0):
+    """
+    Espera a que la API responda peticiones.
+
+    Args:
+        base_url (str): URL base de la API.
+        timeout (float): Tiempo máximo de espera en segundos.
+
+    Raises:
+        TimeoutError: Si la API no responde a tiempo.
+    """
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get("/accounts", params={"limit": 1})
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise TimeoutError("API did not become ready")
+
+
+async def bench_backend(backend: str, args) -> dict:
+    """
+    Ejecuta todas las cargas contra un backend y retorna sus resultados.
+
+    Args:
+        backend (str): Backend de repositorio a medir.
+        args (Namespace): Parámetros de línea de comandos.
+
+    Returns:
+        dict: Resultados por carga.
+    """
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(backend, args.port)
+    try:
+        await wait_until_ready(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            ids = await seed_accounts(client, args.accounts)
+
+            async def list_accounts(c):
+                return await c.get("/accounts", params={"limit": 50})
+
+            async def patch_balance(c):
+                account_id = random.choice(ids)
+                return await c.patch(f"/accounts/{account_id}", json={"id": account_id, "balance": 1})
+
+            return {
+                "list": await run_load(client, list_accounts, args.concurrency, args.duration),
+                "patch": await run_load(client, patch_balance, args.concurrency, args.duration),
+            }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="sync,async")
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'workload':<8} {'rps':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for backend in args.backends.split(","):
+        results = await bench_backend(backend, args)
+        for workload, result in results.items():
+            print(f"{backend:<8} {workload:<8} {result['rps']:>10} {result['p50_ms']:>10} "
+                  f"{result['p99_ms']:>10} {result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark de agrupación de incrementos sobre una única cuenta muy concurrida.
+
+Ejecuta N clientes concurrentes que incrementan el saldo de la misma cuenta a
+través de ``account_service.update_account_balance`` y compara throughput y
+latencias p50/p99 sin agrupación y con distintas ventanas.
+
+Por defecto la cuenta vive en un documento simulado en proceso que serializa
+las escrituras (como la contención sobre un mismo documento en MongoDB) con un
+tiempo de servicio fijo por escritura. Con ``--mongo`` se usa el repositorio
+asíncrono contra MONGO_URI.
+
+Uso (desde src/):
+    python -m benchmarks.bench_coalescing --concurrency 500 --windows 0,2,5
+"""
+
+import argparse
+import asyncio
+import time
+
+from bson import ObjectId
+
+from benchmarks.bench_backends import percentile
+from database import DATABASE_NAME, connect_to_mongo_async
+from models import account_model
+from services import account_service
+
+
+class HotDocumentRepository:
+    """
+    Repositorio simulado con un único documento cuyas escrituras se serializan.
+
+    Attributes:
+        service_time (float): Segundos que tarda cada escritura en el documento.
+    """
+
+    def __init__(self, account_id: str, service_time: float):
+        self.account_id = account_id
+        self.service_time = service_time
+        self.balance = 0.0
+        self.writes = 0
+        self._lock = asyncio.Lock()
+
+    async def update_balance(self, account_data):
+        async with self._lock:
+            await asyncio.sleep(self.service_time)
+            self.balance += account_data.balance
+            self.writes += 1
+            return {"id": account_data.id, "balance": self.balance}
+
+
+async def run(account_id: str, concurrency: int, duration: float) -> dict:
+    """
+    Ejecuta la carga de incrementos con ``concurrency`` clientes durante ``duration`` segundos.
+
+    Args:
+        account_id (str): ID de la cuenta a incrementar.
+        concurrency (int): Número de clientes concurrentes.
+        duration (float): Duración de la carga en segundos.
+
+    Returns:
+        dict: Throughput y latencias p50/p99 en milisegundos.
+    """
+    latencies = []
+    deadline = time.perf_counter() + duration
+    update = account_model.UpdateAccountBalance(id=account_id, balance=1)
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await account_service.update_account_balance(update)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "ops": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--windows", default="0,2,5", help="Ventanas en milisegundos; 0 = sin agrupar")
+    parser.add_argument("--service-time-ms", type=float, default=0.5,
+                        help="Tiempo por escritura del documento simulado")
+    parser.add_argument("--mongo", action="store_true", help="Usar MongoDB real (MONGO_URI)")
+    args = parser.parse_args()
+
+    if args.mongo:
+        client = connect_to_mongo_async()
+        account_service.configure_repository("async", client.get_database(DATABASE_NAME))
+        created = await account_service.create_account(account_model.CreateAccount(
+            account_number=str(ObjectId())[-20:],
+            holder_name="Hot account",
+            account_type="checking",
+            balance=0,
+            currency="USD",
+        ))
+        account_id = created.id
+    else:
+        account_id = str(ObjectId())
+        repository = HotDocumentRepository(account_id, args.service_time_ms / 1000)
+        account_service.account_repository = repository
+
+    print(f"{'window ms':>10} {'ops/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'writes':>10}")
+    for window_ms in (float(w) for w in args.windows.split(",")):
+        account_service.configure_coalescing(window_ms / 1000)
+        if not args.mongo:
+            repository.writes = 0
+        result = await run(account_id, args.concurrency, args.duration)
+        writes = repository.writes if not args.mongo else "-"
+        print(f"{window_ms:>10} {result['ops']:>10} {result['p50_ms']:>10} {result['p99_ms']:>10} {writes:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,164 @@
+"""
+Benchmark de volcado e importación de cuentas.
+
+Levanta la API con uvicorn y mide:
+    - import: cuentas por segundo de ``POST /accounts/import`` con un volcado
+      NDJSON de ``--accounts`` cuentas generado al vuelo (nunca completo en
+      memoria), enviado en bloques
+    - export: cuentas por segundo, MB/s transferidos y crecimiento de la memoria
+      residente (RSS) del servidor de ``GET /accounts/export`` en NDJSON y CSV,
+      con y sin gzip
+
+El crecimiento de RSS es la diferencia entre el máximo muestreado durante el
+volcado y el valor previo: con lectura por lotes debe depender de
+``--batch-size`` y no del número de cuentas. La medida de referencia es con
+5 millones de cuentas (``--accounts 5000000``); el repositorio en memoria por
+defecto guarda las cuentas en el propio servidor, así que su RSS base crece con
+el dataset aunque el volcado no lo haga. Con ``--backend async`` o ``sync`` se
+usa el mongod de MONGO_URI.
+
+Uso (desde src/):
+    python -m benchmarks.bench_dump --accounts 5000000 --batch-size 5000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+import zlib
+
+import httpx
+import orjson
+
+from benchmarks.bench_backends import start_server, wait_until_ready
+
+# Cuentas por bloque del cuerpo enviado a /accounts/import
+UPLOAD_BLOCK = 10000
+
+
+def rss_bytes(pid: int) -> int:
+    """
+    Lee la memoria residente de un proceso de ``/proc`` (solo Linux).
+
+    Args:
+        pid (int): Identificador del proceso.
+
+    Returns:
+        int: Memoria residente en bytes.
+    """
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def generate_dump(count: int):
+    """
+    Genera al vuelo un volcado NDJSON de ``count`` cuentas.
+
+    Yields:
+        bytes: Bloques de ``UPLOAD_BLOCK`` cuentas.
+    """
+    prefix = uuid.uuid4().hex[:6]
+    for start in range(0, count, UPLOAD_BLOCK):
+        yield b"".join(
+            orjson.dumps({
+                "account_number": f"{prefix}{i:010d}",
+                "holder_name": f"Holder {i}",
+                "account_type": "saving" if i % 2 else "checking",
+                "balance": 100.0,
+                "currency": "USD" if i % 3 else "EUR",
+            }) + b"\n"
+            for i in range(start, min(start + UPLOAD_BLOCK, count))
+        )
+
+
+async def bench_import(client: httpx.AsyncClient, count: int, chunk_size: int) -> dict:
+    """
+    Importa ``count`` cuentas y mide el throughput.
+
+    Returns:
+        dict: Cuentas creadas y rechazadas, segundos y cuentas por segundo.
+    """
+    started = time.perf_counter()
+    progress = {}
+    async with client.stream(
+        "POST", "/accounts/import", params={"chunk_size": chunk_size},
+        content=generate_dump(count), headers={"Content-Type": "application/x-ndjson"},
+    ) as response:
+        async for line in response.aiter_lines():
+            if line:
+                progress = orjson.loads(line)
+    elapsed = time.perf_counter() - started
+    return {
+        "created": progress.get("created", 0),
+        "rejected": progress.get("rejected", 0),
+        "seconds": round(elapsed, 2),
+        "rows_s": round(progress.get("processed", 0) / elapsed),
+    }
+
+
+async def bench_export(client: httpx.AsyncClient, pid: int, format: str, gzip: bool, batch_size: int) -> dict:
+    """
+    Descarga un volcado completo, contando filas y muestreando la RSS del servidor.
+
+    Returns:
+        dict: Filas, MB transferidos, filas por segundo, MB/s y crecimiento de RSS en MB.
+    """
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS) if gzip else None
+    rss_before = peak = rss_bytes(pid)
+    transferred = rows = 0
+    started = time.perf_counter()
+    async with client.stream(
+        "GET", "/accounts/export", params={"format": format, "gzip": gzip, "batch_size": batch_size}
+    ) as response:
+        # aiter_raw: el cliente no descomprime, se mide lo que viaja por la red
+        async for chunk in response.aiter_raw():
+            transferred += len(chunk)
+            rows += (decompressor.decompress(chunk) if gzip else chunk).count(b"\n")
+            peak = max(peak, rss_bytes(pid))
+    elapsed = time.perf_counter() - started
+    if format == "csv":
+        rows -= 1  # cabecera
+    return {
+        "rows": rows,
+        "mb": round(transferred / 1e6, 1),
+        "rows_s": round(rows / elapsed),
+        "mb_s": round(transferred / 1e6 / elapsed, 1),
+        "rss_mb": round((peak - rss_before) / 1e6, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="memory", choices=("memory", "async", "sync"))
+    parser.add_argument("--accounts", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Cuentas por lote del volcado")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Cuentas por inserción de la importación")
+    parser.add_argument("--port", type=int, default=8769)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(args.backend, args.port)
+    try:
+        await wait_until_ready(base_url)
+        async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+            result = await bench_import(client, args.accounts, args.chunk_size)
+            print(f"import: {result['created']} created, {result['rejected']} rejected "
+                  f"in {result['seconds']}s ({result['rows_s']} rows/s)", flush=True)
+
+            print(f"{'format':<12} {'rows':>9} {'MB':>8} {'rows/s':>9} {'MB/s':>7} {'RSS +MB':>8}")
+            for format in ("ndjson", "csv"):
+                for gzip in (False, True):
+                    result = await bench_export(client, server.pid, format, gzip, args.batch_size)
+                    name = format + (".gz" if gzip else "")
+                    print(f"{name:<12} {result['rows']:>9} {result['mb']:>8} {result['rows_s']:>9} "
+                          f"{result['mb_s']:>7} {result['rss_mb']:>8}", flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Benchmark del coste de las métricas.
+
+Mide en proceso, sin red, el tiempo por petición de una ruta trivial de
+FastAPI con y sin ``MetricsMiddleware``, y el coste por evento del listener
+de comandos de MongoDB, para comprobar que pueden quedar activos en producción.
+
+Uso (desde src/):
+    python -m benchmarks.bench_metrics --requests 20000
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+
+import metrics
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/accounts/{account_id}")
+    async def get_account(account_id: str):
+        return {"id": account_id}
+
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    """
+    Llama a la aplicación ASGI directamente ``requests`` veces.
+
+    Returns:
+        float: Microsegundos por petición.
+    """
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i):
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": f"/accounts/{i}", "raw_path": b"",
+            "root_path": "", "query_string": b"", "headers": [], "server": ("bench", 80),
+        }
+
+    # Calentamiento: construcción de la pila de middlewares y cachés de rutas
+    for i in range(200):
+        await app(scope(i), receive, send)
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def command_listener_cost(events: int) -> float:
+    """
+    Mide el coste del listener de comandos por evento (con el muestreo por defecto).
+
+    Returns:
+        float: Microsegundos por evento.
+    """
+    listener = metrics.CommandMetrics()
+    event = SimpleNamespace(command_name="find", duration_micros=900,
+                            reply={"cursor": {"firstBatch": [{"balance": 1.0}] * 100, "id": 0}, "ok": 1})
+    start = time.perf_counter()
+    for _ in range(events):
+        listener.succeeded(event)
+    return (time.perf_counter() - start) / events * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    plain, instrumented = build_app(False), build_app(True)
+    baseline = min([await drive(plain, args.requests) for _ in range(args.rounds)])
+    with_metrics = min([await drive(instrumented, args.requests) for _ in range(args.rounds)])
+    print(f"sin métricas:      {baseline:8.1f} µs/petición")
+    print(f"con métricas:      {with_metrics:8.1f} µs/petición")
+    print(f"coste middleware:  {with_metrics - baseline:8.1f} µs/petición ({(with_metrics / baseline - 1) * 100:.1f} %)")
+    print(f"listener comandos: {command_listener_cost(args.requests):8.2f} µs/evento")
+
+    start = time.perf_counter()
+    metrics.REGISTRY.render()
+    print(f"render /metrics:   {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
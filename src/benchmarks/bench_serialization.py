@@ -0,0 +1,106 @@
+"""
+Benchmark de serialización de respuestas de listado de cuentas.
+
+Compara, para una respuesta con N cuentas (100k por defecto), el CPU por
+petición y la memoria asignada de:
+
+    - legacy: renombrado de ``_id`` en Python, ``Accounts.model_validate`` en el
+      repositorio, revalidación y volcado por ``response_model`` y codificación
+      con el ``json`` de la librería estándar (como ``JSONResponse``).
+    - fast: documentos ya proyectados por MongoDB (``$project`` + ``$toString``),
+      sin validación y codificados con ``ORJSONResponse``.
+
+Los documentos de entrada simulan lo que entrega el driver en cada caso, así
+que la medición no incluye red ni base de datos.
+
+Uso (desde src/):
+    python -m benchmarks.bench_serialization --accounts 100000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+from models import account_model
+
+
+def raw_documents(count: int) -> list[dict]:
+    return [
+        {
+            "_id": ObjectId(),
+            "account_number": f"{i:010d}",
+            "holder_name": f"Holder {i}",
+            "account_type": "saving" if i % 2 else "checking",
+            "balance": i * 1.5,
+            "currency": "USD",
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_path(documents: list[dict]) -> bytes:
+    accounts = []
+    for acc in documents:
+        acc = dict(acc)
+        acc["id"] = str(acc["_id"])
+        del acc["_id"]
+        accounts.append(acc)
+    data = account_model.Accounts.model_validate({"accounts": accounts, "next_cursor": None})
+    # response_model: FastAPI vuelca el modelo, lo valida de nuevo y lo serializa
+    content = account_model.Accounts.model_validate(data.model_dump()).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def fast_path(documents: list[dict]) -> bytes:
+    return ORJSONResponse({"accounts": documents, "next_cursor": None}).body
+
+
+def measure(func, documents: list[dict], rounds: int) -> dict:
+    """
+    Mide el CPU medio por llamada y el pico de memoria asignada de ``func``.
+
+    Returns:
+        dict: CPU en milisegundos por petición, pico asignado en MiB y tamaño del cuerpo.
+    """
+    func(documents)
+    gc.collect()
+    start = time.process_time()
+    for _ in range(rounds):
+        body = func(documents)
+    cpu_ms = (time.process_time() - start) / rounds * 1000
+
+    gc.collect()
+    tracemalloc.start()
+    func(documents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_ms": round(cpu_ms, 1), "peak_alloc_mib": round(peak / 2**20, 1), "body_mib": round(len(body) / 2**20, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    raw = raw_documents(args.accounts)
+    # Lo que entrega la agregación con ACCOUNT_PROJECTION
+    projected = [
+        {"id": str(acc["_id"]), **{field: value for field, value in acc.items() if field != "_id"}}
+        for acc in raw
+    ]
+    assert json.loads(legacy_path(raw)) == json.loads(fast_path(projected))
+
+    print(f"{'path':<8} {'CPU ms/req':>12} {'peak alloc MiB':>16} {'body MiB':>10}")
+    for name, func, documents in (("legacy", legacy_path, raw), ("fast", fast_path, projected)):
+        result = measure(func, documents, args.rounds)
+        print(f"{name:<8} {result['cpu_ms']:>12} {result['peak_alloc_mib']:>16} {result['body_mib']:>10}")
+
+
+if __name__ == "__main__":
+    main()
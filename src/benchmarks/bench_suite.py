@@ -0,0 +1,251 @@
+"""
+Suite de benchmarks de endpoints con resultados de referencia y detección de regresiones.
+
+Levanta la API con uvicorn una vez por tamaño de dataset, la siembra con
+``POST /accounts/bulk`` (NDJSON) y ejecuta las cargas:
+    - list:   GET /accounts?limit=50
+    - patch:  PATCH /accounts/{id} sobre cuentas aleatorias
+    - create: POST /accounts con números de cuenta nuevos
+
+para cada nivel de concurrencia, reportando throughput, latencias p50/p95/p99
+y el pico de memoria residente (RSS) del servidor.
+
+Por defecto usa el repositorio en memoria (REPOSITORY_BACKEND=memory), que mide
+el coste propio de la API sin base de datos; con ``--backend async`` o ``sync``
+se usa el mongod de MONGO_URI.
+
+Uso (desde src/):
+    python -m benchmarks.bench_suite --accounts 1000,100000 --concurrency 10,100 --output baseline.json
+    python -m benchmarks.bench_suite --accounts 1000,100000 --concurrency 10,100 --compare baseline.json
+
+En modo ``--compare`` el proceso termina con código 1 si alguna métrica empeora
+más que ``--threshold`` respecto a la referencia.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+import uuid
+
+import httpx
+
+from benchmarks.bench_backends import run_load, start_server, wait_until_ready
+
+WORKLOADS = ("list", "patch", "create")
+
+# Métricas comparadas y si un valor mayor es mejor
+COMPARED_METRICS = {
+    "rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+# IDs conservados en el cliente para la carga patch (evita guardar millones)
+MAX_TRACKED_IDS = 100_000
+
+
+def peak_rss_mb(pid: int) -> float | None:
+    """
+    Lee el pico de memoria residente de un proceso (``VmHWM``, solo Linux).
+
+    Args:
+        pid (int): ID del proceso.
+
+    Returns:
+        float: Pico de RSS en MiB, o ``None`` si no está disponible.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def account_payload(prefix: str, i: int) -> dict:
+    return {
+        "account_number": f"{prefix}{i:010d}",
+        "holder_name": f"Bench {i}",
+        "account_type": "saving",
+        "balance": 100.0,
+        "currency": "USD",
+    }
+
+
+async def seed_dataset(client: httpx.AsyncClient, count: int, chunk: int = 50_000) -> list[str]:
+    """
+    Siembra ``count`` cuentas con peticiones NDJSON a ``/accounts/bulk``.
+
+    Args:
+        client (AsyncClient): Cliente HTTP apuntando a la API.
+        count (int): Número de cuentas a crear.
+        chunk (int): Cuentas por petición.
+
+    Returns:
+        list[str]: IDs de hasta ``MAX_TRACKED_IDS`` cuentas creadas.
+
+    Raises:
+        RuntimeError: Si alguna cuenta no se pudo crear.
+    """
+    prefix = uuid.uuid4().hex[:8]
+    ids = []
+    for start in range(0, count, chunk):
+        body = "".join(
+            json.dumps(account_payload(prefix, i)) + "\n"
+            for i in range(start, min(start + chunk, count))
+        )
+        response = await client.post(
+            "/accounts/bulk", params={"chunk_size": 10000}, content=body,
+            headers={"Content-Type": "application/x-ndjson"}, timeout=None,
+        )
+        response.raise_for_status()
+        result = response.json()
+        if result["failed"]:
+            raise RuntimeError(f"Seeding failed for {result['failed']} accounts")
+        if len(ids) < MAX_TRACKED_IDS:
+            ids.extend(item["id"] for item in result["results"][:MAX_TRACKED_IDS - len(ids)])
+    return ids
+
+
+async def bench_dataset(accounts: int, args) -> dict:
+    """
+    Ejecuta todas las cargas y concurrencias contra un servidor con ``accounts`` cuentas.
+
+    Args:
+        accounts (int): Tamaño del dataset sembrado.
+        args (Namespace): Parámetros de línea de comandos.
+
+    Returns:
+        dict: Resultados indexados por ``backend/cuentas/concurrencia/carga``.
+    """
+    base_url = f"http://127.0.0.1:{args.port}"
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    server = start_server(args.backend, args.port, extra_env)
+    results = {}
+    try:
+        await wait_until_ready(base_url)
+        max_concurrency = max(args.concurrency)
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            ids = await seed_dataset(client, accounts)
+            prefix = uuid.uuid4().hex[:8]
+            created = 0
+
+            async def list_accounts(c):
+                return await c.get("/accounts", params={"limit": 50})
+
+            async def patch_balance(c):
+                account_id = random.choice(ids)
+                return await c.patch(f"/accounts/{account_id}", json={"id": account_id, "balance": 1})
+
+            async def create_account(c):
+                nonlocal created
+                created += 1
+                return await c.post("/accounts", json=account_payload(prefix, created))
+
+            requests = {"list": list_accounts, "patch": patch_balance, "create": create_account}
+            for concurrency in args.concurrency:
+                for workload in args.workloads:
+                    result = await run_load(client, requests[workload], concurrency, args.duration)
+                    result["peak_rss_mb"] = peak_rss_mb(server.pid)
+                    key = f"{args.backend}/{accounts}/c{concurrency}/{workload}"
+                    results[key] = result
+                    print(f"{key:<32} {result['rps']:>10} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+                          f"{result['p99_ms']:>9} {result['peak_rss_mb'] or '-':>9} {result['errors']:>7}",
+                          flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compara resultados con una referencia.
+
+    Args:
+        results (dict): Resultados actuales por clave.
+        baseline (dict): Resultados de referencia por clave.
+        threshold (float): Empeoramiento relativo tolerado (0.1 = 10 %).
+
+    Returns:
+        list[str]: Descripción de cada regresión encontrada.
+    """
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = reference.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(f"{key} {metric}: {old} -> {new} ({change * 100:+.1f} %)")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="memory", choices=("memory", "async", "sync"))
+    parser.add_argument("--accounts", default="1000,100000",
+                        help="Tamaños de dataset separados por comas (p. ej. 1000,1000000,5000000)")
+    parser.add_argument("--concurrency", default="10,100", help="Niveles de concurrencia separados por comas")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por carga")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Variable de entorno adicional para el servidor (repetible)")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="Archivo JSON de referencia a comparar")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Empeoramiento relativo que se considera regresión (por defecto 0.10)")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.workloads = [w for w in args.workloads.split(",") if w]
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    print(f"{'benchmark':<32} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MiB':>9} {'errors':>7}")
+    results = {}
+    for accounts in (int(a) for a in args.accounts.split(",")):
+        results.update(await bench_dataset(accounts, args))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                "meta": {
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "duration": args.duration,
+                },
+                "results": results,
+            }, output, indent=2)
+        print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as reference:
+            baseline = json.load(reference)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold * 100:.0f} %:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"no regressions above {args.threshold * 100:.0f} %")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""
+Benchmark de throughput de transferencias entre cuentas.
+
+Levanta la API con uvicorn, siembra cuentas con saldo y mide transferencias por
+segundo entre pares de cuentas aleatorias con:
+    - single: una transferencia por petición (POST /transfers)
+    - batch:  ``--batch-size`` transferencias por petición (POST /transfers/batch),
+      liquidadas en una transacción por bloque de ``--chunk-size``
+
+Las cuentas se siembran con saldo 100 y cada transferencia mueve 1, así que los
+rechazos por saldo insuficiente (errores 400 en modo single) son raros salvo en
+cargas largas con pocas cuentas. Con pocas cuentas las transferencias
+concurrentes compiten por las mismas cuentas, lo que en MongoDB provoca
+conflictos de escritura y reintentos de la transacción.
+
+Por defecto usa el repositorio en memoria (REPOSITORY_BACKEND=memory), cuyas
+operaciones son atómicas. Con ``--backend async`` o ``sync`` se usa el mongod de
+MONGO_URI, que debe ser un replica set (basta uno de un solo nodo).
+
+Uso (desde src/):
+    python -m benchmarks.bench_transfers --accounts 1000 --concurrency 50 --batch-size 100
+"""
+
+import argparse
+import asyncio
+import random
+
+import httpx
+
+from benchmarks.bench_backends import run_load, start_server, wait_until_ready
+from benchmarks.bench_suite import seed_dataset
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="memory", choices=("memory", "async", "sync"))
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=100, help="Transferencias por petición en modo batch")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Transferencias por transacción en modo batch")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por carga")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(args.backend, args.port)
+    try:
+        await wait_until_ready(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            ids = await seed_dataset(client, args.accounts)
+
+            def random_transfer():
+                from_id, to_id = random.sample(ids, 2)
+                return {"from_id": from_id, "to_id": to_id, "amount": 1}
+
+            async def single(c):
+                return await c.post("/transfers", json=random_transfer())
+
+            async def batch(c):
+                return await c.post(
+                    "/transfers/batch", params={"chunk_size": args.chunk_size},
+                    json=[random_transfer() for _ in range(args.batch_size)],
+                )
+
+            print(f"{'mode':<8} {'transfers/s':>12} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for mode, make_request, per_request in (("single", single, 1), ("batch", batch, args.batch_size)):
+                result = await run_load(client, make_request, args.concurrency, args.duration)
+                print(f"{mode:<8} {round(result['rps'] * per_request):>12} {result['rps']:>10} "
+                      f"{result['p50_ms']:>9} {result['p99_ms']:>9} {result['errors']:>7}", flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
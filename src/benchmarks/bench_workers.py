@@ -0,0 +1,183 @@
+"""
+Benchmark de escalado del servidor de producción con el número de workers.
+
+Arranca ``server.py`` con 1..N workers (WEB_CONCURRENCY) y, para cada número de
+workers, mide:
+    - startup: segundos desde que se lanza el proceso hasta que ``/health/ready``
+      responde 200, y la duración de la importación y del ``lifespan`` de un
+      worker según ``app_startup_seconds`` en ``/metrics``
+    - rps y latencias p50/p99 de una carga de creación de cuentas
+      (POST /accounts) y de una de lectura (GET /accounts?limit=50)
+
+La carga se genera desde ``--clients`` procesos para que el cliente no sea el
+cuello de botella al medir varios workers. El escalado está acotado por el
+número de CPUs de la máquina, que comparten servidor y generadores de carga.
+
+Por defecto usa el repositorio en memoria (REPOSITORY_BACKEND=memory): cada
+worker tiene su propio almacenamiento, así que el listado lee las cuentas que
+se crearon en ese worker. Con ``--backend async`` o ``sync`` se usa el mongod de
+MONGO_URI.
+
+Uso (desde src/):
+    python -m benchmarks.bench_workers --max-workers 4 --clients 4 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from benchmarks.bench_backends import run_load
+
+
+def start_production_server(backend: str, port: int, workers: int) -> subprocess.Popen:
+    """
+    Arranca ``server.py`` en un subproceso con el número de workers indicado.
+
+    Args:
+        backend (str): Backend de repositorio ("memory", "async" o "sync").
+        port (int): Puerto TCP de escucha.
+        workers (int): Número de workers.
+
+    Returns:
+        Popen: Proceso supervisor del servidor.
+    """
+    env = dict(os.environ, REPOSITORY_BACKEND=backend, PORT=str(port), HOST="127.0.0.1",
+               WEB_CONCURRENCY=str(workers), LOG_LEVEL="warning", SERVER_BACKLOG="4096")
+    return subprocess.Popen([sys.executable, "server.py"], env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_ready(base_url: str, timeout: float = 60.0) -> float:
+    """
+    Espera a que ``/health/ready`` responda 200.
+
+    Args:
+        base_url (str): URL base de la API.
+        timeout (float): Tiempo máximo de espera en segundos.
+
+    Returns:
+        float: Segundos de espera.
+
+    Raises:
+        TimeoutError: Si la API no está disponible a tiempo.
+    """
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() - started < timeout:
+            try:
+                if (await client.get("/health/ready")).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.02)
+    raise TimeoutError("API did not become ready")
+
+
+async def worker_startup(base_url: str) -> dict:
+    """
+    Lee la duración del arranque de un worker de ``/metrics``.
+
+    Returns:
+        dict: Segundos por fase (``import`` y ``lifespan``).
+    """
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        exposition = (await client.get("/metrics")).text
+    return {
+        phase: float(value)
+        for phase, value in re.findall(r'app_startup_seconds\{phase="(\w+)"\} (\S+)', exposition)
+    }
+
+
+def client_process(base_url: str, load: str, concurrency: int, duration: float) -> dict:
+    """
+    Genera una carga desde un proceso cliente.
+
+    Args:
+        base_url (str): URL base de la API.
+        load (str): "create" o "list".
+        concurrency (int): Peticiones en vuelo de este proceso.
+        duration (float): Duración de la carga en segundos.
+
+    Returns:
+        dict: Resultado de ``run_load``.
+    """
+    prefix = uuid.uuid4().hex[:6]
+    counter = iter(range(10 ** 9))
+
+    async def create(c):
+        i = next(counter)
+        return await c.post("/accounts", json={
+            "account_number": f"{prefix}{i:010d}",
+            "holder_name": f"Bench {i}",
+            "account_type": "saving",
+            "balance": 100.0,
+            "currency": "USD",
+        })
+
+    async def list_accounts(c):
+        return await c.get("/accounts", params={"limit": 50})
+
+    async def run():
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            return await run_load(client, create if load == "create" else list_accounts, concurrency, duration)
+
+    return asyncio.run(run())
+
+
+def run_clients(pool, base_url: str, load: str, clients: int, concurrency: int, duration: float) -> dict:
+    """
+    Ejecuta una carga repartida entre ``clients`` procesos y agrega sus resultados.
+
+    Returns:
+        dict: Peticiones por segundo totales, errores y las latencias p50 y p99
+            más altas de los procesos.
+    """
+    per_client = max(1, concurrency // clients)
+    results = pool.starmap(client_process, [(base_url, load, per_client, duration)] * clients)
+    return {
+        "rps": round(sum(result["rps"] for result in results), 1),
+        "errors": sum(result["errors"] for result in results),
+        "p50_ms": max(result["p50_ms"] for result in results),
+        "p99_ms": max(result["p99_ms"] for result in results),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="memory", choices=("memory", "async", "sync"))
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=4, help="Procesos generadores de carga")
+    parser.add_argument("--concurrency", type=int, default=64, help="Peticiones en vuelo en total")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por carga")
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{'workers':>7} {'ready s':>8} {'import s':>9} {'load':<7} {'rps':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+        for workers in range(1, args.max_workers + 1):
+            server = start_production_server(args.backend, args.port, workers)
+            try:
+                ready = await wait_ready(base_url)
+                startup = await worker_startup(base_url)
+                for load in ("create", "list"):
+                    result = await asyncio.to_thread(
+                        run_clients, pool, base_url, load, args.clients, args.concurrency, args.duration
+                    )
+                    print(f"{workers:>7} {ready:>8.2f} {startup.get('import', 0):>9.2f} {load:<7} {result['rps']:>9} "
+                          f"{result['p50_ms']:>8} {result['p99_ms']:>8} {result['errors']:>7}", flush=True)
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,16 +1,264 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient, monitoring
+from repositories import read_routing
+import metrics
 import os
+import slow_log
+import threading
+
+DATABASE_NAME = 'api_bank'
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Recolecta estadísticas del pool de conexiones a partir de los eventos de pymongo.
+
+    Los eventos pueden llegar desde varios hilos (cliente síncrono), por lo que
+    los contadores se actualizan bajo un lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools = {}
+
+    def _pool(self, address):
+        key = f"{address[0]}:{address[1]}"
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = {
+                "connections_open": 0,
+                "connections_created": 0,
+                "connections_closed": 0,
+                "checked_out": 0,
+                "checkouts": 0,
+                "checkout_failures": {},
+                "checkout_wait_total_ms": 0.0,
+                "checkout_wait_max_ms": 0.0,
+                "cleared": 0,
+            }
+        return pool
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event.address)["cleared"] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["connections_created"] += 1
+            pool["connections_open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["connections_closed"] += 1
+            pool["connections_open"] -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            failures = self._pool(event.address)["checkout_failures"]
+            failures[event.reason] = failures.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        wait_ms = event.duration * 1000
+        with self._lock:
+            pool = self._pool(event.address)
+            pool["checked_out"] += 1
+            pool["checkouts"] += 1
+            pool["checkout_wait_total_ms"] += wait_ms
+            pool["checkout_wait_max_ms"] = max(pool["checkout_wait_max_ms"], wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event.address)["checked_out"] -= 1
+
+    def stats(self) -> dict:
+        """
+        Retorna una copia de las estadísticas por servidor.
+
+        Returns:
+            dict: Estadísticas del pool indexadas por ``host:puerto``, con la
+                espera media de checkout calculada.
+        """
+        with self._lock:
+            stats = {}
+            for address, pool in self._pools.items():
+                pool = dict(pool, checkout_failures=dict(pool["checkout_failures"]))
+                checkouts = pool["checkouts"]
+                pool["checkout_wait_avg_ms"] = pool["checkout_wait_total_ms"] / checkouts if checkouts else 0.0
+                stats[address] = pool
+            return stats
+
+# Un monitor por tipo de cliente, ya que ambos pueden conectarse a los mismos servidores
+pool_monitors = {"sync": PoolMonitor(), "async": PoolMonitor()}
+
+class ReadPlacementMonitor(monitoring.ServerListener, monitoring.CommandListener):
+    """
+    Cuenta en qué tipo de servidor (primario, secundario...) se atienden las lecturas.
+
+    Sigue el tipo de cada servidor con los eventos de monitorización de la
+    topología y atribuye cada comando ejecutado dentro de
+    ``read_routing.reading`` a su operación. Los comandos sin operación de
+    lectura (escrituras, transacciones, conciliación) no se cuentan.
+    """
+
+    ROLES = {"RSPrimary": "primary", "RSSecondary": "secondary", "Standalone": "standalone", "Mongos": "mongos"}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._roles = {}
+        self._reads = {}
+
+    def opened(self, event):
+        pass
+
+    def description_changed(self, event):
+        self._roles[event.server_address] = self.ROLES.get(event.new_description.server_type_name, "other")
+
+    def closed(self, event):
+        pass
+
+    def started(self, event):
+        operation = read_routing.current_operation.get()
+        if operation is None:
+            return
+        role = self._roles.get(event.connection_id, "other")
+        metrics.MONGO_READS.inc(operation, role)
+        with self._lock:
+            reads = self._reads.setdefault(operation, {})
+            reads[role] = reads.get(role, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def stats(self) -> dict:
+        """
+        Retorna los comandos de lectura atendidos por operación y tipo de servidor.
+
+        Returns:
+            dict: ``{operación: {tipo de servidor: comandos}}``.
+        """
+        with self._lock:
+            return {operation: dict(reads) for operation, reads in self._reads.items()}
+
+# Compartido por ambos clientes: el tipo de un servidor no depende del cliente
+read_placement = ReadPlacementMonitor()
+
+def _optional_int(name: str):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+def mongo_client_options() -> dict:
+    """
+    Construye las opciones del cliente de MongoDB a partir del entorno.
+    
+    Variables soportadas (todas opcionales; si no se definen se usan los
+    valores por defecto de pymongo):
+        - MONGO_MAX_POOL_SIZE: conexiones máximas por servidor.
+        - MONGO_MIN_POOL_SIZE: conexiones mínimas mantenidas abiertas.
+        - MONGO_WAIT_QUEUE_TIMEOUT_MS: espera máxima por una conexión libre.
+        - MONGO_SERVER_SELECTION_TIMEOUT_MS: espera máxima para elegir servidor.
+        - MONGO_COMPRESSORS: compresión de protocolo, p. ej. "zstd,snappy,zlib"
+          (zstd y snappy requieren los paquetes ``zstandard`` y ``python-snappy``).
+    
+    Returns:
+        dict: Argumentos con nombre para ``MongoClient``/``AsyncMongoClient``.
+    """
+    options = {
+        "maxPoolSize": _optional_int("MONGO_MAX_POOL_SIZE"),
+        "minPoolSize": _optional_int("MONGO_MIN_POOL_SIZE"),
+        "waitQueueTimeoutMS": _optional_int("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+        "serverSelectionTimeoutMS": _optional_int("MONGO_SERVER_SELECTION_TIMEOUT_MS"),
+        "compressors": os.getenv("MONGO_COMPRESSORS") or None,
+    }
+    return {name: value for name, value in options.items() if value is not None}
 
 def connect_to_mongo():
     """
     Establece y retorna una conexión a MongoDB.
     
     Returns:
-        MongoClient: Cliente de MongoDB configurado con la URI del entorno.
-        
+        MongoClient: Cliente de MongoDB configurado con la URI y las opciones del entorno.
+    
     Raises:
         Exception: Si no se puede establecer la conexión a MongoDB.
     """
     mongo_uri = os.getenv('MONGO_URI')
-    client = MongoClient(mongo_uri)
-    return client
\ No newline at end of file
+    client = MongoClient(
+        mongo_uri,
+        event_listeners=[pool_monitors["sync"], metrics.command_metrics, read_placement, slow_log.slow_commands],
+        **mongo_client_options()
+    )
+    return client
+
+def connect_to_mongo_async():
+    """
+    Crea y retorna un cliente asíncrono nativo de MongoDB.
+    
+    Returns:
+        AsyncMongoClient: Cliente asíncrono configurado con la URI y las opciones del entorno.
+    """
+    mongo_uri = os.getenv('MONGO_URI')
+    client = AsyncMongoClient(
+        mongo_uri,
+        event_listeners=[pool_monitors["async"], metrics.command_metrics, read_placement, slow_log.slow_commands],
+        **mongo_client_options()
+    )
+    return client
+
+def get_pool_stats() -> dict:
+    """
+    Retorna las estadísticas de los pools de conexiones de ambos clientes.
+    
+    Returns:
+        dict: Estadísticas por tipo de cliente ("sync" y "async") y servidor.
+    """
+    return {kind: monitor.stats() for kind, monitor in pool_monitors.items()}
+
+def get_read_stats() -> dict:
+    """
+    Retorna la preferencia de lectura configurada y dónde se atendieron las lecturas.
+    
+    Returns:
+        dict: Modo por operación, ``max_staleness_seconds`` y comandos de lectura
+            por operación y tipo de servidor.
+    """
+    return {**read_routing.stats(), "reads": read_placement.stats()}
+
+def _collect_pool_metrics():
+    """
+    Copia las estadísticas de los pools a las métricas expuestas en ``/metrics``.
+    """
+    gauges = (
+        (metrics.MONGO_POOL_CONNECTIONS, "connections_open"),
+        (metrics.MONGO_POOL_CHECKED_OUT, "checked_out"),
+    )
+    counters = (
+        (metrics.MONGO_POOL_CHECKOUTS, "checkouts", 1),
+        (metrics.MONGO_POOL_CHECKOUT_WAIT, "checkout_wait_total_ms", 0.001),
+    )
+    for kind, pools in get_pool_stats().items():
+        for address, pool in pools.items():
+            for gauge, field in gauges:
+                gauge.set(pool[field], kind, address)
+            for counter, field, scale in counters:
+                counter.set_total(pool[field] * scale, kind, address)
+
+metrics.REGISTRY.add_collector(_collect_pool_metrics)
@@ -0,0 +1,124 @@
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import logging
+import orjson
+import sys
+import uuid
+
+# Log estructurado de la aplicación: cada registro es una línea JSON con el nivel,
+# el módulo y la función que lo emite, el mensaje y los campos pasados en
+# ``extra``. Los registros emitidos durante una petición llevan además su ruta
+# (la plantilla, como en /metrics) y su identificador (cabecera X-Request-ID,
+# propagada o generada).
+
+# Petición en curso: el scope ASGI y su identificador; la ruta se lee del scope al
+# formatear porque el router la fija después de que empiece la petición
+current_request = ContextVar("current_request", default=None)
+
+# Atributos estándar de LogRecord; el resto de atributos son campos de ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+def request_fields(request: tuple | None = None) -> dict:
+    """
+    Retorna el método, la ruta y el identificador de una petición.
+
+    Args:
+        request (tuple, opcional): Valor de ``current_request`` capturado antes;
+            por defecto, la petición en curso.
+
+    Returns:
+        dict: Campos de la petición, o un diccionario vacío fuera de una petición.
+    """
+    if request is None:
+        request = current_request.get()
+    if request is None:
+        return {}
+    scope, request_id = request
+    route = scope.get("route")
+    return {
+        "method": scope.get("method", "WS"),
+        "route": route.path if route is not None else scope["path"],
+        "request_id": request_id,
+    }
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatea cada registro como una línea JSON.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "function": record.funcName,
+            "message": record.getMessage(),
+            **request_fields(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+def configure(level: str = "info", format: str = "json"):
+    """
+    Configura el log raíz de la aplicación en la salida de error.
+
+    Los loggers de los módulos (``logging.getLogger(__name__)``) propagan al raíz;
+    los de uvicorn conservan su propia configuración.
+
+    Args:
+        level (str): Nivel mínimo ("debug", "info", "warning", "error").
+        format (str): "json" (una línea JSON por registro) o "text".
+
+    Raises:
+        ValueError: Si el nivel o el formato no existen.
+    """
+    if format not in ("json", "text"):
+        raise ValueError(f"Unknown log format: {format}.")
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(
+        JsonFormatter() if format == "json"
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    # "trace" es un nivel de uvicorn (LOG_LEVEL lo comparten ambos)
+    root.setLevel("DEBUG" if level.lower() == "trace" else level.upper())
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI que asocia los registros de log a la petición que los emite.
+
+    Toma el identificador de la cabecera ``X-Request-ID`` (o genera uno) y lo
+    devuelve en la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex[:16]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        token = current_request.set((scope, request_id))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
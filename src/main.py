@@ -1,15 +1,205 @@
+import time
+
+# Inicio de la importación de la aplicación, para medir el tiempo de arranque
+IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers import accounts
+from routers import accounts, admin, health, metrics
+from metrics import APP_STARTUP_SECONDS, MetricsMiddleware
+from profiling import ProfilingMiddleware
+from services import account_service, admin_service, change_feed, idempotency
+from repositories import read_routing
+from database import DATABASE_NAME, connect_to_mongo, connect_to_mongo_async
 from dotenv import load_dotenv
+import admission
+import asyncio
+import logging
+import logs
+import os
+import profiling
+import slow_log
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Log estructurado (una línea JSON por registro con LOG_FORMAT=json) en la salida de error
+logs.configure(level=os.getenv("LOG_LEVEL", "info"), format=os.getenv("LOG_FORMAT", "json"))
+
+# Log de operaciones lentas de MongoDB (umbral 0 = desactivado) y fracción de ellas
+# que se explican para obtener documentos examinados y plan
+slow_log.slow_commands.configure(
+    threshold_ms=float(os.getenv("SLOW_OPERATION_THRESHOLD_MS", "100")),
+    explain_sample_rate=float(os.getenv("SLOW_OPERATION_EXPLAIN_SAMPLE_RATE", "0"))
+)
+
+# Token de administración (X-Admin-Token) de las rutas /admin y del perfilado bajo
+# demanda (X-Profile: 1); sin ADMIN_TOKEN ambos quedan desactivados
+profiling.configure(
+    token=os.getenv("ADMIN_TOKEN"),
+    interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "1")),
+    max_duration=float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+)
+
+# Configurar la caché de lectura de cuentas (ACCOUNT_CACHE_MAX_ENTRIES=0 la desactiva)
+account_service.configure_cache(
+    max_entries=int(os.getenv("ACCOUNT_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("ACCOUNT_CACHE_TTL_SECONDS", "5"))
+)
+
+# Preferencia de lectura por operación (list, totals, lookup, history) y antigüedad
+# máxima de los secundarios (-1 sin límite); debe configurarse antes que los repositorios
+read_routing.configure(
+    route_modes=read_routing.parse_routes(os.getenv("READ_PREFERENCE_ROUTES", "")),
+    max_staleness_seconds=int(os.getenv("READ_MAX_STALENESS_SECONDS", "90"))
+)
+
+# Caché en proceso de páginas del listado ya codificadas, por ETag (0 la desactiva)
+account_service.configure_list_cache(
+    max_entries=int(os.getenv("ACCOUNT_LIST_CACHE_MAX_ENTRIES", "128")),
+    ttl=float(os.getenv("ACCOUNT_LIST_CACHE_TTL_SECONDS", "5")),
+    max_age=float(os.getenv("ACCOUNT_LIST_ETAG_MAX_AGE_SECONDS", "60"))
+)
+
+# Agrupar incrementos de saldo concurrentes por cuenta (0 = desactivado)
+account_service.configure_coalescing(
+    window=float(os.getenv("BALANCE_COALESCE_WINDOW_MS", "0")) / 1000
+)
+
+# Respuestas guardadas por Idempotency-Key (caché en proceso delante de MongoDB)
+idempotency.configure(
+    ttl=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),
+    max_entries=int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", "10000"))
+)
+
+# Control de admisión de las rutas de cuentas: plazas de lectura (GET) y de
+# escritura, cola de espera acotada y plazo de espera (límite 0 = sin límite)
+admission.configure(
+    read_limit=int(os.getenv("ADMISSION_READ_LIMIT", "100")),
+    write_limit=int(os.getenv("ADMISSION_WRITE_LIMIT", "50")),
+    queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "100")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "500")) / 1000,
+    # Las suscripciones SSE ocupan su plaza mientras están abiertas: tienen su
+    # propio límite para no agotar el presupuesto de lectura
+    routes=admission.parse_routes(os.getenv("ADMISSION_ROUTE_LIMITS", "GET /accounts/changes=1000"))
+)
+
+# Feed de cambios: "local" (escrituras de este proceso), "change_stream" (todas,
+# requiere replica set) u "off"
+change_feed.configure(
+    source_name=os.getenv("CHANGE_FEED_SOURCE", "local"),
+    history=int(os.getenv("CHANGE_FEED_HISTORY", "10000")),
+    buffer=int(os.getenv("CHANGE_FEED_BUFFER", "1000"))
+)
+
+def _record_startup(lifespan_started: float):
+    """
+    Registra la duración del arranque del worker en ``/metrics`` y en el log.
+    
+    Args:
+        lifespan_started (float): Momento (``perf_counter``) en que empezó el ``lifespan``.
+    """
+    imports = lifespan_started - IMPORT_STARTED
+    startup = time.perf_counter() - lifespan_started
+    APP_STARTUP_SECONDS.set(imports, "import")
+    APP_STARTUP_SECONDS.set(startup, "lifespan")
+    logger.info(
+        "Worker started in %.3fs", imports + startup,
+        extra={"pid": os.getpid(), "import_seconds": round(imports, 3), "lifespan_seconds": round(startup, 3)}
+    )
+
+# Espera máxima entre reintentos de creación de índices, en segundos
+INDEX_RETRY_MAX_SECONDS = 30.0
+
+async def _ensure_indexes():
+    """
+    Asegura los índices sin bloquear el arranque, reintentando hasta conseguirlo.
+    
+    Hasta entonces ``/health/ready`` responde 503 (``"indexes": "pending"``): sin
+    el índice único de ``account_number`` se admitirían cuentas duplicadas. Cada
+    fallo se registra y el estado puede revisarse en ``GET /admin/indexes``.
+    """
+    delay = 1.0
+    while True:
+        try:
+            await admin_service.ensure_indexes()
+            return
+        except Exception as e:
+            logger.error("MongoDB error ensuring indexes (retrying in %.0fs): %s", delay, e)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, INDEX_RETRY_MAX_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida de la aplicación.
+    
+    Se ejecuta en cada worker. Al arrancar crea los clientes de MongoDB del
+    worker (con el pool configurado desde el entorno), los inyecta en los
+    repositorios según REPOSITORY_BACKEND, en el almacén de claves de
+    idempotencia y en la comprobación de disponibilidad, y arranca el feed de
+    cambios; al terminar detiene el feed y cierra los clientes. Con
+    ``REPOSITORY_BACKEND=memory`` no se usa MongoDB.
+    
+    El arranque no espera a MongoDB: los clientes conectan en segundo plano y los
+    índices se aseguran en una tarea aparte, de modo que el worker atiende
+    ``/health/live`` aunque la base de datos no esté disponible, y
+    ``/health/ready`` indica cuándo lo está.
+    """
+    lifespan_started = time.perf_counter()
+    backend = os.getenv("REPOSITORY_BACKEND", "async")
+    if backend == "memory":
+        # Repositorio en proceso para benchmarks: no se abre ninguna conexión
+        account_service.configure_repository(backend)
+        await change_feed.start()
+        _record_startup(lifespan_started)
+        yield
+        await change_feed.stop()
+        return
+
+    sync_client = connect_to_mongo()
+    # El cliente asíncrono se crea con cualquier backend: lo usa el almacén de
+    # claves de idempotencia
+    async_client = connect_to_mongo_async()
+    admin_service.configure(sync_client.get_database(DATABASE_NAME), async_client.get_database(DATABASE_NAME))
+    slow_log.slow_commands.configure_explain(sync_client)
+    idempotency.configure_repository(async_client.get_database(DATABASE_NAME))
+    if backend == "async":
+        account_service.configure_repository(backend, async_client.get_database(DATABASE_NAME))
+    else:
+        account_service.configure_repository(backend, sync_client.get_database(DATABASE_NAME))
+
+    indexes = asyncio.create_task(_ensure_indexes())
+    await change_feed.start(async_client.get_database(DATABASE_NAME))
+    _record_startup(lifespan_started)
+    yield
+    await change_feed.stop()
+    indexes.cancel()
+
+    slow_log.slow_commands.configure_explain(None)
+    await async_client.close()
+    sync_client.close()
+
 # Crear instancia de la aplicación FastAPI
 app = FastAPI(
     title="API Bank",
     description="API RESTful para gestión de cuentas bancarias",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Métricas de latencia y estado por ruta (METRICS_ENABLED=0 las desactiva)
+if os.getenv("METRICS_ENABLED", "1") != "0":
+    app.add_middleware(MetricsMiddleware)
+
+# El perfilado envuelve a las métricas (la petición perfilada se mide con su
+# respuesta real) y el contexto de log a ambos; el último añadido es el más externo
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(logs.RequestContextMiddleware)
+
 # Incluir los routers de endpoints
-app.include_router(accounts.router)
\ No newline at end of file
+app.include_router(accounts.router)
+app.include_router(admin.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
\ No newline at end of file
@@ -0,0 +1,293 @@
+from abc import ABC, abstractmethod
+from bson import encode
+from pymongo import monitoring
+import bisect
+import threading
+import time
+
+# Límites por defecto de los histogramas de latencia, en segundos
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Límites de los histogramas de tamaño de respuesta, en bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, labelvalues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    """
+    Base de las métricas: nombre, ayuda, etiquetas y valores por combinación de etiquetas.
+
+    Las actualizaciones pueden llegar desde el event loop y desde los hilos del
+    cliente síncrono de MongoDB, por lo que se protegen con un lock.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _samples(self):
+        """Retorna las líneas de las muestras de la métrica."""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Contador monótono."""
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def set_total(self, value: float, *labelvalues):
+        """
+        Fija el total acumulado de un contador que se lleva fuera del registro.
+
+        Lo usan los colectores que copian totales monótonos de otra fuente, como
+        los checkouts del monitor del pool.
+        """
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def _samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Valor que puede subir y bajar."""
+    kind = "gauge"
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """Histograma con límites fijos, suma y conteo."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self):
+        lines = []
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """
+    Conjunto de métricas expuestas en ``/metrics``.
+
+    Los colectores son funciones que se ejecutan antes de cada exposición para
+    actualizar métricas que se leen de otra fuente (por ejemplo el pool de conexiones).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Genera la exposición en formato de texto de Prometheus.
+
+        Returns:
+            str: Métricas en formato ``text/plain; version=0.0.4``.
+        """
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta.", ("method", "route")
+))
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "Peticiones HTTP por ruta y código de estado.", ("method", "route", "status")
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Peticiones HTTP en curso."
+))
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "mongodb_command_duration_seconds", "Latencia de los comandos de MongoDB.", ("command",)
+))
+MONGO_COMMANDS = REGISTRY.register(Counter(
+    "mongodb_commands_total", "Comandos de MongoDB por resultado.", ("command", "outcome")
+))
+MONGO_READS = REGISTRY.register(Counter(
+    "mongodb_reads_total", "Comandos de lectura por operación y tipo de servidor que los atendió.", ("operation", "server")
+))
+MONGO_SLOW_COMMANDS = REGISTRY.register(Counter(
+    "mongodb_slow_commands_total", "Comandos de MongoDB por encima del umbral del log de operaciones lentas.", ("command",)
+))
+MONGO_REPLY_SIZE = REGISTRY.register(Histogram(
+    "mongodb_reply_size_bytes", "Tamaño de las respuestas de MongoDB (muestreado).", ("command",), SIZE_BUCKETS
+))
+IDEMPOTENCY_REQUESTS = REGISTRY.register(Counter(
+    "idempotency_requests_total", "Peticiones con Idempotency-Key por resultado.", ("outcome",)
+))
+APP_STARTUP_SECONDS = REGISTRY.register(Gauge(
+    "app_startup_seconds", "Duración del arranque del worker por fase (import, lifespan).", ("phase",)
+))
+ADMISSION_REQUESTS = REGISTRY.register(Counter(
+    "admission_requests_total", "Peticiones por límite de admisión y resultado (admitted, shed_queue_full, shed_timeout).",
+    ("limit", "outcome")
+))
+ADMISSION_QUEUED = REGISTRY.register(Gauge(
+    "admission_queued_requests", "Peticiones esperando plaza por límite de admisión.", ("limit",)
+))
+ADMISSION_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "admission_queue_wait_seconds", "Tiempo de espera en la cola de admisión.", ("limit",)
+))
+CHANGE_FEED_EVENTS = REGISTRY.register(Counter(
+    "change_feed_events_total", "Eventos publicados en el feed de cambios por tipo.", ("type",)
+))
+CHANGE_FEED_SUBSCRIBERS = REGISTRY.register(Gauge(
+    "change_feed_subscribers", "Suscriptores conectados al feed de cambios."
+))
+CHANGE_FEED_DROPPED = REGISTRY.register(Counter(
+    "change_feed_dropped_subscribers_total", "Suscriptores desconectados por no consumir a tiempo."
+))
+MONGO_POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "mongodb_pool_connections", "Conexiones abiertas del pool.", ("client", "address")
+))
+MONGO_POOL_CHECKED_OUT = REGISTRY.register(Gauge(
+    "mongodb_pool_checked_out", "Conexiones del pool en uso.", ("client", "address")
+))
+MONGO_POOL_CHECKOUTS = REGISTRY.register(Counter(
+    "mongodb_pool_checkouts_total", "Checkouts de conexión realizados.", ("client", "address")
+))
+MONGO_POOL_CHECKOUT_WAIT = REGISTRY.register(Counter(
+    "mongodb_pool_checkout_wait_seconds_total", "Tiempo total esperando una conexión del pool.", ("client", "address")
+))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide latencia, códigos de estado y peticiones en curso por ruta.
+
+    La ruta se etiqueta con la plantilla (``/accounts/{account_id}``), no con la
+    URL concreta, para que el número de series no crezca con los IDs.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_DURATION.observe(duration, scope["method"], path)
+            HTTP_REQUESTS.inc(scope["method"], path, str(status))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Listener de comandos de pymongo que registra latencia, resultado y tamaño de respuesta.
+
+    Medir el tamaño exige volver a codificar la respuesta en BSON, por lo que se
+    hace solo para una de cada ``reply_size_sample_every`` respuestas.
+
+    Attributes:
+        reply_size_sample_every (int): Frecuencia de muestreo del tamaño; 0 lo desactiva.
+    """
+
+    def __init__(self, reply_size_sample_every: int = 10):
+        self.reply_size_sample_every = reply_size_sample_every
+        self._seen = 0
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name)
+        MONGO_COMMANDS.inc(event.command_name, "success")
+        if self.reply_size_sample_every:
+            self._seen += 1
+            if self._seen % self.reply_size_sample_every == 0:
+                MONGO_REPLY_SIZE.observe(len(encode(event.reply)), event.command_name)
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name)
+        MONGO_COMMANDS.inc(event.command_name, "failure")
+
+command_metrics = CommandMetrics()
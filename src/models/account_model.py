@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Literal
+from pydantic import BaseModel, Field, model_validator
+from datetime import datetime
+from typing import Literal, Optional
 
 class CreateAccount(BaseModel):
     """
@@ -28,6 +29,53 @@ class CreateAccountResponse(BaseModel):
     id: str 
 
 
+class BulkAccountResult(BaseModel):
+    """
+    Resultado de un elemento en la creación masiva de cuentas.
+    
+    Attributes:
+        index (int): Posición del elemento en la entrada (desde 0).
+        id (str, opcional): ID de la cuenta creada, si se creó.
+        error (str, opcional): Tipo de error: "validation", "duplicate" o "database".
+        detail (str, opcional): Descripción del error.
+    """
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+    detail: Optional[str] = None
+
+class BulkCreateAccountsResponse(BaseModel):
+    """
+    Modelo de respuesta para la creación masiva de cuentas bancarias.
+    
+    Attributes:
+        created (int): Número de cuentas creadas.
+        failed (int): Número de elementos rechazados.
+        results (list[BulkAccountResult]): Resultado por elemento, ordenado por índice.
+    """
+    created: int
+    failed: int
+    results: list[BulkAccountResult]
+
+
+class ImportProgress(BaseModel):
+    """
+    Avance de una importación de cuentas, emitido tras cada bloque.
+    
+    Attributes:
+        processed (int): Elementos leídos de la entrada hasta el momento.
+        created (int): Cuentas creadas hasta el momento.
+        rejected (int): Elementos rechazados hasta el momento.
+        rejects (list[BulkAccountResult]): Elementos rechazados en este bloque.
+        done (bool): Si es el último avance de la importación.
+    """
+    processed: int
+    created: int
+    rejected: int
+    rejects: list[BulkAccountResult]
+    done: bool = False
+
+
 class UpdateAccountBalance(BaseModel):
     """
     Modelo para actualizar el saldo de una cuenta existente.
@@ -39,6 +87,98 @@ class UpdateAccountBalance(BaseModel):
     id: str
     balance: float = Field(..., ge=1)
 
+class Posting(BaseModel):
+    """
+    Modelo de un ajuste de saldo dentro de un lote de asientos.
+    
+    Attributes:
+        id (str): ID de la cuenta a ajustar.
+        amount (float): Importe a sumar al saldo (negativo para un cargo).
+    """
+    id: str
+    amount: float
+
+class PostingResult(BaseModel):
+    """
+    Resultado de un asiento dentro de un lote.
+    
+    Attributes:
+        index (int): Posición del asiento en la entrada (desde 0).
+        id (str, opcional): ID de la cuenta del asiento.
+        status (Literal): "applied", "not_found", "invalid" o "database".
+        detail (str, opcional): Descripción del error.
+    """
+    index: int
+    id: Optional[str] = None
+    status: Literal["applied", "not_found", "invalid", "database"]
+    detail: Optional[str] = None
+
+class PostingsResponse(BaseModel):
+    """
+    Modelo de respuesta para la aplicación de un lote de asientos.
+    
+    Attributes:
+        applied (int): Número de asientos aplicados.
+        failed (int): Número de asientos no aplicados.
+        results (list[PostingResult]): Resultado por asiento, ordenado por índice.
+    """
+    applied: int
+    failed: int
+    results: list[PostingResult]
+
+class Transfer(BaseModel):
+    """
+    Modelo de una transferencia entre dos cuentas de la misma moneda.
+    
+    Attributes:
+        from_id (str): ID de la cuenta de origen (cargo).
+        to_id (str): ID de la cuenta de destino (abono).
+        amount (float): Importe a transferir (mayor que 0).
+    """
+    from_id: str = Field(pattern=r"^[0-9a-fA-F]{24}$")
+    to_id: str = Field(pattern=r"^[0-9a-fA-F]{24}$")
+    amount: float = Field(..., gt=0)
+
+    @model_validator(mode="after")
+    def _distinct_accounts(self):
+        if self.from_id.lower() == self.to_id.lower():
+            raise ValueError("Source and destination accounts must be different.")
+        return self
+
+class TransferResult(BaseModel):
+    """
+    Resultado de una transferencia.
+    
+    Attributes:
+        index (int): Posición de la transferencia en la entrada (desde 0).
+        status (Literal): "completed", "not_found", "insufficient_funds",
+            "currency_mismatch", "invalid" o "database".
+        id (str, opcional): ID de la transferencia completada (``transfer_id``
+            de sus movimientos en el libro).
+        from_balance (float, opcional): Saldo de la cuenta de origen tras la transferencia.
+        to_balance (float, opcional): Saldo de la cuenta de destino tras la transferencia.
+        detail (str, opcional): Descripción del error.
+    """
+    index: int = 0
+    status: Literal["completed", "not_found", "insufficient_funds", "currency_mismatch", "invalid", "database"]
+    id: Optional[str] = None
+    from_balance: Optional[float] = None
+    to_balance: Optional[float] = None
+    detail: Optional[str] = None
+
+class TransfersResponse(BaseModel):
+    """
+    Modelo de respuesta para un lote de transferencias.
+    
+    Attributes:
+        completed (int): Número de transferencias completadas.
+        failed (int): Número de transferencias rechazadas.
+        results (list[TransferResult]): Resultado por transferencia, ordenado por índice.
+    """
+    completed: int
+    failed: int
+    results: list[TransferResult]
+
 class UpdateAccountBalanceResponse(BaseModel):
     """
     Modelo de respuesta para la actualización del saldo de una cuenta.
@@ -71,9 +211,215 @@ class Account(BaseModel):
 
 class Accounts(BaseModel):
     """
-    Modelo para una colección de cuentas bancarias.
+    Modelo para una página de cuentas bancarias.
     
     Attributes:
         accounts (list[Account]): Lista de cuentas bancarias.
+        next_cursor (str, opcional): Cursor para solicitar la siguiente página
+            (``after``). Es ``None`` cuando no hay más cuentas.
+    """
+    accounts: list[Account]
+    next_cursor: Optional[str] = None
+
+# Campos de una cuenta que pueden pedirse con ``fields`` (el id se incluye siempre)
+ACCOUNT_FIELDS = ("account_number", "holder_name", "account_type", "balance", "currency")
+
+class AccountQuery(BaseModel):
     """
-    accounts: list[Account]
\ No newline at end of file
+    Filtros, orden y proyección de un listado de cuentas.
+    
+    Attributes:
+        currency (Literal, opcional): Moneda de las cuentas.
+        account_type (Literal, opcional): Tipo de las cuentas.
+        min_balance (float, opcional): Saldo mínimo (incluido).
+        max_balance (float, opcional): Saldo máximo (incluido).
+        holder_name_prefix (str, opcional): Prefijo del nombre del titular
+            (distingue mayúsculas para poder usar el índice).
+        sort (Literal): Campo de orden; con "-" delante es descendente.
+            Por defecto "id" (orden de creación).
+        fields (str, opcional): Campos a retornar separados por comas, p. ej.
+            "account_number,balance". El id y el campo de orden se incluyen siempre.
+    """
+    currency: Optional[Literal["USD", "EUR"]] = None
+    account_type: Optional[Literal["saving", "checking"]] = None
+    min_balance: Optional[float] = None
+    max_balance: Optional[float] = None
+    holder_name_prefix: Optional[str] = Field(None, min_length=1, max_length=100)
+    sort: Literal[
+        "id", "-id", "balance", "-balance",
+        "account_number", "-account_number", "holder_name", "-holder_name"
+    ] = "id"
+    fields: Optional[str] = Field(None, pattern=rf"^({'|'.join(ACCOUNT_FIELDS)})(,({'|'.join(ACCOUNT_FIELDS)}))*$")
+
+class AccountListQuery(AccountQuery):
+    """
+    Parámetros de ``GET /accounts``: filtros, orden y campos más la paginación.
+    
+    Attributes:
+        limit (int): Número máximo de cuentas por página (1-1000).
+        after (str, opcional): Cursor ``next_cursor`` de la página anterior.
+        stream (bool): Retornar todas las cuentas como NDJSON.
+        batch_size (int): Número de cuentas por lote en modo streaming.
+    """
+    limit: int = Field(100, ge=1, le=1000)
+    after: Optional[str] = None
+    stream: bool = False
+    batch_size: int = Field(1000, ge=1, le=10000)
+
+class AccountExportQuery(AccountQuery):
+    """
+    Parámetros de ``GET /accounts/export``: filtros, orden y campos más el formato.
+    
+    Attributes:
+        format (Literal): Formato del volcado, "ndjson" o "csv".
+        gzip (bool): Comprimir el volcado con gzip al vuelo.
+        batch_size (int): Número de cuentas por lote leído de la base de datos.
+    """
+    format: Literal["ndjson", "csv"] = "ndjson"
+    gzip: bool = False
+    batch_size: int = Field(1000, ge=1, le=10000)
+
+class PartialAccount(BaseModel):
+    """
+    Cuenta bancaria con solo los campos pedidos en ``fields``.
+    
+    Attributes:
+        id (str): ID único de la cuenta.
+        account_number (str, opcional): Número de la cuenta.
+        holder_name (str, opcional): Nombre del titular.
+        account_type (str, opcional): Tipo de cuenta.
+        balance (float, opcional): Saldo actual de la cuenta.
+        currency (str, opcional): Moneda de la cuenta.
+    """
+    id: str
+    account_number: Optional[str] = None
+    holder_name: Optional[str] = None
+    account_type: Optional[str] = None
+    balance: Optional[float] = None
+    currency: Optional[str] = None
+
+class PartialAccounts(BaseModel):
+    """
+    Modelo para una página de cuentas proyectadas con ``fields``.
+    
+    Attributes:
+        accounts (list[PartialAccount]): Cuentas con los campos pedidos.
+        next_cursor (str, opcional): Cursor para solicitar la siguiente página.
+    """
+    accounts: list[PartialAccount]
+    next_cursor: Optional[str] = None
+
+class AccountTotal(BaseModel):
+    """
+    Saldo total y número de cuentas de una combinación de moneda y tipo de cuenta.
+    
+    Attributes:
+        currency (str): Moneda de las cuentas.
+        account_type (str): Tipo de las cuentas.
+        accounts (int): Número de cuentas.
+        balance (float): Suma de los saldos.
+    """
+    currency: str
+    account_type: str
+    accounts: int
+    balance: float
+
+class AccountTotals(BaseModel):
+    """
+    Modelo de respuesta de los totales de la cartera.
+    
+    Attributes:
+        totals (list[AccountTotal]): Totales por moneda y tipo de cuenta.
+    """
+    totals: list[AccountTotal]
+
+class TotalsDrift(BaseModel):
+    """
+    Diferencia entre los totales mantenidos y los recalculados de una combinación.
+    
+    Attributes:
+        currency (str): Moneda de las cuentas.
+        account_type (str): Tipo de las cuentas.
+        stored_accounts (int): Número de cuentas en los totales mantenidos.
+        actual_accounts (int): Número de cuentas recalculado.
+        stored_balance (float): Saldo total mantenido.
+        actual_balance (float): Saldo total recalculado.
+    """
+    currency: str
+    account_type: str
+    stored_accounts: int
+    actual_accounts: int
+    stored_balance: float
+    actual_balance: float
+
+class TotalsDriftReport(BaseModel):
+    """
+    Resultado de la comprobación de desviación de los totales.
+    
+    Attributes:
+        in_sync (bool): Si los totales mantenidos coinciden con los recalculados.
+        drift (list[TotalsDrift]): Combinaciones que no coinciden.
+        reconciled (bool): Si los totales se sustituyeron por los recalculados.
+    """
+    in_sync: bool
+    drift: list[TotalsDrift]
+    reconciled: bool = False
+
+class TransactionQuery(BaseModel):
+    """
+    Parámetros de ``GET /accounts/{account_id}/transactions``.
+    
+    Attributes:
+        limit (int): Número máximo de movimientos por página (1-1000).
+        after (int, opcional): Cursor ``next_cursor`` de la página anterior.
+        since (datetime, opcional): Fecha mínima de los movimientos (incluida).
+        until (datetime, opcional): Fecha máxima de los movimientos (excluida).
+    """
+    limit: int = Field(100, ge=1, le=1000)
+    after: Optional[int] = Field(None, ge=0)
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+class Transaction(BaseModel):
+    """
+    Movimiento del libro de una cuenta.
+    
+    Attributes:
+        seq (int): Número de movimiento de la cuenta, creciente desde 1.
+        amount (float): Importe sumado al saldo.
+        balance (float): Saldo resultante.
+        created_at (datetime): Fecha del movimiento (UTC).
+        transfer_id (str, opcional): Transferencia que originó el movimiento.
+    """
+    seq: int
+    amount: float
+    balance: float
+    created_at: datetime
+    transfer_id: Optional[str] = None
+
+class Transactions(BaseModel):
+    """
+    Página del historial de movimientos de una cuenta.
+    
+    Attributes:
+        transactions (list[Transaction]): Movimientos en orden de ``seq``.
+        next_cursor (int, opcional): Cursor para pedir la página siguiente;
+            None si no hay más movimientos.
+    """
+    transactions: list[Transaction]
+    next_cursor: Optional[int] = None
+
+class BalanceAt(BaseModel):
+    """
+    Saldo de una cuenta en una fecha.
+    
+    Attributes:
+        id (str): ID de la cuenta.
+        at (datetime): Fecha consultada (UTC).
+        balance (float): Saldo en esa fecha.
+        seq (int): Último movimiento aplicado en esa fecha (0 si ninguno).
+    """
+    id: str
+    at: datetime
+    balance: float
+    seq: int
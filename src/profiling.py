@@ -0,0 +1,333 @@
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+import asyncio
+import hmac
+import orjson
+import os
+import sys
+import threading
+import time
+
+# Perfilado bajo demanda de una petición: con la cabecera ``X-Profile: 1`` (o el
+# parámetro ``?profile=1``) y un ``X-Admin-Token`` válido, la petición se ejecuta
+# con normalidad bajo un profiler de muestreo y, en lugar de su respuesta, se
+# devuelve el informe del perfil en JSON. Sin ADMIN_TOKEN configurado el
+# perfilado está desactivado.
+#
+# Un hilo muestrea cada ``interval`` la pila del event loop: si está ejecutando la
+# petición se cuenta la pila en curso; si la petición está esperando (MongoDB,
+# threadpool, cola de admisión) se cuenta la cadena de ``await`` en la que está
+# suspendida, terminada en ``[await]``. Las tareas que lance la petición (p. ej.
+# el envío de una respuesta en streaming) se registran con una task factory
+# mientras dure el perfil y cuentan como parte de la petición; si la petición está
+# esperando, se cuenta la espera de la más reciente que sigue viva. También se muestrean los hilos (p. ej. el
+# threadpool del backend síncrono) que están ejecutando código de la aplicación;
+# esos hilos son compartidos, así que con otras peticiones en curso su tiempo
+# puede incluir trabajo ajeno. Cada muestra pesa el tiempo transcurrido desde la
+# anterior, de modo que el informe está en milisegundos aunque el GIL retrase el
+# muestreo; mientras haya un perfil en curso el intervalo de cambio del GIL se
+# reduce al de muestreo para que el hilo de muestreo no espere 5 ms por muestra.
+
+# Token de administración (cabecera X-Admin-Token) que autoriza el perfilado y las
+# rutas /admin; None los desactiva
+admin_token = None
+# Intervalo de muestreo y duración máxima del muestreo de una petición, en segundos
+interval = 0.001
+max_seconds = 30.0
+
+# Directorio de la aplicación: solo los hilos con código de aquí se muestrean
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Funciones y pilas incluidas en el informe
+TOP_FUNCTIONS = 30
+TOP_STACKS = 50
+
+AWAIT = "[await]"
+THREAD = "[thread]"
+
+# Muestreador de la petición en curso, heredado por las tareas que lance
+current_sampler = ContextVar("profiled_request", default=None)
+
+# Perfiles en curso, y task factory e intervalo del GIL previos a activarlos
+_active = 0
+_previous = None
+
+def configure(token: str | None = None, interval_ms: float = 1.0, max_duration: float = 30.0):
+    """
+    Configura el perfilado bajo demanda.
+
+    Args:
+        token (str, opcional): Token de administración exigido en ``X-Admin-Token``;
+            sin token el perfilado queda desactivado.
+        interval_ms (float): Intervalo de muestreo en milisegundos.
+        max_duration (float): Segundos máximos de muestreo por petición.
+
+    Raises:
+        ValueError: Si el intervalo o la duración máxima no son positivos.
+    """
+    global admin_token, interval, max_seconds
+    if interval_ms <= 0 or max_duration <= 0:
+        raise ValueError("Profiling interval and max duration must be positive.")
+    admin_token = token or None
+    interval = interval_ms / 1000
+    max_seconds = max_duration
+
+@lru_cache(maxsize=8192)
+def frame_name(code) -> str:
+    """
+    Retorna el nombre de una función del perfil: ``nombre (archivo:línea)``, con el
+    archivo relativo a la aplicación o al paquete instalado.
+    """
+    path = code.co_filename
+    if path.startswith(APP_ROOT):
+        path = os.path.relpath(path, APP_ROOT)
+    elif "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[-1]
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+
+def _frames_until(frame, roots) -> list | None:
+    """
+    Retorna los nombres de las funciones desde la primera de ``roots`` hasta
+    ``frame`` (la más interna al final), o ``None`` si ninguna está en la pila.
+    """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        if frame in roots:
+            names.reverse()
+            return names
+        frame = frame.f_back
+    return None
+
+def _await_chain(coroutine) -> list:
+    """
+    Retorna los nombres de las funciones de una cadena de corrutinas suspendida,
+    siguiendo los ``await`` desde la más externa.
+    """
+    names = []
+    while coroutine is not None:
+        frame = getattr(coroutine, "cr_frame", None) or getattr(coroutine, "ag_frame", None) or getattr(coroutine, "gi_frame", None)
+        if frame is None:
+            break
+        names.append(frame_name(frame.f_code))
+        coroutine = getattr(coroutine, "cr_await", None) or getattr(coroutine, "ag_await", None) or getattr(coroutine, "gi_yieldfrom", None)
+    return names
+
+def _app_frames(frame) -> list:
+    """
+    Retorna la pila de un hilo desde su primera función de la aplicación, o una
+    lista vacía si el hilo no está ejecutando código de la aplicación.
+    """
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    for index in range(len(frames) - 1, -1, -1):
+        filename = frames[index].f_code.co_filename
+        if filename.startswith(APP_ROOT) and filename != __file__:
+            return [frame_name(f.f_code) for f in reversed(frames[:index + 1])]
+    return []
+
+def _task_factory(loop, coroutine, **kwargs):
+    """
+    Task factory activa durante los perfiles: registra en el muestreador de la
+    petición las tareas que esta crea.
+    """
+    factory = _previous[0]
+    task = factory(loop, coroutine, **kwargs) if factory else asyncio.Task(coroutine, loop=loop, **kwargs)
+    context = kwargs.get("context")
+    sampler = context.get(current_sampler) if context is not None else current_sampler.get()
+    if sampler is not None:
+        sampler.roots.append(coroutine)
+    return task
+
+def _activate(loop):
+    global _active, _previous
+    if not _active:
+        _previous = (loop.get_task_factory(), sys.getswitchinterval())
+        loop.set_task_factory(_task_factory)
+        sys.setswitchinterval(min(_previous[1], interval))
+    _active += 1
+
+def _deactivate(loop):
+    global _active
+    _active -= 1
+    if not _active:
+        loop.set_task_factory(_previous[0])
+        sys.setswitchinterval(_previous[1])
+
+class Sampler(threading.Thread):
+    """
+    Hilo que muestrea la ejecución de una petición.
+
+    Args:
+        loop_thread (int): Identificador del hilo del event loop.
+        coroutine (Coroutine): Corrutina de la petición (la aplicación dentro del middleware).
+    """
+
+    def __init__(self, loop_thread: int, coroutine):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread = loop_thread
+        # Corrutina de la petición y de las tareas que lanza, en orden de creación
+        self.roots = [coroutine]
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        started = last = time.perf_counter()
+        while not self._stop_event.wait(interval):
+            now = time.perf_counter()
+            if now - started > max_seconds:
+                break
+            self._sample(now - last)
+            last = now
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def _sample(self, weight: float):
+        live = [root for root in list(self.roots) if getattr(root, "cr_frame", None) is not None]
+        if not live:
+            return
+        frames = {root.cr_frame for root in live}
+        self.samples += 1
+        for thread, frame in sys._current_frames().items():
+            if thread == self.ident:
+                continue
+            if thread == self.loop_thread:
+                stack = _frames_until(frame, frames)
+                if stack is None:
+                    # La petición no está en ejecución: se cuenta dónde espera
+                    stack = _await_chain(live[-1]) + [AWAIT]
+            else:
+                stack = _app_frames(frame)
+                if not stack:
+                    continue
+                stack = [THREAD] + stack
+            self.stacks[tuple(stack)] += weight
+
+    def report(self, status: int, duration: float) -> dict:
+        """
+        Construye el informe del perfil.
+
+        Args:
+            status (int): Código de estado de la respuesta de la petición.
+            duration (float): Duración de la petición en segundos.
+
+        Returns:
+            dict: Duración, muestras, tiempo en ejecución, esperando y en hilos,
+                funciones con más tiempo (total e ``self``) y pilas plegadas
+                (``a;b;c``, compatibles con flamegraph y speedscope), en ms.
+        """
+        total, own = Counter(), Counter()
+        breakdown = Counter()
+        for stack, seconds in self.stacks.items():
+            kind = "threads" if stack[0] == THREAD else "awaiting" if stack[-1] == AWAIT else "running"
+            breakdown[kind] += seconds
+            own[stack[-1]] += seconds
+            for name in set(stack):
+                total[name] += seconds
+        ms = lambda seconds: round(seconds * 1000, 3)
+        return {
+            "status": status,
+            "duration_ms": ms(duration),
+            "interval_ms": ms(interval),
+            "samples": self.samples,
+            "running_ms": ms(breakdown["running"]),
+            "awaiting_ms": ms(breakdown["awaiting"]),
+            "threads_ms": ms(breakdown["threads"]),
+            "functions": [
+                {"function": name, "total_ms": ms(seconds), "self_ms": ms(own[name])}
+                for name, seconds in total.most_common(TOP_FUNCTIONS)
+            ],
+            "stacks": [
+                {"stack": ";".join(stack), "ms": ms(seconds)}
+                for stack, seconds in self.stacks.most_common(TOP_STACKS)
+            ],
+        }
+
+def _requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value not in (b"0", b"false", b"")
+    query = scope.get("query_string", b"")
+    if b"profile=" in query:
+        for part in query.split(b"&"):
+            if part.startswith(b"profile="):
+                return part[8:] not in (b"0", b"false", b"")
+    return False
+
+def valid_admin_token(value: bytes | None) -> bool:
+    """
+    Comprueba un token de administración en tiempo constante.
+
+    Args:
+        value (bytes, opcional): Valor de la cabecera ``X-Admin-Token``.
+
+    Returns:
+        bool: ``True`` si hay un token configurado y coincide.
+    """
+    if admin_token is None or value is None:
+        return False
+    return hmac.compare_digest(value, admin_token.encode())
+
+def _authorized(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-admin-token":
+            return valid_admin_token(value)
+    return False
+
+async def _send_json(send, status: int, content: dict, headers=()):
+    body = orjson.dumps(content)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila las peticiones que lo piden con un token de administración.
+
+    La respuesta de una petición perfilada se descarta (su código de estado va en
+    el informe y en la cabecera ``X-Profiled-Status``) y se devuelve el informe.
+    Sin token válido responde 403.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _authorized(scope):
+            await _send_json(send, 403, {"detail": "Profiling requires a valid X-Admin-Token"})
+            return
+
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        coroutine = self.app(scope, receive, discard)
+        sampler = Sampler(threading.get_ident(), coroutine)
+        loop = asyncio.get_running_loop()
+        token = current_sampler.set(sampler)
+        _activate(loop)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await coroutine
+        finally:
+            sampler.stop()
+            _deactivate(loop)
+            current_sampler.reset(token)
+        report = sampler.report(status, time.perf_counter() - started)
+        await _send_json(send, 200, report, [(b"x-profiled-status", str(status).encode())])
@@ -0,0 +1,180 @@
+from models import account_model
+from bson import ObjectId
+from bson.errors import InvalidId
+import base64
+import json
+import re
+
+# Traducción de los listados de cuentas (AccountQuery) a consultas de MongoDB,
+# compartida por los repositorios síncrono, asíncrono y en memoria.
+
+# Proyección de una cuenta con la forma de la respuesta de la API: MongoDB
+# convierte el _id en el campo id, sin procesar cada documento en Python
+ACCOUNT_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "account_number": 1,
+    "holder_name": 1,
+    "account_type": 1,
+    "balance": 1,
+    "currency": 1,
+}
+
+# Campos de orden con valores únicos: no necesitan desempate por _id
+UNIQUE_SORT_FIELDS = {"_id", "account_number"}
+
+def parse_sort(query: account_model.AccountQuery) -> tuple[str, int]:
+    """
+    Retorna el campo de MongoDB y la dirección del orden pedido.
+
+    Args:
+        query (AccountQuery): Parámetros del listado.
+
+    Returns:
+        tuple[str, int]: Campo (``_id`` para "id") y dirección (1 o -1).
+    """
+    direction = -1 if query.sort.startswith("-") else 1
+    field = query.sort.lstrip("-")
+    return ("_id" if field == "id" else field), direction
+
+def encode_cursor(account: dict, query: account_model.AccountQuery) -> str:
+    """
+    Construye el cursor de la página siguiente a partir de la última cuenta.
+
+    Con el orden por defecto el cursor es el id de la cuenta; con otro orden es
+    un token opaco con el valor del campo de orden y el id (desempate).
+
+    Args:
+        account (dict): Última cuenta de la página (con ``id`` y el campo de orden).
+        query (AccountQuery): Parámetros del listado.
+
+    Returns:
+        str: Cursor para el parámetro ``after``.
+    """
+    field, _ = parse_sort(query)
+    if field == "_id":
+        return account["id"]
+    token = json.dumps([account[field], account["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode()
+
+def decode_cursor(cursor: str, query: account_model.AccountQuery) -> tuple:
+    """
+    Decodifica un cursor generado por ``encode_cursor`` para el mismo orden.
+
+    Args:
+        cursor (str): Valor del parámetro ``after``.
+        query (AccountQuery): Parámetros del listado.
+
+    Returns:
+        tuple: Valor del campo de orden y ``ObjectId`` de la última cuenta.
+
+    Raises:
+        ValueError: Si el cursor no es válido para el orden pedido.
+    """
+    field, _ = parse_sort(query)
+    try:
+        if field == "_id":
+            _id = ObjectId(cursor)
+            return _id, _id
+        value, account_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        _id = ObjectId(account_id)
+    except (InvalidId, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor.") from e
+    expected = (int, float) if field == "balance" else str
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError("Invalid cursor.")
+    return value, _id
+
+def build_filter(query: account_model.AccountQuery, after: str | None = None) -> dict:
+    """
+    Construye el filtro de MongoDB con los filtros del listado y el cursor.
+
+    Args:
+        query (AccountQuery): Parámetros del listado.
+        after (str, opcional): Cursor de la página anterior.
+
+    Returns:
+        dict: Filtro para ``$match``.
+    """
+    conditions = {}
+    if query.currency is not None:
+        conditions["currency"] = query.currency
+    if query.account_type is not None:
+        conditions["account_type"] = query.account_type
+    balance = {}
+    if query.min_balance is not None:
+        balance["$gte"] = query.min_balance
+    if query.max_balance is not None:
+        balance["$lte"] = query.max_balance
+    if balance:
+        conditions["balance"] = balance
+    if query.holder_name_prefix is not None:
+        # Prefijo anclado y sensible a mayúsculas: se resuelve con el índice
+        conditions["holder_name"] = {"$regex": "^" + re.escape(query.holder_name_prefix)}
+    if after is None:
+        return conditions
+
+    field, direction = parse_sort(query)
+    value, _id = decode_cursor(after, query)
+    operator = "$gt" if direction == 1 else "$lt"
+    if field in UNIQUE_SORT_FIELDS:
+        page = {field: {operator: value}}
+    else:
+        page = {"$or": [{field: {operator: value}}, {field: value, "_id": {operator: _id}}]}
+    return {"$and": [conditions, page]} if conditions else page
+
+def build_sort(query: account_model.AccountQuery) -> dict:
+    """
+    Construye el orden de MongoDB, con desempate por ``_id`` si el campo no es único.
+
+    Args:
+        query (AccountQuery): Parámetros del listado.
+
+    Returns:
+        dict: Especificación para ``$sort``.
+    """
+    field, direction = parse_sort(query)
+    if field in UNIQUE_SORT_FIELDS:
+        return {field: direction}
+    return {field: direction, "_id": direction}
+
+def build_projection(query: account_model.AccountQuery) -> dict:
+    """
+    Construye la proyección con los campos pedidos, el id y el campo de orden.
+
+    Args:
+        query (AccountQuery): Parámetros del listado.
+
+    Returns:
+        dict: Especificación para ``$project``.
+    """
+    if query.fields is None:
+        return ACCOUNT_PROJECTION
+    field, _ = parse_sort(query)
+    projection = {"_id": 0, "id": {"$toString": "$_id"}}
+    projection.update((name, 1) for name in query.fields.split(","))
+    if field != "_id":
+        projection[field] = 1
+    return projection
+
+def build_pipeline(query: account_model.AccountQuery, after: str | None = None, limit: int | None = None) -> list:
+    """
+    Construye la agregación completa de un listado de cuentas.
+
+    Args:
+        query (AccountQuery): Parámetros del listado.
+        after (str, opcional): Cursor de la página anterior.
+        limit (int, opcional): Número máximo de documentos.
+
+    Returns:
+        list: Etapas de la agregación.
+    """
+    pipeline = []
+    match = build_filter(query, after)
+    if match:
+        pipeline.append({"$match": match})
+    pipeline.append({"$sort": build_sort(query)})
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$project": build_projection(query)})
+    return pipeline
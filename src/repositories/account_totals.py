@@ -0,0 +1,147 @@
+from pymongo import UpdateMany, UpdateOne
+import random
+
+# Totales de saldo y número de cuentas por moneda y tipo de cuenta, mantenidos
+# con deltas $inc en la colección account_totals. Compartido por los
+# repositorios síncrono y asíncrono.
+#
+# Cada combinación (moneda, tipo) se reparte en TOTALS_SHARDS documentos y cada
+# escritura incrementa uno al azar: todas las escrituras de saldo tocan un total,
+# y con un único documento por combinación competirían por él. La lectura suma
+# los fragmentos, O(monedas × tipos × fragmentos) sin depender del número de cuentas.
+#
+# Cada escritura incrementa además el campo ``version`` del fragmento que toca, de
+# modo que la suma de ``version`` crece con cada escritura de cuentas y sirve como
+# versión de la colección (ETag del listado) sin escrituras adicionales.
+
+TOTALS_COLLECTION = "account_totals"
+
+# Época de la versión en este proceso. Las escrituras que incrementan los totales
+# fuera de una transacción (altas por lotes) la avanzan si el incremento falla: la
+# versión leída ya no refleja las cuentas y los ETag emitidos con ella dejan de
+# validarse aquí
+version_epoch = 0
+
+TOTALS_SHARDS = 16
+
+def invalidate_version():
+    """
+    Invalida los ETag emitidos con la versión actual en este proceso.
+    """
+    global version_epoch
+    version_epoch += 1
+
+# Suma de los fragmentos por (moneda, tipo)
+READ_PIPELINE = [
+    {"$group": {
+        "_id": {"currency": "$_id.currency", "account_type": "$_id.account_type"},
+        "accounts": {"$sum": "$accounts"},
+        "balance": {"$sum": "$balance"},
+    }},
+    {"$sort": {"_id.currency": 1, "_id.account_type": 1}},
+]
+
+# Versión de la colección de cuentas: suma de las versiones de los fragmentos
+VERSION_PIPELINE = [
+    {"$group": {"_id": None, "version": {"$sum": "$version"}}},
+]
+
+# Recálculo completo desde la colección de cuentas, para conciliación
+RECOMPUTE_PIPELINE = [
+    {"$group": {
+        "_id": {"currency": "$currency", "account_type": "$account_type"},
+        "accounts": {"$sum": 1},
+        "balance": {"$sum": "$balance"},
+    }},
+    {"$sort": {"_id.currency": 1, "_id.account_type": 1}},
+]
+
+def add_delta(deltas: dict, account: dict, accounts: int, balance: float):
+    """
+    Acumula en ``deltas`` el cambio de una cuenta sobre su (moneda, tipo).
+
+    Args:
+        deltas (dict): Deltas ``{(moneda, tipo): [cuentas, saldo]}`` a completar.
+        account (dict): Cuenta con ``currency`` y ``account_type``.
+        accounts (int): Cambio en el número de cuentas.
+        balance (float): Cambio en el saldo total.
+    """
+    delta = deltas.setdefault((account["currency"], account["account_type"]), [0, 0.0])
+    delta[0] += accounts
+    delta[1] += balance
+
+def delta_operations(deltas: dict) -> list:
+    """
+    Construye los ``$inc`` con upsert de un conjunto de deltas.
+
+    Args:
+        deltas (dict): Deltas ``{(moneda, tipo): [cuentas, saldo]}``.
+
+    Returns:
+        list[UpdateOne]: Una operación por combinación, sobre un fragmento al azar.
+    """
+    return [
+        UpdateOne(
+            {"_id": {"currency": currency, "account_type": account_type, "shard": random.randrange(TOTALS_SHARDS)}},
+            {"$inc": {"accounts": accounts, "balance": balance, "version": 1}},
+            upsert=True
+        )
+        for (currency, account_type), (accounts, balance) in deltas.items()
+    ]
+
+def to_rows(groups) -> list[dict]:
+    """
+    Aplana el resultado de ``READ_PIPELINE`` o ``RECOMPUTE_PIPELINE``.
+
+    Args:
+        groups (Iterable[dict]): Documentos agrupados por ``_id`` (moneda, tipo).
+
+    Returns:
+        list[dict]: Filas ``{currency, account_type, accounts, balance}``.
+    """
+    return [
+        {
+            "currency": group["_id"]["currency"],
+            "account_type": group["_id"]["account_type"],
+            "accounts": group["accounts"],
+            "balance": group["balance"],
+        }
+        for group in groups
+    ]
+
+def to_version(groups) -> int:
+    """
+    Extrae la versión de la colección del resultado de ``VERSION_PIPELINE``.
+
+    Args:
+        groups (Iterable[dict]): Documentos retornados por la agregación.
+
+    Returns:
+        int: Suma de las versiones de los fragmentos (0 si no hay totales).
+    """
+    for group in groups:
+        return group["version"]
+    return 0
+
+def replace_operations(rows: list[dict]) -> list:
+    """
+    Construye las operaciones que sustituyen los totales por ``rows``.
+
+    Cada combinación queda con el total en el fragmento 0 y el resto a cero. Las
+    versiones de los fragmentos se conservan y la del fragmento 0 se incrementa,
+    para que la versión de la colección nunca retroceda.
+
+    Args:
+        rows (list[dict]): Totales recalculados.
+
+    Returns:
+        list: Operaciones para ``bulk_write``.
+    """
+    operations = [UpdateMany({}, {"$set": {"accounts": 0, "balance": 0.0}})]
+    for row in rows:
+        operations.append(UpdateOne(
+            {"_id": {"currency": row["currency"], "account_type": row["account_type"], "shard": 0}},
+            {"$set": {"accounts": row["accounts"], "balance": row["balance"]}, "$inc": {"version": 1}},
+            upsert=True
+        ))
+    return operations
@@ -0,0 +1,721 @@
+from models import account_model
+from repositories import account_query, account_totals, change_events, ledger, read_routing, settlement
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Colecciones de cuentas, de totales, de movimientos y de fotos de saldo; se
+# inyectan al arranque con configure()
+collection = None
+totals_collection = None
+ledger_collection = None
+snapshots_collection = None
+
+# Vistas de lectura con la preferencia de lectura de cada operación (read_routing):
+# cuentas por operación, totales (totals) y movimientos y fotos de saldo (history)
+readers = {}
+totals_reader = None
+ledger_reader = None
+snapshots_reader = None
+version_reader = None
+
+def configure(database):
+    """
+    Inyecta la base de datos sobre la que opera el repositorio.
+
+    Args:
+        database (AsyncDatabase): Base de datos del cliente asíncrono creado en el arranque.
+    """
+    global collection, totals_collection, ledger_collection, snapshots_collection
+    global totals_reader, ledger_reader, snapshots_reader, version_reader
+    collection = database.get_collection('accounts')
+    totals_collection = database.get_collection(account_totals.TOTALS_COLLECTION)
+    ledger_collection = database.get_collection(ledger.LEDGER_COLLECTION, codec_options=ledger.CODEC_OPTIONS)
+    snapshots_collection = database.get_collection(ledger.SNAPSHOTS_COLLECTION, codec_options=ledger.CODEC_OPTIONS)
+    readers.clear()
+    readers.update({operation: read_routing.reader(collection, operation) for operation in read_routing.OPERATIONS})
+    totals_reader = read_routing.reader(totals_collection, "totals")
+    ledger_reader = read_routing.reader(ledger_collection, "history")
+    snapshots_reader = read_routing.reader(snapshots_collection, "history")
+    # La versión se lee como el listado al que acompaña
+    version_reader = read_routing.reader(totals_collection, "list")
+
+async def _increment_totals(deltas: dict, session):
+    """
+    Aplica a los totales por moneda y tipo los deltas de una escritura de cuentas.
+
+    Se ejecuta en la transacción de la escritura (la suma de ``version`` de los
+    totales es la versión de los listados): si falla, la transacción se aborta y
+    ni las cuentas ni los totales cambian.
+
+    Args:
+        deltas (dict): Deltas ``{(moneda, tipo): [cuentas, saldo]}``.
+        session (ClientSession): Sesión con la transacción de la escritura.
+    """
+    if not deltas:
+        return
+    await totals_collection.bulk_write(account_totals.delta_operations(deltas), ordered=False, session=session)
+
+async def _record_entries(entries: list[dict], session):
+    """
+    Escribe movimientos del libro y sus fotos de saldo dentro de una transacción.
+
+    Args:
+        entries (list[dict]): Movimientos construidos con ``ledger.entry``.
+        session (ClientSession): Sesión con la transacción de la escritura de saldo.
+    """
+    if not entries:
+        return
+    await ledger_collection.insert_many(entries, session=session)
+    snapshots = ledger.snapshots_for(entries)
+    if snapshots:
+        await snapshots_collection.insert_many(snapshots, session=session)
+
+async def _in_transaction(callback):
+    """
+    Ejecuta ``callback(session)`` en una transacción multi-documento.
+
+    ``with_transaction`` reintenta la transacción completa ante errores
+    transitorios y el commit ante un resultado desconocido. Requiere que MongoDB
+    se ejecute como replica set (basta uno de un solo nodo).
+
+    Args:
+        callback (Callable): Función que recibe la sesión y ejecuta las escrituras.
+
+    Returns:
+        Any: Resultado de ``callback``.
+    """
+    async with collection.database.client.start_session() as session:
+        return await session.with_transaction(callback)
+
+async def create_account(account_data: account_model.CreateAccount):
+    """
+    Crea una nueva cuenta bancaria en la base de datos.
+
+    La inserción y el incremento de los totales se confirman en una transacción.
+
+    Args:
+        account_data (CreateAccount): Datos de la cuenta a crear.
+
+    Returns:
+        CreateAccountResponse: Respuesta con el ID de la cuenta creada.
+        None: Si ocurre un error durante la creación.
+
+    Raises:
+        DuplicateKeyError: Si ya existe una cuenta con el mismo número
+            (índice único sobre ``account_number``).
+    """
+    document = account_data.model_dump()
+    deltas = {}
+    account_totals.add_delta(deltas, document, 1, document["balance"])
+
+    async def write(session):
+        result = await collection.insert_one(document, session=session)
+        await _increment_totals(deltas, session)
+        return result
+
+    try:
+        result = await _in_transaction(write)
+    except DuplicateKeyError:
+        raise
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        return None
+
+    change_events.publish_created([document])
+    return account_model.CreateAccountResponse(id=str(result.inserted_id))
+
+async def create_accounts(accounts: list[account_model.CreateAccount]):
+    """
+    Inserta un lote de cuentas con una única operación ``insert_many`` no ordenada.
+
+    Al ser no ordenada, un duplicado no detiene la inserción del resto del lote.
+    Por lo mismo no puede ir en una transacción (un duplicado la abortaría): los
+    totales se incrementan después y, si eso falla, quedan desviados hasta la
+    siguiente conciliación (``recompute_totals`` / ``replace_totals``).
+
+    Args:
+        accounts (list[CreateAccount]): Cuentas a crear.
+
+    Returns:
+        list[dict]: Por cada cuenta, en el mismo orden, ``{"id": ...}`` si se creó
+            o ``{"error": ..., "detail": ...}`` si fue rechazada.
+        None: Si ocurre un error que impide procesar el lote.
+    """
+    documents = [account.model_dump() for account in accounts]
+    failures = {}
+    try:
+        # pymongo asigna el _id de cada documento antes de enviarlo
+        await collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            error = "duplicate" if write_error["code"] == 11000 else "database"
+            failures[write_error["index"]] = {"error": error, "detail": write_error["errmsg"]}
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        return None
+
+    deltas = {}
+    created = [document for i, document in enumerate(documents) if i not in failures]
+    for document in created:
+        account_totals.add_delta(deltas, document, 1, document["balance"])
+    try:
+        await _increment_totals(deltas, None)
+    except Exception as e:
+        # Las cuentas ya están creadas: se reportan como creadas y los totales
+        # quedan desviados hasta la siguiente conciliación; la versión no avanzó
+        logger.error("MongoDB error updating account totals: %s", e)
+        account_totals.invalidate_version()
+    change_events.publish_created(created)
+
+    return [
+        failures.get(i) or {"id": str(document["_id"])}
+        for i, document in enumerate(documents)
+    ]
+
+async def get_account_by_account_number(account_number: str):
+    """
+    Busca una cuenta por su número de cuenta.
+
+    Args:
+        account_number (str): Número de cuenta a buscar.
+
+    Returns:
+        dict: Datos de la cuenta encontrada, con el ``_id`` convertido a ``id``.
+        None: Si no se encuentra la cuenta.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la consulta.
+    """
+    try:
+        with read_routing.reading("lookup"):
+            account = await readers["lookup"].find_one({"account_number": account_number})
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+    if not account:
+        return None
+    account["id"] = str(account.pop("_id"))
+    return account
+
+async def update_balance(account_data: account_model.UpdateAccountBalance):
+    """
+    Incrementa el saldo de una cuenta existente y registra el movimiento.
+
+    El ``$inc`` del saldo y del contador ``seq`` de la cuenta y la inserción del
+    movimiento en el libro y el de los totales se confirman juntos en una
+    transacción. El documento
+    posterior de ``find_one_and_update`` da el saldo y el ``seq`` que
+    corresponden exactamente a este incremento aunque haya escrituras concurrentes.
+
+    Args:
+        account_data (UpdateAccountBalance): Datos para actualizar el saldo.
+
+    Returns:
+        dict: Diccionario con id y balance actualizado.
+        None: Si no se encuentra la cuenta o el ID no es válido.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la actualización.
+    """
+    try:
+        _id = ObjectId(account_data.id)
+    except InvalidId:
+        return None
+
+    async def write(session):
+        account = await collection.find_one_and_update(
+            {"_id": _id},
+            {"$inc": {"balance": account_data.balance, "seq": 1}},
+            projection={"_id": 1, "balance": 1, "seq": 1, "currency": 1, "account_type": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        entries = []
+        if account:
+            entries = [ledger.entry(_id, account["currency"], account["seq"], account_data.balance, account["balance"], ledger.now())]
+            await _record_entries(entries, session)
+            deltas = {}
+            account_totals.add_delta(deltas, account, 0, account_data.balance)
+            await _increment_totals(deltas, session)
+        return account, entries
+
+    try:
+        updated_account, entries = await _in_transaction(write)
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+    if not updated_account:
+        return None
+
+    change_events.publish_entries(entries)
+    return {
+        "id": str(updated_account["_id"]),
+        "balance": updated_account["balance"]
+    }
+
+async def update_balance_sequence(account_id: str, amounts: list[float]):
+    """
+    Aplica a una cuenta varios incrementos de saldo con una sola escritura.
+
+    El ``$inc`` suma los importes y avanza ``seq`` tantas posiciones como
+    incrementos; cada incremento se registra como su propio movimiento (ver
+    ``ledger.sequence_entries``) en la misma transacción, junto con los totales.
+    Lo usa la agrupación de incrementos de saldo.
+
+    Args:
+        account_id (str): ID de la cuenta.
+        amounts (list[float]): Importes en orden de aplicación.
+
+    Returns:
+        dict: ``id`` y ``balances``, el saldo posterior a cada incremento en orden.
+        None: Si no se encuentra la cuenta o el ID no es válido.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la actualización.
+    """
+    try:
+        _id = ObjectId(account_id)
+    except InvalidId:
+        return None
+    total = sum(amounts)
+
+    async def write(session):
+        account = await collection.find_one_and_update(
+            {"_id": _id},
+            {"$inc": {"balance": total, "seq": len(amounts)}},
+            projection={"_id": 1, "balance": 1, "seq": 1, "currency": 1, "account_type": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        entries = []
+        if account:
+            entries = ledger.sequence_entries(account, amounts, ledger.now())
+            await _record_entries(entries, session)
+            deltas = {}
+            account_totals.add_delta(deltas, account, 0, total)
+            await _increment_totals(deltas, session)
+        return account, entries
+
+    try:
+        updated_account, entries = await _in_transaction(write)
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+    if not updated_account:
+        return None
+
+    change_events.publish_entries(entries)
+    return {
+        "id": str(updated_account["_id"]),
+        "balances": [entry["balance"] for entry in entries]
+    }
+
+async def apply_balance_increments(increments: dict[str, float]):
+    """
+    Aplica incrementos de saldo a varias cuentas con un único ``bulk_write`` no ordenado.
+
+    Cada cuenta recibe una sola operación ``$inc`` con la suma de sus ajustes.
+    Dentro de la misma transacción se leen el saldo y el ``seq`` resultantes para
+    escribir un movimiento por cuenta (la transacción bloquea las cuentas
+    escritas, así que la lectura ve exactamente estos incrementos); la lectura
+    también indica qué cuentas no existen y da moneda y tipo para los totales,
+    que se incrementan en la misma transacción.
+
+    Args:
+        increments (dict[str, float]): Importe total a sumar por ID de cuenta.
+
+    Returns:
+        set[str]: IDs de las cuentas que no existen (vacío si se aplicaron todas).
+        None: Si ocurre un error durante la escritura.
+    """
+    try:
+        ids = [ObjectId(account_id) for account_id in increments]
+        operations = [
+            UpdateOne({"_id": _id}, {"$inc": {"balance": amount, "seq": 1}})
+            for _id, amount in zip(ids, increments.values())
+        ]
+
+        async def write(session):
+            await collection.bulk_write(operations, ordered=False, session=session)
+            cursor = collection.find(
+                {"_id": {"$in": ids}},
+                {"balance": 1, "seq": 1, "currency": 1, "account_type": 1},
+                session=session
+            )
+            found = {doc["_id"]: doc for doc in await cursor.to_list()}
+            created_at = ledger.now()
+            entries = [
+                ledger.entry(_id, found[_id]["currency"], found[_id]["seq"], amount, found[_id]["balance"], created_at)
+                for _id, amount in zip(ids, increments.values())
+                if _id in found
+            ]
+            await _record_entries(entries, session)
+            deltas = {}
+            for _id, amount in zip(ids, increments.values()):
+                if _id in found:
+                    account_totals.add_delta(deltas, found[_id], 0, amount)
+            await _increment_totals(deltas, session)
+            return found, entries
+
+        found, entries = await _in_transaction(write)
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        return None
+
+    missing = {account_id for _id, account_id in zip(ids, increments) if _id not in found}
+    change_events.publish_entries(entries)
+    return missing
+
+async def apply_transfers(transfers: list[account_model.Transfer]):
+    """
+    Liquida un lote de transferencias entre cuentas en una única transacción.
+
+    Las cuentas implicadas se leen y se escriben en orden de ``_id`` (orden de
+    bloqueo consistente entre lotes concurrentes). Cada transferencia se evalúa
+    con los saldos que dejaron las anteriores (fondos suficientes, misma moneda)
+    y las completadas escriben su cargo y su abono en el libro y sus deltas en
+    los totales. Si otra
+    transacción modifica una de las cuentas, MongoDB aborta con un error
+    transitorio y ``with_transaction`` repite el lote completo con una lectura nueva.
+
+    Args:
+        transfers (list[Transfer]): Transferencias en orden de aplicación.
+
+    Returns:
+        list[dict]: Resultado por transferencia (ver ``settlement.settle``).
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB que impide confirmar el lote.
+    """
+    ids = settlement.account_ids(transfers)
+
+    async def write(session):
+        cursor = collection.find(
+            {"_id": {"$in": ids}},
+            {"balance": 1, "seq": 1, "currency": 1, "account_type": 1},
+            session=session
+        ).sort("_id", 1)
+        accounts = {doc["_id"]: doc for doc in await cursor.to_list()}
+        results, touched, entries, deltas = settlement.settle(transfers, accounts, ledger.now())
+        if touched:
+            await collection.bulk_write([
+                UpdateOne({"_id": _id}, {"$set": {"balance": accounts[_id]["balance"], "seq": accounts[_id]["seq"]}})
+                for _id in touched
+            ], session=session)
+            await _record_entries(entries, session)
+            await _increment_totals(deltas, session)
+        return results, entries
+
+    try:
+        results, entries = await _in_transaction(write)
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+    change_events.publish_entries(entries)
+    return results
+
+async def get_account_by_id(account_id: str):
+    """
+    Busca una cuenta por su ID único.
+
+    Args:
+        account_id (str): ID de la cuenta a buscar.
+
+    Returns:
+        dict: Datos de la cuenta encontrada, con el ``_id`` convertido a ``id``.
+        None: Si no se encuentra la cuenta o el ID no es válido.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la consulta.
+    """
+    try:
+        with read_routing.reading("lookup"):
+            account = await readers["lookup"].find_one({"_id": ObjectId(account_id)})
+    except InvalidId:
+        return None
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+    if not account:
+        return None
+    account["id"] = str(account.pop("_id"))
+    return account
+
+async def get_all_accounts(limit: int = 100, after: str | None = None, query: account_model.AccountQuery | None = None,
+                     session=None):
+    """
+    Obtiene una página de cuentas bancarias usando paginación por cursor.
+
+    Filtros, orden y proyección se resuelven en la agregación de MongoDB, con
+    los índices compuestos de ``index_manager``. Los documentos salen ya con la
+    forma de ``Account`` (o solo con los campos pedidos), por lo que se retornan
+    sin volver a validarlos.
+
+    Args:
+        limit (int): Número máximo de cuentas a retornar.
+        after (str, opcional): Cursor ``next_cursor`` de la página anterior.
+        query (AccountQuery, opcional): Filtros, orden y campos del listado.
+        session (ClientSession, opcional): Sesión en la que se ejecuta la lectura.
+
+    Returns:
+        dict: Página con la forma de ``Accounts`` (``accounts`` y ``next_cursor``).
+        None: Si ocurre un error durante la consulta.
+    """
+    query = query or account_model.AccountQuery()
+    try:
+        # Se pide un documento extra para saber si existe una página siguiente
+        pipeline = account_query.build_pipeline(query, after, limit + 1)
+        with read_routing.reading("list"):
+            cursor = await readers["list"].aggregate(pipeline, session=session)
+            accounts = await cursor.to_list()
+
+        next_cursor = None
+        if len(accounts) > limit:
+            accounts = accounts[:limit]
+            next_cursor = account_query.encode_cursor(accounts[-1], query)
+
+        return {"accounts": accounts, "next_cursor": next_cursor}
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        return None
+
+async def get_accounts_version(session=None):
+    """
+    Obtiene la versión de la colección de cuentas.
+
+    Es la suma de los contadores ``version`` de los totales, que cada escritura de
+    cuentas incrementa (ver ``account_totals``); se lee sin tocar las cuentas.
+
+    Args:
+        session (ClientSession, opcional): Sesión en la que se ejecuta la lectura.
+
+    Returns:
+        int: Versión actual de la colección.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la consulta.
+    """
+    try:
+        with read_routing.reading("list"):
+            cursor = await version_reader.aggregate(account_totals.VERSION_PIPELINE, session=session)
+            return account_totals.to_version(await cursor.to_list())
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+async def get_versioned_accounts(limit: int = 100, after: str | None = None, query: account_model.AccountQuery | None = None):
+    """
+    Obtiene una página de cuentas junto con la versión de la colección que refleja.
+
+    La versión se lee antes que la página y en la misma sesión causalmente
+    consistente: aunque ambas lecturas vayan a secundarios distintos, la página
+    incluye al menos las escrituras contadas en la versión.
+
+    Args:
+        limit (int): Número máximo de cuentas a retornar.
+        after (str, opcional): Cursor ``next_cursor`` de la página anterior.
+        query (AccountQuery, opcional): Filtros, orden y campos del listado.
+
+    Returns:
+        tuple[int, dict]: Versión y página con la forma de ``Accounts``.
+        None: Si ocurre un error durante la consulta.
+    """
+    try:
+        async with collection.database.client.start_session(causal_consistency=True) as session:
+            version = await get_accounts_version(session)
+            page = await get_all_accounts(limit, after, query, session)
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        return None
+    if page is None:
+        return None
+    return version, page
+
+async def iter_account_batches(batch_size: int = 1000, query: account_model.AccountQuery | None = None):
+    """
+    Recorre todas las cuentas bancarias directamente desde el cursor de MongoDB.
+
+    Args:
+        batch_size (int): Número de documentos por lote leído del servidor.
+        query (AccountQuery, opcional): Filtros, orden y campos del recorrido.
+
+    Yields:
+        list[dict]: Lote de cuentas proyectadas con la forma de ``Account``.
+    """
+    cursor = None
+    try:
+        with read_routing.reading("list"):
+            cursor = await readers["list"].aggregate(
+                account_query.build_pipeline(query or account_model.AccountQuery()),
+                batchSize=batch_size
+            )
+        while True:
+            # El contexto no abarca el yield: cada lote se lee dentro de su bloque
+            with read_routing.reading("list"):
+                batch = await cursor.to_list(batch_size)
+            if not batch:
+                break
+            yield batch
+    except Exception as e:
+        # Se relanza para cortar la respuesta en curso en lugar de truncarla en silencio
+        logger.error("MongoDB error: %s", e)
+        raise
+    finally:
+        if cursor is not None:
+            await cursor.close()
+
+async def get_totals():
+    """
+    Obtiene el saldo total y el número de cuentas por moneda y tipo de cuenta.
+
+    Lee la colección de totales mantenida con deltas, sin recorrer las cuentas.
+
+    Returns:
+        list[dict]: Filas ``{currency, account_type, accounts, balance}``.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la consulta.
+    """
+    try:
+        with read_routing.reading("totals"):
+            cursor = await totals_reader.aggregate(account_totals.READ_PIPELINE)
+            return account_totals.to_rows(await cursor.to_list())
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+async def recompute_totals():
+    """
+    Recalcula los totales por moneda y tipo recorriendo todas las cuentas.
+
+    Returns:
+        list[dict]: Filas ``{currency, account_type, accounts, balance}``.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la agregación.
+    """
+    try:
+        cursor = await collection.aggregate(account_totals.RECOMPUTE_PIPELINE)
+        return account_totals.to_rows(await cursor.to_list())
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+async def replace_totals(rows: list[dict]):
+    """
+    Sustituye los totales mantenidos por los recalculados.
+
+    Los incrementos que lleguen mientras se recalcula y sustituye se pierden,
+    por lo que conviene conciliar con poca escritura y volver a comprobar la
+    desviación después.
+
+    Args:
+        rows (list[dict]): Totales retornados por ``recompute_totals``.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la escritura.
+    """
+    try:
+        await totals_collection.bulk_write(account_totals.replace_operations(rows))
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+async def get_transactions(account_id: str, limit: int = 100, after: int | None = None,
+                     since=None, until=None):
+    """
+    Obtiene una página del historial de movimientos de una cuenta.
+
+    Se recorre el índice ``(account_id, seq)`` en orden de ``seq``; el cursor es
+    el último ``seq`` de la página anterior.
+
+    Args:
+        account_id (str): ID de la cuenta.
+        limit (int): Número máximo de movimientos a retornar.
+        after (int, opcional): Cursor ``next_cursor`` de la página anterior.
+        since (datetime, opcional): Fecha mínima de los movimientos (incluida).
+        until (datetime, opcional): Fecha máxima de los movimientos (excluida).
+
+    Returns:
+        dict: Página con la forma de ``Transactions`` (``transactions`` y ``next_cursor``).
+        None: Si la cuenta no existe o el ID no es válido.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la consulta.
+    """
+    try:
+        _id = ObjectId(account_id)
+    except InvalidId:
+        return None
+    try:
+        with read_routing.reading("history"):
+            cursor = ledger_reader.find(
+                ledger.history_filter(_id, after, since, until), ledger.ENTRY_PROJECTION
+            ).sort("seq", 1).limit(limit + 1)
+            entries = await cursor.to_list()
+            if not entries and after is None and await readers["history"].find_one({"_id": _id}, {"_id": 1}) is None:
+                return None
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = entries[-1]["seq"]
+    return {"transactions": entries, "next_cursor": next_cursor}
+
+async def get_balance_at(account_id: str, at):
+    """
+    Obtiene el saldo que tenía una cuenta en una fecha.
+
+    Parte de la última foto de saldo anterior a la fecha (índice
+    ``(account_id, created_at)``) y lee como mucho ``SNAPSHOT_INTERVAL``
+    movimientos posteriores a ella sobre el índice ``(account_id, seq)``.
+
+    Args:
+        account_id (str): ID de la cuenta.
+        at (datetime): Fecha consultada (UTC).
+
+    Returns:
+        dict: ``{id, at, balance, seq}``.
+        None: Si la cuenta no existe, no existía en esa fecha o el ID no es válido.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB durante la consulta.
+    """
+    try:
+        _id = ObjectId(account_id)
+    except InvalidId:
+        return None
+    try:
+        with read_routing.reading("history"):
+            account = await readers["history"].find_one({"_id": _id}, {"balance": 1})
+            if account is None:
+                return None
+            snapshot = await snapshots_reader.find_one(
+                {"account_id": _id, "created_at": {"$lte": at}}, sort=[("created_at", -1)]
+            )
+            start = snapshot["seq"] if snapshot else 0
+            last = await ledger_reader.find_one(
+                {"account_id": _id, "seq": {"$gt": start, "$lte": start + ledger.SNAPSHOT_INTERVAL},
+                 "created_at": {"$lte": at}},
+                sort=[("seq", -1)]
+            )
+            first = None
+            if last is None and snapshot is None:
+                first = await ledger_reader.find_one({"account_id": _id}, sort=[("seq", 1)])
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+    return ledger.balance_at(account, at, snapshot, last, first)
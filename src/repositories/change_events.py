@@ -0,0 +1,90 @@
+from bson import ObjectId
+
+# Eventos de cambio de cuentas (altas y cambios de saldo), compartidos por los
+# repositorios síncrono, asíncrono y en memoria y por la lectura de change
+# streams de MongoDB.
+#
+# Los repositorios publican los eventos de cada escritura justo después de
+# confirmarla, en ``sink``: el feed de cambios lo registra al arrancar con
+# ``set_sink`` y, mientras no haya destino, publicar no construye ningún evento.
+# Un cambio de saldo se describe con su movimiento del libro, de modo que un
+# evento es el mismo se genere en proceso o desde un change stream.
+
+ACCOUNT_CREATED = "account_created"
+BALANCE_CHANGED = "balance_changed"
+
+# Destino de los eventos: función que recibe una lista de eventos
+sink = None
+
+def set_sink(callback):
+    """
+    Registra el destino de los eventos publicados por los repositorios.
+
+    Args:
+        callback (Callable, opcional): Función ``callback(events)``, o None para
+            dejar de publicar. Puede llamarse desde los hilos del threadpool.
+    """
+    global sink
+    sink = callback
+
+def account_created(_id: ObjectId, document: dict) -> dict:
+    """
+    Construye el evento de alta de una cuenta.
+
+    Args:
+        _id (ObjectId): ID de la cuenta.
+        document (dict): Documento de la cuenta creada.
+
+    Returns:
+        dict: Evento ``account_created`` con los datos de la cuenta.
+    """
+    return {
+        "type": ACCOUNT_CREATED,
+        "account_id": str(_id),
+        "account_number": document["account_number"],
+        "holder_name": document["holder_name"],
+        "account_type": document["account_type"],
+        "currency": document["currency"],
+        "balance": document["balance"],
+    }
+
+def balance_changed(entry: dict) -> dict:
+    """
+    Construye el evento de cambio de saldo de un movimiento del libro.
+
+    Args:
+        entry (dict): Movimiento construido con ``ledger.entry``.
+
+    Returns:
+        dict: Evento ``balance_changed`` con importe, saldo resultante y ``seq``.
+    """
+    return {
+        "type": BALANCE_CHANGED,
+        "account_id": str(entry["account_id"]),
+        "currency": entry["currency"],
+        "seq": entry["seq"],
+        "amount": entry["amount"],
+        "balance": entry["balance"],
+        "created_at": entry["created_at"],
+        "transfer_id": entry.get("transfer_id"),
+    }
+
+def publish_created(documents: list[dict]):
+    """
+    Publica el alta de cuentas ya insertadas (con su ``_id``).
+
+    Args:
+        documents (list[dict]): Documentos insertados.
+    """
+    if sink is not None and documents:
+        sink([account_created(document["_id"], document) for document in documents])
+
+def publish_entries(entries: list[dict]):
+    """
+    Publica los cambios de saldo de movimientos ya confirmados.
+
+    Args:
+        entries (list[dict]): Movimientos construidos con ``ledger.entry``.
+    """
+    if sink is not None and entries:
+        sink([balance_changed(entry) for entry in entries])
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Colección de claves de idempotencia (índice TTL sobre expires_at); se inyecta al
+# arranque con configure(). Usa siempre el cliente asíncrono.
+collection = None
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+
+def configure(database):
+    """
+    Inyecta la base de datos sobre la que opera el repositorio.
+
+    Args:
+        database (AsyncDatabase): Base de datos del cliente asíncrono creado en el arranque.
+    """
+    global collection
+    collection = database.get_collection(IDEMPOTENCY_COLLECTION)
+
+async def claim(key: str, owner: str, fingerprint: str, ttl: float, lock_timeout: float):
+    """
+    Reserva una clave de idempotencia para la petición en curso.
+
+    La reserva es un ``insert_one`` con la clave como ``_id``: para una clave
+    nueva es la única operación. Si la clave existe pero expiró (el monitor TTL
+    de MongoDB borra con retraso) o su reserva quedó abandonada (el proceso que
+    la tomó no terminó en ``lock_timeout`` segundos), se toma con una
+    actualización condicional.
+
+    Args:
+        key (str): Clave de idempotencia con su ámbito (método y ruta).
+        owner (str): Identificador único de la reserva, exigido al completarla
+            o liberarla (una reserva abandonada puede haber pasado a otro proceso).
+        fingerprint (str): Huella del cuerpo de la petición.
+        ttl (float): Segundos durante los que se conserva la respuesta.
+        lock_timeout (float): Segundos tras los que una reserva sin completar se
+            considera abandonada.
+
+    Returns:
+        None: Si la clave quedó reservada para esta petición.
+        dict: Registro existente (``status`` "pending" o "completed").
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB.
+    """
+    now = datetime.now(timezone.utc)
+    record = {
+        "owner": owner,
+        "fingerprint": fingerprint,
+        "status": "pending",
+        "locked_until": now + timedelta(seconds=lock_timeout),
+        "expires_at": now + timedelta(seconds=ttl),
+    }
+    try:
+        await collection.insert_one({"_id": key, **record})
+        return None
+    except DuplicateKeyError:
+        pass
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+    try:
+        taken = await collection.find_one_and_update(
+            {"_id": key, "$or": [
+                {"expires_at": {"$lte": now}},
+                {"status": "pending", "locked_until": {"$lte": now}},
+            ]},
+            {"$set": record, "$unset": {"status_code": "", "body": ""}},
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if taken is not None:
+            return None
+        existing = await collection.find_one({"_id": key})
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+    # Si se borró entre las dos operaciones, se reintenta la reserva
+    return existing if existing is not None else await claim(key, owner, fingerprint, ttl, lock_timeout)
+
+async def find(key: str):
+    """
+    Obtiene el registro de una clave de idempotencia.
+
+    Args:
+        key (str): Clave de idempotencia con su ámbito.
+
+    Returns:
+        dict: Registro de la clave.
+        None: Si la clave no existe.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB.
+    """
+    try:
+        return await collection.find_one({"_id": key})
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+async def complete(key: str, owner: str, status_code: int, body):
+    """
+    Guarda la respuesta de una petición y marca su clave como completada.
+
+    Args:
+        key (str): Clave de idempotencia con su ámbito.
+        owner (str): Identificador de la reserva usado en ``claim``.
+        status_code (int): Código de estado de la respuesta.
+        body (Any): Contenido JSON de la respuesta.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB.
+    """
+    try:
+        await collection.update_one(
+            {"_id": key, "owner": owner},
+            {"$set": {"status": "completed", "status_code": status_code, "body": body}, "$unset": {"locked_until": ""}}
+        )
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
+
+async def release(key: str, owner: str):
+    """
+    Libera la reserva de una clave cuya petición falló, para que pueda reintentarse.
+
+    Args:
+        key (str): Clave de idempotencia con su ámbito.
+        owner (str): Identificador de la reserva usado en ``claim``.
+
+    Raises:
+        Exception: Si ocurre un error de MongoDB.
+    """
+    try:
+        await collection.delete_one({"_id": key, "owner": owner, "status": "pending"})
+    except Exception as e:
+        logger.error("MongoDB error: %s", e)
+        raise
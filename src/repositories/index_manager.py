@@ -0,0 +1,85 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Base de datos del cliente síncrono (la gestión de índices es una tarea de arranque
+# y diagnóstico); se inyecta al arranque con configure()
+database = None
+
+def configure(db):
+    """
+    Inyecta la base de datos sobre la que se gestionan los índices.
+
+    Args:
+        db (Database): Base de datos del cliente síncrono creado en el arranque.
+    """
+    global database
+    database = db
+
+# Índices requeridos por las rutas de consulta, agrupados por colección.
+# Cada índice tiene un nombre explícito para poder comparar lo declarado con lo existente.
+REQUIRED_INDEXES = {
+    "accounts": [
+        IndexModel([("account_number", ASCENDING)], unique=True, name="account_number_unique"),
+        # Listados de GET /accounts (igualdad, orden y rango, con _id como desempate
+        # del cursor); los órdenes descendentes recorren el mismo índice al revés
+        IndexModel([("currency", ASCENDING), ("account_type", ASCENDING), ("_id", ASCENDING)],
+                   name="currency_type_id"),
+        IndexModel([("currency", ASCENDING), ("account_type", ASCENDING), ("balance", ASCENDING), ("_id", ASCENDING)],
+                   name="currency_type_balance"),
+        IndexModel([("balance", ASCENDING), ("_id", ASCENDING)], name="balance_id"),
+        IndexModel([("holder_name", ASCENDING), ("_id", ASCENDING)], name="holder_name_id"),
+    ],
+    # Historial de movimientos por cuenta (GET /accounts/{id}/transactions); la
+    # unicidad impide dos movimientos con el mismo seq
+    "transactions": [
+        IndexModel([("account_id", ASCENDING), ("seq", ASCENDING)], unique=True, name="account_seq"),
+    ],
+    # Última foto de saldo anterior a una fecha (GET /accounts/{id}/balance)
+    "balance_snapshots": [
+        IndexModel([("account_id", ASCENDING), ("created_at", DESCENDING)], name="account_created_at"),
+    ],
+    # MongoDB borra las claves de idempotencia al llegar a expires_at
+    "idempotency_keys": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+}
+
+def ensure_indexes():
+    """
+    Crea los índices declarados en ``REQUIRED_INDEXES`` si aún no existen.
+
+    ``create_indexes`` es idempotente: los índices ya existentes con la misma
+    definición no se vuelven a construir.
+
+    Returns:
+        dict: Nombres de los índices asegurados por colección.
+    """
+    created = {}
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        created[collection_name] = database.get_collection(collection_name).create_indexes(indexes)
+    return created
+
+def report_indexes():
+    """
+    Compara los índices declarados con los existentes y su uso.
+
+    Returns:
+        dict: Por colección, los índices declarados que faltan (``missing``),
+            los existentes que no están declarados (``undeclared``) y los que
+            no registran accesos desde el último reinicio del servidor (``unused``).
+    """
+    report = {}
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        collection = database.get_collection(collection_name)
+        declared = {index.document["name"] for index in indexes}
+        existing = set(collection.index_information())
+        stats = collection.aggregate([{"$indexStats": {}}])
+        unused = sorted(
+            stat["name"] for stat in stats
+            if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0
+        )
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared - {"_id_"}),
+            "unused": unused,
+        }
+    return report
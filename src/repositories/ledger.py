@@ -0,0 +1,179 @@
+from bson import ObjectId
+from bson.codec_options import CodecOptions
+from datetime import datetime, timezone
+
+# Libro de movimientos de saldo, compartido por los repositorios síncrono,
+# asíncrono y en memoria.
+#
+# Cada cambio de saldo incrementa el contador ``seq`` de la cuenta junto con el
+# saldo y escribe, en la misma transacción, un movimiento inmutable
+# ``{account_id, currency, seq, amount, balance, created_at}`` con el saldo
+# resultante; la moneda permite servir el feed de cambios desde el libro.
+# Cada SNAPSHOT_INTERVAL movimientos se guarda además una foto del saldo, de modo
+# que el saldo en una fecha se resuelve con la última foto anterior y, como
+# mucho, SNAPSHOT_INTERVAL movimientos, sin recorrer toda la historia.
+
+LEDGER_COLLECTION = "transactions"
+SNAPSHOTS_COLLECTION = "balance_snapshots"
+
+SNAPSHOT_INTERVAL = 100
+
+# Las fechas se leen con zona horaria (UTC) para compararlas con las de la API
+CODEC_OPTIONS = CodecOptions(tz_aware=True)
+
+# Forma de un movimiento en la respuesta de la API
+ENTRY_PROJECTION = {"_id": 0, "seq": 1, "amount": 1, "balance": 1, "created_at": 1, "transfer_id": 1}
+
+def as_utc(moment: datetime) -> datetime:
+    """
+    Normaliza una fecha a UTC con zona horaria; las fechas sin zona se toman como UTC.
+
+    Args:
+        moment (datetime): Fecha recibida en la API.
+
+    Returns:
+        datetime: Fecha en UTC.
+    """
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+def now() -> datetime:
+    """
+    Retorna la fecha actual con la precisión de milisegundos de BSON.
+
+    Returns:
+        datetime: Fecha actual en UTC.
+    """
+    moment = datetime.now(timezone.utc)
+    return moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+
+def entry(account_id: ObjectId, currency: str, seq: int, amount: float, balance: float, created_at: datetime,
+          transfer_id: str | None = None) -> dict:
+    """
+    Construye un movimiento del libro.
+
+    Args:
+        account_id (ObjectId): ID de la cuenta.
+        currency (str): Moneda de la cuenta.
+        seq (int): Número de movimiento de la cuenta (empieza en 1).
+        amount (float): Importe sumado al saldo.
+        balance (float): Saldo resultante.
+        created_at (datetime): Fecha del movimiento.
+        transfer_id (str, opcional): ID de la transferencia que originó el
+            movimiento; enlaza el cargo con su abono.
+
+    Returns:
+        dict: Documento del movimiento.
+    """
+    document = {
+        "account_id": account_id,
+        "currency": currency,
+        "seq": seq,
+        "amount": amount,
+        "balance": balance,
+        "created_at": created_at,
+    }
+    if transfer_id is not None:
+        document["transfer_id"] = transfer_id
+    return document
+
+def sequence_entries(account: dict, amounts: list[float], created_at: datetime) -> list[dict]:
+    """
+    Construye los movimientos de varios incrementos aplicados con un único ``$inc``.
+
+    Cada incremento es un movimiento propio, con el ``seq`` y el saldo que resultan
+    de aplicarlos uno tras otro en el orden de ``amounts``.
+
+    Args:
+        account (dict): Cuenta tras el ``$inc`` (``_id``, ``currency``, ``seq`` y ``balance``).
+        amounts (list[float]): Importes en orden de aplicación.
+        created_at (datetime): Fecha de los movimientos.
+
+    Returns:
+        list[dict]: Un movimiento por importe; el último deja el saldo de ``account``.
+    """
+    first_seq = account["seq"] - len(amounts) + 1
+    balance = account["balance"] - sum(amounts)
+    entries = []
+    for offset, amount in enumerate(amounts):
+        balance += amount
+        entries.append(entry(account["_id"], account["currency"], first_seq + offset, amount, balance, created_at))
+    entries[-1]["balance"] = account["balance"]
+    return entries
+
+def snapshots_for(entries: list[dict]) -> list[dict]:
+    """
+    Retorna las fotos de saldo que corresponden a un conjunto de movimientos.
+
+    Args:
+        entries (list[dict]): Movimientos recién escritos.
+
+    Returns:
+        list[dict]: Una foto ``{account_id, seq, balance, created_at}`` por cada
+            movimiento cuyo ``seq`` es múltiplo de ``SNAPSHOT_INTERVAL``.
+    """
+    return [
+        {key: entry[key] for key in ("account_id", "seq", "balance", "created_at")}
+        for entry in entries
+        if entry["seq"] % SNAPSHOT_INTERVAL == 0
+    ]
+
+def history_filter(account_id: ObjectId, after: int | None = None,
+                   since: datetime | None = None, until: datetime | None = None) -> dict:
+    """
+    Construye el filtro de una página del historial de una cuenta.
+
+    El cursor acota el rango de ``seq`` sobre el índice ``(account_id, seq)``; el
+    rango de fechas se evalúa sobre los movimientos recorridos.
+
+    Args:
+        account_id (ObjectId): ID de la cuenta.
+        after (int, opcional): Último ``seq`` de la página anterior.
+        since (datetime, opcional): Fecha mínima (incluida).
+        until (datetime, opcional): Fecha máxima (excluida).
+
+    Returns:
+        dict: Filtro de MongoDB.
+    """
+    conditions = {"account_id": account_id}
+    if after is not None:
+        conditions["seq"] = {"$gt": after}
+    created_at = {}
+    if since is not None:
+        created_at["$gte"] = since
+    if until is not None:
+        created_at["$lt"] = until
+    if created_at:
+        conditions["created_at"] = created_at
+    return conditions
+
+def balance_at(account: dict, at: datetime, snapshot: dict | None, last: dict | None, first: dict | None) -> dict:
+    """
+    Resuelve el saldo de una cuenta en una fecha a partir de las lecturas del libro.
+
+    Args:
+        account (dict): Cuenta con ``_id`` y ``balance`` actuales.
+        at (datetime): Fecha consultada.
+        snapshot (dict, opcional): Última foto con fecha anterior o igual a ``at``.
+        last (dict, opcional): Último movimiento con fecha anterior o igual a ``at``
+            posterior a la foto.
+        first (dict, opcional): Primer movimiento de la cuenta, para el saldo
+            anterior a cualquier movimiento.
+
+    Returns:
+        dict: ``{id, at, balance, seq}`` con el saldo y el último ``seq`` aplicado.
+        None: Si la cuenta no existía en esa fecha.
+    """
+    if at < account["_id"].generation_time:
+        return None
+    if last is not None:
+        balance, seq = last["balance"], last["seq"]
+    elif snapshot is not None:
+        balance, seq = snapshot["balance"], snapshot["seq"]
+    elif first is not None:
+        # Saldo de apertura: anterior al primer movimiento
+        balance, seq = first["balance"] - first["amount"], 0
+    else:
+        balance, seq = account["balance"], 0
+    return {"id": str(account["_id"]), "at": at, "balance": balance, "seq": seq}
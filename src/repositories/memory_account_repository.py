@@ -0,0 +1,473 @@
+from models import account_model
+from repositories import account_query, account_totals, change_events, ledger, settlement
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+import bisect
+import itertools
+
+# Implementación en memoria del repositorio de cuentas, con la misma interfaz que
+# los repositorios de MongoDB. Pensada para benchmarks y pruebas: aísla el coste
+# de la API (validación, serialización, servicios) del de la base de datos.
+# Todas las operaciones se ejecutan sin ceder el event loop, por lo que son
+# atómicas entre sí como lo son las operaciones de documento único en MongoDB.
+
+# Cuentas por _id, IDs en orden ascendente e índice único por número de cuenta
+documents = {}
+document_ids = []
+account_numbers = {}
+
+# Totales por (moneda, tipo): [número de cuentas, saldo]
+totals = {}
+
+# Versión de la colección: se incrementa en cada escritura de cuentas. No se
+# reinicia en configure() para que una versión nunca se repita en el proceso
+version = 0
+
+# Contador de movimientos, movimientos y fotos de saldo por _id de cuenta; el
+# contador se guarda aparte para no aparecer en los documentos de cuenta
+sequences = {}
+entries = {}
+snapshots = {}
+
+def configure(database=None):
+    """
+    Vacía el almacenamiento en memoria.
+
+    Args:
+        database (None): Ignorado; se acepta por compatibilidad con los demás repositorios.
+    """
+    documents.clear()
+    document_ids.clear()
+    account_numbers.clear()
+    totals.clear()
+    sequences.clear()
+    entries.clear()
+    snapshots.clear()
+
+def _bump_version():
+    global version
+    version += 1
+
+def _insert(account_data: account_model.CreateAccount) -> ObjectId:
+    if account_data.account_number in account_numbers:
+        raise DuplicateKeyError(
+            f"E11000 duplicate key error dup key: {{ account_number: \"{account_data.account_number}\" }}",
+            11000
+        )
+    _id = ObjectId()
+    documents[_id] = account_data.model_dump()
+    account_numbers[account_data.account_number] = _id
+    account_totals.add_delta(totals, documents[_id], 1, account_data.balance)
+    _bump_version()
+    # Los ObjectId de un mismo proceso son crecientes: basta con añadir al final
+    if document_ids and _id < document_ids[-1]:
+        bisect.insort(document_ids, _id)
+    else:
+        document_ids.append(_id)
+    change_events.publish_created([dict(documents[_id], _id=_id)])
+    return _id
+
+def _apply(_id: ObjectId, account: dict, amount: float, created_at):
+    account["balance"] += amount
+    account_totals.add_delta(totals, account, 0, amount)
+    _bump_version()
+    sequences[_id] = sequences.get(_id, 0) + 1
+    _record_entries([ledger.entry(_id, account["currency"], sequences[_id], amount, account["balance"], created_at)])
+
+def _record_entries(written: list[dict]):
+    for entry in written:
+        entries.setdefault(entry["account_id"], []).append(entry)
+    for snapshot in ledger.snapshots_for(written):
+        snapshots.setdefault(snapshot["account_id"], []).append(snapshot)
+    change_events.publish_entries(written)
+
+def _to_account(_id: ObjectId) -> dict:
+    return dict(documents[_id], id=str(_id))
+
+async def create_account(account_data: account_model.CreateAccount):
+    """
+    Crea una nueva cuenta bancaria en memoria.
+
+    Args:
+        account_data (CreateAccount): Datos de la cuenta a crear.
+
+    Returns:
+        CreateAccountResponse: Respuesta con el ID de la cuenta creada.
+
+    Raises:
+        DuplicateKeyError: Si ya existe una cuenta con el mismo número.
+    """
+    return account_model.CreateAccountResponse(id=str(_insert(account_data)))
+
+async def create_accounts(accounts: list[account_model.CreateAccount]):
+    """
+    Inserta un lote de cuentas; un duplicado no detiene la inserción del resto.
+
+    Args:
+        accounts (list[CreateAccount]): Cuentas a crear.
+
+    Returns:
+        list[dict]: Por cada cuenta, en el mismo orden, ``{"id": ...}`` si se creó
+            o ``{"error": "duplicate", "detail": ...}`` si fue rechazada.
+    """
+    results = []
+    for account in accounts:
+        try:
+            results.append({"id": str(_insert(account))})
+        except DuplicateKeyError as e:
+            results.append({"error": "duplicate", "detail": str(e)})
+    return results
+
+async def get_account_by_account_number(account_number: str):
+    """
+    Busca una cuenta por su número de cuenta.
+
+    Args:
+        account_number (str): Número de cuenta a buscar.
+
+    Returns:
+        dict: Copia de la cuenta con su ``id``.
+        None: Si no se encuentra la cuenta.
+    """
+    _id = account_numbers.get(account_number)
+    return _to_account(_id) if _id is not None else None
+
+async def update_balance(account_data: account_model.UpdateAccountBalance):
+    """
+    Incrementa el saldo de una cuenta existente.
+
+    Args:
+        account_data (UpdateAccountBalance): Datos para actualizar el saldo.
+
+    Returns:
+        dict: Diccionario con id y balance actualizado.
+        None: Si no se encuentra la cuenta o el ID no es válido.
+    """
+    try:
+        account = documents.get(ObjectId(account_data.id))
+    except InvalidId:
+        return None
+    if account is None:
+        return None
+    _apply(ObjectId(account_data.id), account, account_data.balance, ledger.now())
+    return {"id": account_data.id, "balance": account["balance"]}
+
+async def update_balance_sequence(account_id: str, amounts: list[float]):
+    """
+    Aplica a una cuenta varios incrementos de saldo, un movimiento por incremento.
+
+    Args:
+        account_id (str): ID de la cuenta.
+        amounts (list[float]): Importes en orden de aplicación.
+
+    Returns:
+        dict: ``id`` y ``balances``, el saldo posterior a cada incremento en orden.
+        None: Si no se encuentra la cuenta o el ID no es válido.
+    """
+    try:
+        _id = ObjectId(account_id)
+    except InvalidId:
+        return None
+    account = documents.get(_id)
+    if account is None:
+        return None
+    created_at = ledger.now()
+    balances = []
+    for amount in amounts:
+        _apply(_id, account, amount, created_at)
+        balances.append(account["balance"])
+    return {"id": account_id, "balances": balances}
+
+async def apply_balance_increments(increments: dict[str, float]):
+    """
+    Aplica incrementos de saldo a varias cuentas.
+
+    Args:
+        increments (dict[str, float]): Importe total a sumar por ID de cuenta.
+
+    Returns:
+        set[str]: IDs de las cuentas que no existen (vacío si se aplicaron todas).
+        None: Si algún ID no es válido (no se aplica ningún incremento).
+    """
+    try:
+        ids = [ObjectId(account_id) for account_id in increments]
+    except InvalidId:
+        return None
+    missing = set()
+    created_at = ledger.now()
+    for _id, (account_id, amount) in zip(ids, increments.items()):
+        account = documents.get(_id)
+        if account is None:
+            missing.add(account_id)
+        else:
+            _apply(_id, account, amount, created_at)
+    return missing
+
+async def apply_transfers(transfers: list[account_model.Transfer]):
+    """
+    Liquida un lote de transferencias entre cuentas.
+
+    El lote completo se ejecuta sin ceder el event loop, por lo que es atómico
+    frente al resto de operaciones, como una transacción de MongoDB.
+
+    Args:
+        transfers (list[Transfer]): Transferencias en orden de aplicación.
+
+    Returns:
+        list[dict]: Resultado por transferencia (ver ``settlement.settle``).
+    """
+    ids = settlement.account_ids(transfers)
+    accounts = {
+        _id: dict(documents[_id], seq=sequences.get(_id, 0))
+        for _id in ids if _id in documents
+    }
+    results, touched, written, deltas = settlement.settle(transfers, accounts, ledger.now())
+    for _id in touched:
+        documents[_id]["balance"] = accounts[_id]["balance"]
+        sequences[_id] = accounts[_id]["seq"]
+    if touched:
+        _bump_version()
+    _record_entries(written)
+    for key, (count, balance) in deltas.items():
+        total = totals.setdefault(key, [0, 0.0])
+        total[0] += count
+        total[1] += balance
+    return results
+
+async def get_account_by_id(account_id: str):
+    """
+    Busca una cuenta por su ID único.
+
+    Args:
+        account_id (str): ID de la cuenta a buscar.
+
+    Returns:
+        dict: Copia de la cuenta con su ``id``.
+        None: Si no se encuentra la cuenta o el ID no es válido.
+    """
+    try:
+        _id = ObjectId(account_id)
+    except InvalidId:
+        return None
+    return _to_account(_id) if _id in documents else None
+
+def _matches(document: dict, query: account_model.AccountQuery) -> bool:
+    if query.currency is not None and document["currency"] != query.currency:
+        return False
+    if query.account_type is not None and document["account_type"] != query.account_type:
+        return False
+    if query.min_balance is not None and document["balance"] < query.min_balance:
+        return False
+    if query.max_balance is not None and document["balance"] > query.max_balance:
+        return False
+    if query.holder_name_prefix is not None and not document["holder_name"].startswith(query.holder_name_prefix):
+        return False
+    return True
+
+def _project(_id: ObjectId, query: account_model.AccountQuery) -> dict:
+    account = _to_account(_id)
+    if query.fields is None:
+        return account
+    keep = set(account_query.build_projection(query))
+    return {name: value for name, value in account.items() if name in keep}
+
+def _select(query: account_model.AccountQuery, after: str | None = None):
+    """
+    Retorna los IDs que cumplen los filtros, en el orden pedido y tras el cursor.
+
+    Con el orden por defecto se recorre la lista ordenada de IDs de forma
+    perezosa; con otro orden se ordenan todas las cuentas que cumplen los
+    filtros (sin índices, como un SORT en memoria de MongoDB).
+    """
+    field, direction = account_query.parse_sort(query)
+    filtered = bool(account_query.build_filter(query))
+    if field == "_id":
+        if direction == 1:
+            start = bisect.bisect_right(document_ids, account_query.decode_cursor(after, query)[1]) if after else 0
+            positions = range(start, len(document_ids))
+        else:
+            end = bisect.bisect_left(document_ids, account_query.decode_cursor(after, query)[1]) if after else len(document_ids)
+            positions = range(end - 1, -1, -1)
+        ids = (document_ids[i] for i in positions)
+        return (_id for _id in ids if _matches(documents[_id], query)) if filtered else ids
+
+    ids = sorted(
+        (_id for _id in document_ids if _matches(documents[_id], query)),
+        key=lambda _id: (documents[_id][field], _id),
+        reverse=direction == -1
+    )
+    if after is not None:
+        position = account_query.decode_cursor(after, query)
+        if direction == 1:
+            return (_id for _id in ids if (documents[_id][field], _id) > position)
+        return (_id for _id in ids if (documents[_id][field], _id) < position)
+    return iter(ids)
+
+async def get_all_accounts(limit: int = 100, after: str | None = None, query: account_model.AccountQuery | None = None):
+    """
+    Obtiene una página de cuentas con los filtros, el orden y los campos pedidos.
+
+    Args:
+        limit (int): Número máximo de cuentas a retornar.
+        after (str, opcional): Cursor ``next_cursor`` de la página anterior.
+        query (AccountQuery, opcional): Filtros, orden y campos del listado.
+
+    Returns:
+        dict: Página con la forma de ``Accounts`` (``accounts`` y ``next_cursor``).
+    """
+    query = query or account_model.AccountQuery()
+    page = [_project(_id, query) for _id in itertools.islice(_select(query, after), limit + 1)]
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = account_query.encode_cursor(page[-1], query)
+    return {"accounts": page, "next_cursor": next_cursor}
+
+async def get_accounts_version():
+    """
+    Obtiene la versión de la colección de cuentas.
+
+    Returns:
+        int: Versión actual de la colección.
+    """
+    return version
+
+async def get_versioned_accounts(limit: int = 100, after: str | None = None, query: account_model.AccountQuery | None = None):
+    """
+    Obtiene una página de cuentas junto con la versión de la colección que refleja.
+
+    Args:
+        limit (int): Número máximo de cuentas a retornar.
+        after (str, opcional): Cursor ``next_cursor`` de la página anterior.
+        query (AccountQuery, opcional): Filtros, orden y campos del listado.
+
+    Returns:
+        tuple[int, dict]: Versión y página con la forma de ``Accounts``.
+    """
+    return version, await get_all_accounts(limit, after, query)
+
+async def iter_account_batches(batch_size: int = 1000, query: account_model.AccountQuery | None = None):
+    """
+    Recorre todas las cuentas que cumplen los filtros, en el orden pedido.
+
+    Args:
+        batch_size (int): Número de cuentas por lote.
+        query (AccountQuery, opcional): Filtros, orden y campos del recorrido.
+
+    Yields:
+        list[dict]: Lote de copias de las cuentas con su ``id``.
+    """
+    query = query or account_model.AccountQuery()
+    ids = _select(query)
+    while batch := [_project(_id, query) for _id in itertools.islice(ids, batch_size)]:
+        yield batch
+
+def _rows(groups: dict) -> list[dict]:
+    return [
+        {"currency": currency, "account_type": account_type, "accounts": accounts, "balance": balance}
+        for (currency, account_type), (accounts, balance) in sorted(groups.items())
+    ]
+
+async def get_totals():
+    """
+    Obtiene el saldo total y el número de cuentas por moneda y tipo de cuenta.
+
+    Returns:
+        list[dict]: Filas ``{currency, account_type, accounts, balance}``.
+    """
+    return _rows(totals)
+
+async def recompute_totals():
+    """
+    Recalcula los totales por moneda y tipo recorriendo todas las cuentas.
+
+    Returns:
+        list[dict]: Filas ``{currency, account_type, accounts, balance}``.
+    """
+    groups = {}
+    for document in documents.values():
+        account_totals.add_delta(groups, document, 1, document["balance"])
+    return _rows(groups)
+
+async def replace_totals(rows: list[dict]):
+    """
+    Sustituye los totales mantenidos por los recalculados.
+
+    Args:
+        rows (list[dict]): Totales retornados por ``recompute_totals``.
+    """
+    totals.clear()
+    _bump_version()
+    for row in rows:
+        totals[(row["currency"], row["account_type"])] = [row["accounts"], row["balance"]]
+
+def _public_entry(entry: dict) -> dict:
+    return {field: entry[field] for field in ledger.ENTRY_PROJECTION if field in entry}
+
+async def get_transactions(account_id: str, limit: int = 100, after: int | None = None,
+                           since=None, until=None):
+    """
+    Obtiene una página del historial de movimientos de una cuenta.
+
+    Los movimientos de cada cuenta están en orden de ``seq`` (empezando en 1),
+    por lo que el cursor se resuelve por posición.
+
+    Args:
+        account_id (str): ID de la cuenta.
+        limit (int): Número máximo de movimientos a retornar.
+        after (int, opcional): Cursor ``next_cursor`` de la página anterior.
+        since (datetime, opcional): Fecha mínima de los movimientos (incluida).
+        until (datetime, opcional): Fecha máxima de los movimientos (excluida).
+
+    Returns:
+        dict: Página con la forma de ``Transactions``.
+        None: Si la cuenta no existe o el ID no es válido.
+    """
+    try:
+        _id = ObjectId(account_id)
+    except InvalidId:
+        return None
+    if _id not in documents:
+        return None
+    selected = (
+        entry for entry in entries.get(_id, [])[after or 0:]
+        if (since is None or entry["created_at"] >= since) and (until is None or entry["created_at"] < until)
+    )
+    page = [_public_entry(entry) for entry in itertools.islice(selected, limit + 1)]
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = page[-1]["seq"]
+    return {"transactions": page, "next_cursor": next_cursor}
+
+async def get_balance_at(account_id: str, at):
+    """
+    Obtiene el saldo que tenía una cuenta en una fecha.
+
+    Args:
+        account_id (str): ID de la cuenta.
+        at (datetime): Fecha consultada (UTC).
+
+    Returns:
+        dict: ``{id, at, balance, seq}``.
+        None: Si la cuenta no existe, no existía en esa fecha o el ID no es válido.
+    """
+    try:
+        _id = ObjectId(account_id)
+    except InvalidId:
+        return None
+    if _id not in documents:
+        return None
+    account_snapshots = snapshots.get(_id, [])
+    position = bisect.bisect_right(account_snapshots, at, key=lambda snapshot: snapshot["created_at"])
+    snapshot = account_snapshots[position - 1] if position else None
+    start = snapshot["seq"] if snapshot else 0
+    account_entries = entries.get(_id, [])
+    last = None
+    for entry in account_entries[start:start + ledger.SNAPSHOT_INTERVAL]:
+        if entry["created_at"] > at:
+            break
+        last = entry
+    first = account_entries[0] if account_entries else None
+    return ledger.balance_at({"_id": _id, **documents[_id]}, at, snapshot, last, first)
@@ -0,0 +1,135 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+# Operaciones de lectura con preferencia de lectura propia y endpoints que las usan:
+#   - list: GET /accounts (páginas y streaming NDJSON)
+#   - totals: GET /accounts/totals
+#   - lookup: GET /accounts/{account_id} y GET /accounts/by-number/{account_number}
+#   - history: GET /accounts/{account_id}/transactions y /balance
+# Las lecturas del camino de escritura (dentro de las transacciones) y las de la
+# conciliación de totales van siempre al primario.
+OPERATIONS = ("list", "totals", "lookup", "history")
+
+# Los listados y los totales toleran cierta antigüedad y pueden leerse de los
+# secundarios; las consultas puntuales y el historial, que suelen seguir a una
+# escritura del mismo cliente, se leen del primario
+DEFAULT_ROUTES = {"list": "secondaryPreferred", "totals": "secondaryPreferred", "lookup": "primary", "history": "primary"}
+
+MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Mínimo de maxStalenessSeconds admitido por MongoDB (heartbeat + idleWritePeriod)
+MIN_MAX_STALENESS = 90
+
+# Modo configurado por operación y antigüedad máxima de los secundarios (-1 sin límite)
+routes = dict(DEFAULT_ROUTES)
+max_staleness = -1
+
+# Operación de lectura en curso, para que el monitor de lecturas de ``database``
+# atribuya cada comando a su operación
+current_operation = ContextVar("read_operation", default=None)
+
+def configure(route_modes: dict | None = None, max_staleness_seconds: int = -1):
+    """
+    Configura la preferencia de lectura de cada operación.
+
+    Debe llamarse antes de configurar los repositorios, que crean sus colecciones
+    de lectura con la configuración vigente.
+
+    Args:
+        route_modes (dict, opcional): Modo por operación (p. ej.
+            ``{"list": "secondaryPreferred"}``); las operaciones que no se indiquen
+            conservan el modo de ``DEFAULT_ROUTES``.
+        max_staleness_seconds (int): ``maxStalenessSeconds`` de los modos que
+            pueden leer de secundarios; -1 sin límite.
+
+    Raises:
+        ValueError: Si una operación o un modo no existen o la antigüedad máxima
+            es menor que el mínimo de MongoDB.
+    """
+    global max_staleness
+    merged = dict(DEFAULT_ROUTES)
+    for operation, mode in (route_modes or {}).items():
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown read operation: {operation}.")
+        if mode not in MODES:
+            raise ValueError(f"Unknown read preference: {mode}.")
+        merged[operation] = mode
+    if max_staleness_seconds != -1 and max_staleness_seconds < MIN_MAX_STALENESS:
+        raise ValueError(f"maxStalenessSeconds must be -1 or at least {MIN_MAX_STALENESS}.")
+    routes.clear()
+    routes.update(merged)
+    max_staleness = max_staleness_seconds
+
+def parse_routes(value: str) -> dict:
+    """
+    Interpreta los modos por operación de una variable de entorno.
+
+    Args:
+        value (str): Pares ``"operación=modo"`` separados por comas.
+
+    Returns:
+        dict: Modo por operación.
+    """
+    route_modes = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        operation, mode = item.split("=", 1)
+        route_modes[operation.strip()] = mode.strip()
+    return route_modes
+
+def read_preference(operation: str):
+    """
+    Retorna la preferencia de lectura configurada para una operación.
+
+    Args:
+        operation (str): Operación de ``OPERATIONS``.
+
+    Returns:
+        ServerMode: Preferencia de lectura de pymongo.
+    """
+    mode = MODES[routes[operation]]
+    if mode is Primary:
+        return Primary()
+    return mode(max_staleness=max_staleness)
+
+def reader(collection, operation: str):
+    """
+    Retorna una vista de la colección que lee según la preferencia de la operación.
+
+    Args:
+        collection (Collection | AsyncCollection): Colección base.
+        operation (str): Operación de ``OPERATIONS``.
+
+    Returns:
+        Collection | AsyncCollection: Colección con la preferencia de lectura aplicada.
+    """
+    return collection.with_options(read_preference=read_preference(operation))
+
+@contextmanager
+def reading(operation: str):
+    """
+    Marca los comandos ejecutados dentro del bloque como lecturas de ``operation``.
+
+    Args:
+        operation (str): Operación de ``OPERATIONS``.
+    """
+    token = current_operation.set(operation)
+    try:
+        yield
+    finally:
+        current_operation.reset(token)
+
+def stats() -> dict:
+    """
+    Retorna la configuración de enrutado de lecturas.
+
+    Returns:
+        dict: Modo por operación y ``max_staleness_seconds``.
+    """
+    return {"routes": dict(routes), "max_staleness_seconds": max_staleness}
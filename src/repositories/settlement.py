@@ -0,0 +1,73 @@
+from repositories import account_totals, ledger
+from bson import ObjectId
+
+# Liquidación de transferencias entre cuentas, compartida por los repositorios
+# síncrono, asíncrono y en memoria. El repositorio lee las cuentas implicadas
+# dentro de una transacción, ``settle`` decide y aplica sobre esa lectura cada
+# transferencia del lote en orden, y el repositorio escribe el resultado en la
+# misma transacción.
+
+def account_ids(transfers: list) -> list[ObjectId]:
+    """
+    Retorna los IDs de las cuentas implicadas en un lote, ordenados.
+
+    Las cuentas se leen y escriben siempre en orden de ``_id``, de modo que dos
+    lotes que comparten cuentas las bloquean en el mismo orden.
+
+    Args:
+        transfers (list[Transfer]): Transferencias del lote.
+
+    Returns:
+        list[ObjectId]: IDs sin repetir en orden ascendente.
+    """
+    return sorted({ObjectId(transfer.from_id) for transfer in transfers} | {ObjectId(transfer.to_id) for transfer in transfers})
+
+def settle(transfers: list, accounts: dict, created_at) -> tuple[list[dict], list[ObjectId], list[dict], dict]:
+    """
+    Liquida un lote de transferencias sobre las cuentas leídas.
+
+    Cada transferencia se evalúa con los saldos que dejaron las anteriores del
+    lote; las que no pueden aplicarse se rechazan sin afectar al resto.
+
+    Args:
+        transfers (list[Transfer]): Transferencias en orden de aplicación.
+        accounts (dict): Cuentas por ``_id`` con ``balance``, ``seq``, ``currency``
+            y ``account_type``; se modifican con los saldos y ``seq`` resultantes.
+        created_at (datetime): Fecha de los movimientos.
+
+    Returns:
+        tuple: Resultado por transferencia (``status`` y, si se completó, ``id``
+            y saldos resultantes), IDs de las cuentas modificadas en orden, movimientos
+            del libro a escribir y deltas de los totales por moneda y tipo.
+    """
+    results = []
+    touched = set()
+    entries = []
+    deltas = {}
+    for transfer in transfers:
+        source_id, target_id = ObjectId(transfer.from_id), ObjectId(transfer.to_id)
+        source, target = accounts.get(source_id), accounts.get(target_id)
+        if source is None or target is None:
+            results.append({"status": "not_found"})
+            continue
+        if source["currency"] != target["currency"]:
+            results.append({"status": "currency_mismatch"})
+            continue
+        if source["balance"] < transfer.amount:
+            results.append({"status": "insufficient_funds"})
+            continue
+
+        transfer_id = str(ObjectId())
+        for _id, account, amount in ((source_id, source, -transfer.amount), (target_id, target, transfer.amount)):
+            account["balance"] += amount
+            account["seq"] = account.get("seq", 0) + 1
+            entries.append(ledger.entry(_id, account["currency"], account["seq"], amount, account["balance"], created_at, transfer_id))
+            account_totals.add_delta(deltas, account, 0, amount)
+            touched.add(_id)
+        results.append({
+            "status": "completed",
+            "id": transfer_id,
+            "from_balance": source["balance"],
+            "to_balance": target["balance"],
+        })
+    return results, sorted(touched), entries, deltas
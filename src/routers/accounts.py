@@ -1,16 +1,161 @@
-from fastapi import APIRouter, HTTPException
-from services import account_service
+from fastapi import APIRouter, Header, HTTPException, Query, Request, WebSocket
+from typing import Annotated, Literal
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.requests import ClientDisconnect
+from services import account_dump, account_service, change_feed, idempotency
 from models import account_model
+import admission
+import asyncio
+import hashlib
+import json
+import logging
+import orjson
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Las rutas de cuentas pasan por el control de admisión (ver admission.py)
+router = APIRouter(route_class=admission.AdmissionRoute)
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    Respuesta en streaming que permite seguir leyendo el cuerpo de la petición.
+    
+    ``StreamingResponse`` escucha en paralelo el canal ``receive`` para detectar
+    desconexiones, lo que consume los fragmentos del cuerpo aún no leídos. Esta
+    variante transmite sin ese listener, de modo que la entrada NDJSON puede
+    procesarse mientras se envían los resultados.
+    """
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+async def _request_items(request: Request):
+    """
+    Lee los elementos del cuerpo de una petición masiva.
+    
+    Con ``Content-Type: application/x-ndjson`` el cuerpo se procesa línea a línea
+    a medida que llega; en otro caso se espera un arreglo JSON.
+    
+    Args:
+        request (Request): Petición HTTP entrante.
+        
+    Yields:
+        Any: Cada elemento de la entrada.
+        
+    Raises:
+        ValueError: Si el cuerpo JSON no es un arreglo válido.
+    """
+    if "ndjson" in request.headers.get("content-type", ""):
+        async for item in account_dump.ndjson_records(request.stream()):
+            yield item
+        return
+
+    items = json.loads(await request.body())
+    if not isinstance(items, list):
+        raise ValueError("Request body must be a JSON array.")
+    for item in items:
+        yield item
+
+# Cabecera opcional de las rutas de escritura que admiten reintentos seguros
+IdempotencyKey = Annotated[str | None, Header(min_length=1, max_length=255)]
+
+async def _idempotent(request: Request, idempotency_key: str | None, payload: BaseModel, handler):
+    """
+    Ejecuta una ruta de escritura una sola vez por ``Idempotency-Key``.
+    
+    La clave se guarda junto con el método y la ruta y una huella del cuerpo. Una
+    repetición con la misma clave y el mismo cuerpo recibe la respuesta guardada
+    (con la cabecera ``Idempotent-Replayed: true``) sin volver a ejecutar la ruta;
+    un duplicado concurrente espera a que termine la primera petición. Las
+    respuestas 4xx también se guardan; ante un error 5xx la clave se libera para
+    que el reintento vuelva a ejecutarse. Si falla el guardado de la respuesta
+    de una escritura ya confirmada, se responde igualmente con su resultado.
+    
+    Args:
+        request (Request): Petición HTTP entrante.
+        idempotency_key (str, opcional): Valor de la cabecera; sin ella la ruta
+            se ejecuta directamente.
+        payload (BaseModel): Cuerpo validado de la petición.
+        handler (Callable): Corrutina sin argumentos que ejecuta la ruta.
+        
+    Returns:
+        Any: Resultado de la ruta o respuesta guardada.
+        
+    Raises:
+        HTTPException:
+            - 409 si la petición original sigue en curso en otro proceso
+            - 422 si la clave se usó con otro cuerpo
+            - 500 si no se puede consultar el almacén de claves
+    """
+    if idempotency_key is None:
+        return await handler()
+
+    key = f"{request.method} {request.url.path} {idempotency_key}"
+    fingerprint = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+    try:
+        owner, record = await idempotency.store.begin(key, fingerprint)
+    except idempotency.IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except idempotency.IdempotencyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception:
+        logger.exception("Error checking idempotency key")
+        raise HTTPException(status_code=500, detail="Error checking idempotency key")
+    if record is not None:
+        return ORJSONResponse(record["body"], status_code=record["status_code"], headers={"Idempotent-Replayed": "true"})
+
+    try:
+        result = await handler()
+    except HTTPException as e:
+        if e.status_code < 500:
+            await _complete_idempotent(key, owner, fingerprint, e.status_code, {"detail": e.detail})
+        else:
+            await idempotency.store.release(key, owner)
+        raise
+    except BaseException:
+        await idempotency.store.release(key, owner)
+        raise
+    await _complete_idempotent(key, owner, fingerprint, 200, jsonable_encoder(result))
+    return result
+
+async def _complete_idempotent(key: str, owner: str, fingerprint: str, status_code: int, body):
+    """
+    Guarda la respuesta de una clave de idempotencia cuya escritura ya terminó.
+    
+    La escritura ya está confirmada, así que un fallo al guardar la respuesta no
+    se propaga: la petición responde con su resultado y el fallo se registra. La
+    clave queda pendiente hasta que venza su bloqueo.
+    
+    Args:
+        key (str): Clave con el método y la ruta.
+        owner (str): Propietario de la clave retornado por ``begin``.
+        fingerprint (str): Huella del cuerpo de la petición.
+        status_code (int): Código de estado de la respuesta.
+        body (Any): Cuerpo de la respuesta, codificable en JSON.
+    """
+    try:
+        await idempotency.store.complete(key, owner, fingerprint, status_code, body)
+    except Exception:
+        logger.exception("Error storing idempotent response for %s", key)
 
 @router.post("/accounts", response_model=account_model.CreateAccountResponse)
-def create_account(account_data: account_model.CreateAccount):
+async def create_account(request: Request, account_data: account_model.CreateAccount,
+                         idempotency_key: IdempotencyKey = None):
     """
     Crea una nueva cuenta bancaria.
     
     Args:
+        request (Request): Petición HTTP entrante.
         account_data (CreateAccount): Datos de la cuenta a crear.
+        idempotency_key (str, opcional): Cabecera ``Idempotency-Key``; un
+            reintento con la misma clave recibe la respuesta original.
         
     Returns:
         CreateAccountResponse: Respuesta con el ID de la cuenta creada.
@@ -20,21 +165,147 @@ def create_account(account_data: account_model.CreateAccount):
             - 400 si ya existe una cuenta con el número proporcionado
             - 500 si ocurre un error interno del servidor
     """
+    async def handle():
+        try:
+            new_account = await account_service.create_account(account_data)
+            if new_account is None:
+                raise HTTPException(status_code=500, detail="Error creating account in database")
+            return new_account
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await _idempotent(request, idempotency_key, account_data, handle)
+    
+@router.post("/accounts/bulk", response_model=account_model.BulkCreateAccountsResponse)
+async def create_accounts_bulk(request: Request, chunk_size: int = Query(1000, ge=1, le=10000)):
+    """
+    Crea cuentas bancarias de forma masiva.
+    
+    Acepta un arreglo JSON de ``CreateAccount`` o un archivo NDJSON
+    (``Content-Type: application/x-ndjson``) con una cuenta por línea.
+    
+    Args:
+        request (Request): Petición con el arreglo JSON o el NDJSON de cuentas.
+        chunk_size (int): Número de cuentas por inserción masiva en la base de datos.
+        
+    Returns:
+        BulkCreateAccountsResponse: Totales y resultado por elemento (ID creado o error).
+        
+    Raises:
+        HTTPException: 400 si el cuerpo no es un arreglo JSON válido
+    """
+    try:
+        return await account_service.create_accounts_bulk(_request_items(request), chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+@router.post("/accounts/postings", response_model=account_model.PostingsResponse)
+async def apply_postings(request: Request, chunk_size: int = Query(1000, ge=1, le=10000)):
+    """
+    Aplica un lote de ajustes de saldo ``{id, amount}``.
+    
+    Con un arreglo JSON se responde un resumen con el resultado de cada asiento.
+    Con ``Content-Type: application/x-ndjson`` la entrada se procesa a medida que
+    llega y los resultados se devuelven también como NDJSON, bloque a bloque,
+    de modo que archivos muy grandes se aplican con memoria acotada.
+    
+    Args:
+        request (Request): Petición con el arreglo JSON o el NDJSON de asientos.
+        chunk_size (int): Número de asientos por escritura masiva en la base de datos.
+        
+    Returns:
+        PostingsResponse: Totales y resultado por asiento (applied, not_found, invalid o database).
+        StreamingResponse: Resultados por asiento en NDJSON si la entrada es NDJSON.
+        
+    Raises:
+        HTTPException: 400 si el cuerpo no es un arreglo JSON válido
+    """
+    chunks = account_service.apply_postings(_request_items(request), chunk_size)
+    if "ndjson" in request.headers.get("content-type", ""):
+        async def encode():
+            async for results in chunks:
+                yield "".join(result.model_dump_json() + "\n" for result in results)
+        return _DuplexStreamingResponse(encode(), media_type="application/x-ndjson")
+
     try:
-        new_account = account_service.create_account(account_data)
-        if new_account is None:
-            raise HTTPException(status_code=500, detail="Error creating account in database")
-        return new_account
+        results = [result async for results in chunks for result in results]
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    applied = sum(1 for result in results if result.status == "applied")
+    return account_model.PostingsResponse(
+        applied=applied,
+        failed=len(results) - applied,
+        results=results
+    )
+
+@router.post("/transfers", response_model=account_model.TransferResult)
+async def transfer(request: Request, transfer_data: account_model.Transfer,
+                   idempotency_key: IdempotencyKey = None):
+    """
+    Transfiere un importe entre dos cuentas de la misma moneda.
+    
+    El cargo, el abono y sus movimientos en el libro se confirman en una única
+    transacción.
     
+    Args:
+        request (Request): Petición HTTP entrante.
+        transfer_data (Transfer): Cuentas de origen y destino e importe.
+        idempotency_key (str, opcional): Cabecera ``Idempotency-Key``; un
+            reintento con la misma clave no repite la transferencia.
+        
+    Returns:
+        TransferResult: ID de la transferencia y saldos resultantes.
+        
+    Raises:
+        HTTPException: 400 si alguna cuenta no existe, tienen distinta moneda o
+            el saldo es insuficiente; 500 si falla la base de datos
+    """
+    async def handle():
+        try:
+            return await account_service.transfer(transfer_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception:
+            # El detalle del driver va al log, no a la respuesta
+            logger.exception("Error applying transfer")
+            raise HTTPException(status_code=500, detail="Error applying transfer in database")
+
+    return await _idempotent(request, idempotency_key, transfer_data, handle)
+
+@router.post("/transfers/batch", response_model=account_model.TransfersResponse)
+async def transfer_batch(request: Request, chunk_size: int = Query(100, ge=1, le=1000)):
+    """
+    Liquida un lote de transferencias ``{from_id, to_id, amount}``.
+    
+    Cada bloque de ``chunk_size`` transferencias se liquida en una transacción.
+    Acepta un arreglo JSON o NDJSON (``Content-Type: application/x-ndjson``).
+    
+    Args:
+        request (Request): Petición con las transferencias.
+        chunk_size (int): Número de transferencias por transacción.
+        
+    Returns:
+        TransfersResponse: Totales y resultado por transferencia.
+        
+    Raises:
+        HTTPException: 400 si el cuerpo no es un arreglo JSON válido
+    """
+    try:
+        return await account_service.transfer_batch(_request_items(request), chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.patch("/accounts/{account_number}", response_model=account_model.UpdateAccountBalanceResponse)
-def update_account_balance(account_data: account_model.UpdateAccountBalance):
+async def update_account_balance(request: Request, account_data: account_model.UpdateAccountBalance,
+                                 idempotency_key: IdempotencyKey = None):
     """
     Actualiza el saldo de una cuenta existente.
     
     Args:
+        request (Request): Petición HTTP entrante.
         account_data (UpdateAccountBalance): Datos para actualizar el saldo.
+        idempotency_key (str, opcional): Cabecera ``Idempotency-Key``; un
+            reintento con la misma clave no vuelve a aplicar el incremento.
         
     Returns:
         UpdateAccountBalanceResponse: Respuesta con el ID y nuevo saldo.
@@ -44,26 +315,381 @@ def update_account_balance(account_data: account_model.UpdateAccountBalance):
             - 400 si no se encuentra la cuenta
             - 500 si ocurre un error interno del servidor
     """
+    async def handle():
+        try:
+            result = await account_service.update_account_balance(account_data)
+            if result is None:
+                raise HTTPException(status_code=500, detail="Error updating account balance in database")
+            return result
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return await _idempotent(request, idempotency_key, account_data, handle)
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Compara ``If-None-Match`` con un ETag (comparación débil, admite ``*``).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+@router.get("/accounts", response_model=account_model.Accounts | account_model.PartialAccounts)
+async def get_all_accounts(params: Annotated[account_model.AccountListQuery, Query()],
+                           if_none_match: Annotated[str | None, Header()] = None):
+    """
+    Obtiene las cuentas bancarias registradas, paginadas por cursor o en streaming.
+    
+    Los filtros (``currency``, ``account_type``, ``min_balance``/``max_balance``,
+    ``holder_name_prefix``), el orden (``sort``) y la proyección (``fields``) se
+    resuelven en MongoDB. Con ``fields`` cada cuenta trae solo esos campos, el
+    ``id`` y el campo de orden.
+    
+    La página sale del repositorio con la forma de ``Accounts`` y se codifica
+    directamente con orjson, sin volver a validarla contra ``response_model``
+    (que se mantiene para la documentación OpenAPI).
+    
+    Cada página lleva un ``ETag`` derivado de la versión de la colección (que
+    incrementa cada escritura de cuentas) y de la consulta. Si ``If-None-Match``
+    coincide se responde 304 leyendo solo la versión, sin consultar las cuentas;
+    las páginas ya codificadas se sirven desde una caché en proceso por ETag.
+    
+    Args:
+        params (AccountListQuery): Filtros, orden y campos del listado, más:
+            - limit: número máximo de cuentas por página.
+            - after: cursor ``next_cursor`` de la página anterior (solo válido
+              con el mismo ``sort``).
+            - stream: si es ``True`` se retornan todas las cuentas como NDJSON
+              leídas directamente del cursor de MongoDB; ignora ``limit`` y ``after``.
+            - batch_size: número de cuentas por lote en modo streaming.
+        if_none_match (str, opcional): ETag de una página obtenida antes.
+    
+    Returns:
+        Response: Página de cuentas bancarias y cursor de la siguiente página
+            (JSON), o 304 sin cuerpo si no cambió desde ``If-None-Match``.
+        StreamingResponse: Cuentas en formato NDJSON si ``stream`` es ``True``.
+        
+    Raises:
+        HTTPException:
+            - 400 si el cursor no es válido
+            - 500 si ocurre un error interno del servidor
+    """
+    if params.stream:
+        batches = account_service.stream_accounts(params.batch_size, params)
+        return StreamingResponse(
+            account_dump.encode_accounts(batches),
+            media_type="application/x-ndjson"
+        )
+    try:
+        etag = await account_service.get_accounts_etag(params.limit, params.after, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Error fetching accounts from database")
+    # Los clientes pueden guardar la página pero deben revalidarla en cada uso
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    result = await account_service.get_encoded_accounts(params.limit, params.after, params, etag)
+    if result is None:
+        raise HTTPException(status_code=500, detail="Error fetching accounts from database")
+    headers["ETag"], body = result
+    return Response(body, media_type="application/json", headers=headers)
+
+@router.get("/accounts/totals", response_model=account_model.AccountTotals)
+async def get_account_totals():
+    """
+    Obtiene el saldo total y el número de cuentas por moneda y tipo de cuenta.
+    
+    Returns:
+        AccountTotals: Totales por moneda y tipo de cuenta.
+        
+    Raises:
+        HTTPException: 500 si no se pueden leer los totales
+    """
+    try:
+        return await account_service.get_account_totals()
+    except Exception:
+        logger.exception("Error fetching account totals")
+        raise HTTPException(status_code=500, detail="Error fetching account totals from database")
+
+@router.get("/accounts/export")
+async def export_accounts(params: Annotated[account_model.AccountExportQuery, Query()]):
+    """
+    Vuelca las cuentas en NDJSON o CSV, opcionalmente comprimidas con gzip.
+    
+    Las cuentas se leen del cursor de MongoDB por lotes de ``batch_size`` y se
+    codifican y comprimen lote a lote, de modo que la memoria usada no depende
+    del número de cuentas. Admite los mismos filtros, orden y campos que
+    ``GET /accounts``; en CSV las columnas son las de la proyección.
+    
+    Args:
+        params (AccountExportQuery): Filtros, orden y campos, más ``format``
+            ("ndjson" o "csv"), ``gzip`` y ``batch_size``.
+    
+    Returns:
+        StreamingResponse: Volcado como adjunto ``accounts.<formato>[.gz]``.
+    """
+    filename = f"accounts.{params.format}" + (".gz" if params.gzip else "")
+    return StreamingResponse(
+        account_dump.export_accounts(params),
+        media_type="application/gzip" if params.gzip else account_dump.MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/accounts/import")
+async def import_accounts(request: Request, format: Literal["ndjson", "csv"] = "ndjson",
+                          chunk_size: int = Query(1000, ge=1, le=10000)):
+    """
+    Importa un volcado de cuentas en NDJSON o CSV, procesándolo a medida que llega.
+    
+    Cada elemento se valida con ``CreateAccount`` y los válidos se insertan por
+    bloques de ``chunk_size`` con inserciones no ordenadas. Tras cada bloque se
+    emite una línea NDJSON con el avance acumulado y los rechazos del bloque
+    (validación, duplicado o base de datos, con la posición del elemento). Con
+    ``Content-Encoding: gzip`` el cuerpo se descomprime al vuelo.
+    
+    Args:
+        request (Request): Petición con el volcado en el cuerpo.
+        format (str): Formato del volcado, "ndjson" o "csv" (con cabecera).
+        chunk_size (int): Número de elementos por inserción masiva.
+    
+    Returns:
+        StreamingResponse: Avances ``ImportProgress`` en NDJSON; el último tiene
+            ``done`` a ``true``.
+    """
+    compressed = request.headers.get("content-encoding", "").lower() == "gzip"
+    progress = account_dump.import_accounts(
+        account_dump.records(request.stream(), format, compressed), chunk_size
+    )
+
+    async def encode():
+        try:
+            async for step in progress:
+                yield step.model_dump_json() + "\n"
+        except ValueError as e:
+            # Entrada corrupta (gzip inválido): se informa en lugar de cortar la respuesta
+            yield orjson.dumps({"error": "invalid_input", "detail": str(e)}).decode() + "\n"
+    return _DuplexStreamingResponse(encode(), media_type="application/x-ndjson")
+
+# Segundos entre comentarios keep-alive del feed SSE sin eventos
+CHANGE_FEED_KEEPALIVE = 15.0
+
+# Filtros del feed de cambios; cada uno admite varios valores (?currency=USD&currency=EUR)
+ChangeFeedAccounts = Annotated[list[str] | None, Query(alias="account_id")]
+ChangeFeedCurrencies = Annotated[list[Literal["USD", "EUR"]] | None, Query(alias="currency")]
+
+async def _sse_events(subscription):
+    """
+    Codifica los eventos de una suscripción como Server-Sent Events.
+    
+    Cada evento lleva su token en el campo ``id``, que el navegador reenvía en
+    ``Last-Event-ID`` al reconectar. Sin eventos se envía un comentario cada
+    ``CHANGE_FEED_KEEPALIVE`` segundos para mantener abierta la conexión.
+    
+    Args:
+        subscription (Subscription): Suscripción al feed de cambios.
+        
+    Yields:
+        bytes: Mensajes SSE.
+    """
+    try:
+        while True:
+            try:
+                token, event = await asyncio.wait_for(subscription.get(), CHANGE_FEED_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            except change_feed.SubscriberDropped as e:
+                yield b"event: dropped\ndata: " + orjson.dumps({"detail": str(e)}) + b"\n\n"
+                return
+            yield b"id: %s\nevent: %s\ndata: %s\n\n" % (token.encode(), event["type"].encode(), orjson.dumps(event))
+    finally:
+        subscription.close()
+
+def _subscribe(account_ids, currencies, resume_after):
+    """
+    Suscribe al feed de cambios traduciendo sus errores a respuestas HTTP.
+    """
+    try:
+        return change_feed.subscribe(account_ids, currencies, resume_after)
+    except change_feed.ResumeTokenExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/accounts/changes")
+async def get_account_changes(
+    account_ids: ChangeFeedAccounts = None,
+    currencies: ChangeFeedCurrencies = None,
+    resume_after: str | None = None,
+    last_event_id: Annotated[str | None, Header()] = None
+):
+    """
+    Transmite las altas de cuentas y los cambios de saldo como Server-Sent Events.
+    
+    Sustituye a consultar ``GET /accounts`` periódicamente: cada escritura se
+    envía una vez, en el momento en que se confirma. Un cliente que no consume a
+    tiempo recibe un evento ``dropped`` y se desconecta; puede reconectarse con
+    el último token recibido.
+    
+    Args:
+        account_ids (list[str], opcional): IDs de cuenta a recibir (``account_id``).
+        currencies (list[str], opcional): Monedas a recibir (``currency``).
+        resume_after (str, opcional): Token del último evento recibido.
+        last_event_id (str, opcional): Cabecera ``Last-Event-ID``, usada si no se
+            indica ``resume_after``.
+        
+    Returns:
+        StreamingResponse: Flujo ``text/event-stream`` con eventos
+            ``account_created`` y ``balance_changed``.
+        
+    Raises:
+        HTTPException:
+            - 404 si el feed de cambios está desactivado
+            - 410 si el token ya no está en el historial retenido
+    """
+    subscription = _subscribe(account_ids, currencies, resume_after or last_event_id)
+    return StreamingResponse(
+        _sse_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _wait_disconnect(websocket: WebSocket):
+    """
+    Consume los mensajes del cliente hasta que se desconecta.
+    """
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@router.websocket("/accounts/changes/ws")
+async def account_changes_ws(
+    websocket: WebSocket,
+    account_ids: ChangeFeedAccounts = None,
+    currencies: ChangeFeedCurrencies = None,
+    resume_after: str | None = None
+):
+    """
+    Transmite las altas de cuentas y los cambios de saldo por WebSocket.
+    
+    Cada mensaje es un evento JSON con su token en ``id``. Un cliente que no
+    consume a tiempo recibe un mensaje ``dropped`` y la conexión se cierra con el
+    código 1013; puede reconectarse con ``resume_after`` igual al último ``id``.
+    Si el feed está desactivado o el token ya no se retiene, la conexión se
+    rechaza con el código 1008.
+    
+    Args:
+        websocket (WebSocket): Conexión entrante.
+        account_ids (list[str], opcional): IDs de cuenta a recibir (``account_id``).
+        currencies (list[str], opcional): Monedas a recibir (``currency``).
+        resume_after (str, opcional): Token del último evento recibido.
+    """
+    try:
+        subscription = change_feed.subscribe(account_ids, currencies, resume_after)
+    except (change_feed.ResumeTokenExpired, ValueError) as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
     try:
-        result = account_service.update_account_balance(account_data)
-        if result is None:
-            raise HTTPException(status_code=500, detail="Error updating account balance in database")
-        return result
+        await websocket.accept()
+        disconnect = asyncio.ensure_future(_wait_disconnect(websocket))
+        try:
+            while True:
+                next_event = asyncio.ensure_future(subscription.get())
+                await asyncio.wait((next_event, disconnect), return_when=asyncio.FIRST_COMPLETED)
+                if disconnect.done():
+                    next_event.cancel()
+                    return
+                try:
+                    token, event = next_event.result()
+                except change_feed.SubscriberDropped as e:
+                    await websocket.send_text(orjson.dumps({"type": "dropped", "detail": str(e)}).decode())
+                    await websocket.close(code=1013)
+                    return
+                await websocket.send_text(orjson.dumps({"id": token, **event}).decode())
+        finally:
+            disconnect.cancel()
+    finally:
+        subscription.close()
+
+@router.get("/accounts/by-number/{account_number}", response_model=account_model.Account)
+async def get_account_by_number(account_number: str):
+    """
+    Obtiene una cuenta bancaria por su número de cuenta.
+    
+    Args:
+        account_number (str): Número de la cuenta.
+        
+    Returns:
+        Account: Datos de la cuenta.
+        
+    Raises:
+        HTTPException: 400 si no se encuentra la cuenta
+    """
+    try:
+        return await account_service.get_account_by_number(account_number)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/accounts", response_model=account_model.Accounts)
-def get_all_accounts():
+@router.get("/accounts/{account_id}", response_model=account_model.Account)
+async def get_account(account_id: str):
     """
-    Obtiene todas las cuentas bancarias registradas.
+    Obtiene una cuenta bancaria por su ID.
     
+    Args:
+        account_id (str): ID de la cuenta.
+        
     Returns:
-        Accounts: Lista de todas las cuentas bancarias.
+        Account: Datos de la cuenta.
         
     Raises:
-        HTTPException: 500 si ocurre un error interno del servidor
+        HTTPException: 400 si no se encuentra la cuenta
     """
-    accounts = account_service.get_all_accounts()
-    if accounts is None:
-        raise HTTPException(status_code=500, detail="Error fetching accounts from database")
-    return accounts
\ No newline at end of file
+    try:
+        return await account_service.get_account(account_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/accounts/{account_id}/transactions", response_model=account_model.Transactions)
+async def get_transactions(account_id: str, params: Annotated[account_model.TransactionQuery, Query()]):
+    """
+    Obtiene el historial de movimientos de una cuenta, paginado por ``seq``.
+    
+    Args:
+        account_id (str): ID de la cuenta.
+        params (TransactionQuery): ``limit``, ``after`` (``next_cursor`` de la
+            página anterior) y rango de fechas ``since``/``until``.
+        
+    Returns:
+        Transactions: Movimientos y cursor de la página siguiente.
+        
+    Raises:
+        HTTPException: 400 si no se encuentra la cuenta
+    """
+    try:
+        return await account_service.get_transactions(account_id, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/accounts/{account_id}/balance", response_model=account_model.BalanceAt)
+async def get_balance_at(account_id: str, at: datetime):
+    """
+    Obtiene el saldo que tenía una cuenta en una fecha.
+    
+    Args:
+        account_id (str): ID de la cuenta.
+        at (datetime): Fecha ISO 8601; sin zona horaria se toma como UTC.
+        
+    Returns:
+        BalanceAt: Saldo y último movimiento aplicado en esa fecha.
+        
+    Raises:
+        HTTPException: 400 si no se encuentra la cuenta o no existía en esa fecha
+    """
+    try:
+        return await account_service.get_balance_at(account_id, at)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
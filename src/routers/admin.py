@@ -0,0 +1,150 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Annotated
+from services import account_service, admin_service
+from models import account_model
+import logging
+import profiling
+
+logger = logging.getLogger(__name__)
+
+async def require_admin_token(x_admin_token: Annotated[str | None, Header()] = None):
+    """
+    Exige el token de administración (``ADMIN_TOKEN``) en la cabecera ``X-Admin-Token``.
+    
+    Args:
+        x_admin_token (str, opcional): Valor de la cabecera ``X-Admin-Token``.
+        
+    Raises:
+        HTTPException: 403 si no hay token configurado o no coincide
+    """
+    if not profiling.valid_admin_token(x_admin_token.encode() if x_admin_token is not None else None):
+        raise HTTPException(status_code=403, detail="Admin endpoints require a valid X-Admin-Token")
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin_token)])
+
+@router.get("/indexes")
+async def get_index_report():
+    """
+    Reporta el estado de los índices declarados por la aplicación.
+    
+    Returns:
+        dict: Por colección, índices faltantes, no declarados y sin uso.
+        
+    Raises:
+        HTTPException: 500 si no se puede consultar la base de datos
+    """
+    try:
+        return await admin_service.get_index_report()
+    except Exception:
+        logger.exception("Error fetching index report")
+        raise HTTPException(status_code=500, detail="Error fetching index report from database")
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Reporta los contadores de la caché de lectura de cuentas.
+    
+    Returns:
+        dict: Aciertos, fallos, expulsiones y ocupación de la caché.
+    """
+    return admin_service.get_cache_stats()
+
+@router.get("/idempotency")
+async def get_idempotency_stats():
+    """
+    Reporta los contadores del almacén de claves de idempotencia.
+    
+    Returns:
+        dict: Backend duradero, peticiones en curso y contadores de la caché de respuestas.
+    """
+    return admin_service.get_idempotency_stats()
+
+@router.get("/admission")
+async def get_admission_stats():
+    """
+    Reporta la ocupación de los límites de admisión.
+    
+    Returns:
+        dict: Límite, peticiones admitidas y en espera por presupuesto y por ruta.
+    """
+    return admin_service.get_admission_stats()
+
+@router.get("/changes")
+async def get_change_feed_stats():
+    """
+    Reporta los contadores del feed de cambios.
+    
+    Returns:
+        dict: Origen de los eventos, suscriptores, eventos publicados y retenidos
+            y suscriptores dados de baja.
+    """
+    return admin_service.get_change_feed_stats()
+
+@router.get("/pool")
+async def get_pool_stats():
+    """
+    Reporta las estadísticas de los pools de conexiones a MongoDB.
+    
+    Returns:
+        dict: Conexiones abiertas y en uso, checkouts, fallos y tiempos de espera
+            por tipo de cliente ("sync"/"async") y servidor.
+    """
+    return admin_service.get_pool_stats()
+
+@router.get("/reads")
+async def get_read_stats():
+    """
+    Reporta la preferencia de lectura por operación y dónde se atendieron las lecturas.
+    
+    Returns:
+        dict: Modo por operación, ``max_staleness_seconds`` y comandos de lectura
+            por operación y tipo de servidor (primary, secondary...).
+    """
+    return admin_service.get_read_stats()
+
+@router.get("/slow-operations")
+async def get_slow_operations():
+    """
+    Reporta los últimos comandos de MongoDB que superaron el umbral de lentitud.
+    
+    Returns:
+        dict: Umbral, muestreo de explain y, por cada comando lento (el más
+            reciente primero), ruta, comando, colección, forma del filtro con los
+            valores redactados, duración y, si se explicó, documentos examinados y plan.
+    """
+    return admin_service.get_slow_operations()
+
+@router.get("/totals/drift", response_model=account_model.TotalsDriftReport)
+async def check_totals_drift():
+    """
+    Compara los totales por moneda y tipo con un recálculo desde las cuentas.
+    
+    Returns:
+        TotalsDriftReport: Combinaciones cuyos totales mantenidos no coinciden.
+        
+    Raises:
+        HTTPException: 500 si no se puede consultar la base de datos
+    """
+    try:
+        return await account_service.check_totals_drift()
+    except Exception:
+        logger.exception("Error checking totals drift")
+        raise HTTPException(status_code=500, detail="Error checking totals drift in database")
+
+@router.post("/totals/reconcile", response_model=account_model.TotalsDriftReport)
+async def reconcile_totals():
+    """
+    Recalcula los totales y, si están desviados, los sustituye.
+    
+    Returns:
+        TotalsDriftReport: Desviación encontrada y si se concilió.
+        
+    Raises:
+        HTTPException: 500 si no se puede consultar o escribir la base de datos
+    """
+    try:
+        return await account_service.check_totals_drift(reconcile=True)
+    except Exception:
+        logger.exception("Error reconciling totals")
+        raise HTTPException(status_code=500, detail="Error reconciling totals in database")
@@ -0,0 +1,37 @@
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from services import admin_service
+import os
+
+router = APIRouter(prefix="/health")
+
+# Espera máxima del ping de disponibilidad a MongoDB, en segundos
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT_MS", "1000")) / 1000
+
+@router.get("/live")
+async def liveness():
+    """
+    Indica que el proceso está levantado y atiende peticiones.
+    
+    No consulta MongoDB: un fallo de la base de datos no debe provocar que el
+    orquestador reinicie el proceso.
+    
+    Returns:
+        dict: ``{"status": "alive"}``.
+    """
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def readiness():
+    """
+    Indica si el worker puede atender tráfico: MongoDB responde y los índices
+    requeridos están creados.
+    
+    Returns:
+        ORJSONResponse: 200 con ``{"status": "ready", "mongo": ...}`` o 503 con
+            ``{"status": "not_ready", "mongo": ...}`` si MongoDB no responde o los
+            índices aún no están creados (``"indexes": "pending"``).
+    """
+    result = await admin_service.check_readiness(READINESS_TIMEOUT)
+    status = "ready" if result.pop("ready") else "not_ready"
+    return ORJSONResponse({"status": status, **result}, status_code=200 if status == "ready" else 503)
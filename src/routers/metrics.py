@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from metrics import REGISTRY
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Expone las métricas de la aplicación en formato de texto de Prometheus.
+    
+    Incluye latencias y códigos de estado por ruta, peticiones en curso,
+    latencia y tamaño de respuesta de los comandos de MongoDB y el estado de
+    los pools de conexiones.
+    
+    Returns:
+        PlainTextResponse: Exposición ``text/plain; version=0.0.4``.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,88 @@
+"""
+Punto de entrada de producción de la API.
+
+Arranca uvicorn con varios workers, el event loop uvloop y el parser HTTP
+httptools. El proceso supervisor solo importa uvicorn: cada worker importa la
+aplicación (``main:app``) por su cuenta y crea sus propios clientes de MongoDB en
+el ``lifespan``, de modo que ningún cliente ni conexión se comparte entre procesos.
+
+Variables de entorno:
+    - WEB_CONCURRENCY: número de workers, o "auto" para uno por CPU (por defecto 1).
+      Con más de uno, CHANGE_FEED_SOURCE debe ser "change_stream" u "off".
+    - HOST / PORT: dirección de escucha (por defecto 0.0.0.0:8000).
+    - SERVER_LOOP / SERVER_HTTP: implementación del event loop y del parser HTTP
+      (por defecto "auto": uvloop y httptools si están instalados).
+    - SERVER_BACKLOG: cola de conexiones pendientes del socket (por defecto 2048).
+    - SERVER_KEEPALIVE_SECONDS: cierre de conexiones keep-alive inactivas (por defecto 5).
+    - LOG_LEVEL: nivel de log de uvicorn (por defecto "info").
+
+Uso (desde src/):
+    WEB_CONCURRENCY=4 python server.py
+"""
+
+import os
+
+import uvicorn
+
+
+def worker_count(value: str | None) -> int:
+    """
+    Interpreta el número de workers configurado.
+
+    Args:
+        value (str, opcional): Número de workers o "auto".
+
+    Returns:
+        int: Número de workers (al menos 1).
+    """
+    if not value:
+        return 1
+    if value == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+
+def check_workers(workers: int, change_feed_source: str):
+    """
+    Comprueba que el feed de cambios admite el número de workers.
+
+    Con el feed "local" cada worker solo publica sus propias escrituras y sus
+    tokens de reanudación solo valen en él: los suscriptores SSE y WebSocket de un
+    worker no verían las escrituras atendidas por los demás.
+
+    Args:
+        workers (int): Número de workers.
+        change_feed_source (str): Valor de CHANGE_FEED_SOURCE.
+
+    Raises:
+        ValueError: Si hay varios workers con el feed "local".
+    """
+    if workers > 1 and change_feed_source == "local":
+        raise ValueError(
+            f"{workers} workers require CHANGE_FEED_SOURCE=change_stream (or off); "
+            "the local change feed only sees the writes of its own worker."
+        )
+
+
+def main():
+    workers = worker_count(os.getenv("WEB_CONCURRENCY"))
+    try:
+        check_workers(workers, os.getenv("CHANGE_FEED_SOURCE", "local"))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        loop=os.getenv("SERVER_LOOP", "auto"),
+        http=os.getenv("SERVER_HTTP", "auto"),
+        backlog=int(os.getenv("SERVER_BACKLOG", "2048")),
+        timeout_keep_alive=int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5")),
+        log_level=os.getenv("LOG_LEVEL", "info"),
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import time
+
+
+class CacheBackend(ABC):
+    """
+    Interfaz de un backend de caché clave-valor.
+
+    Permite sustituir la caché en proceso por un backend compartido entre
+    procesos (por ejemplo Redis o Memcached) implementando estos métodos; un
+    backend al que le falte alguno no puede instanciarse.
+    """
+
+    @abstractmethod
+    def get(self, key: str):
+        """Retorna el valor de ``key`` o ``None`` si no existe o expiró."""
+
+    @abstractmethod
+    def set(self, key: str, value):
+        """Guarda ``value`` bajo ``key``."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Elimina ``key`` si existe."""
+
+    @abstractmethod
+    def clear(self):
+        """Elimina todas las entradas."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Retorna los contadores del backend."""
+
+
+class LRUCache(CacheBackend):
+    """
+    Caché en proceso con expulsión LRU, límite de tamaño y expiración por TTL.
+
+    Attributes:
+        max_entries (int): Número máximo de entradas antes de expulsar la menos usada.
+        ttl (float): Segundos de validez de cada entrada.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 5.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value):
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "lru",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class AccountCache:
+    """
+    Caché de lectura de cuentas delante del repositorio.
+
+    Las cuentas se guardan por ID y el número de cuenta se resuelve a su ID
+    (el número no cambia nunca). Las escrituras del propio proceso invalidan la
+    entrada y descartan las lecturas que estaban en curso para esa cuenta, de
+    modo que una lectura iniciada antes de una escritura no puede volver a
+    llenar la caché con un saldo anterior. Se invalida en lugar de escribir el
+    saldo nuevo porque las respuestas de escrituras concurrentes pueden llegar
+    en otro orden que el aplicado por MongoDB.
+
+    Attributes:
+        backend (CacheBackend): Almacenamiento de las entradas; ``None`` desactiva la caché.
+    """
+
+    def __init__(self, backend: CacheBackend | None):
+        self.backend = backend
+        self._fills = {}
+
+    @staticmethod
+    def _account_key(account_id: str) -> str:
+        return f"account:{account_id}"
+
+    @staticmethod
+    def _number_key(account_number: str) -> str:
+        return f"number:{account_number}"
+
+    def get_account(self, account_id: str):
+        """
+        Retorna una copia de la cuenta en caché o ``None``.
+
+        Args:
+            account_id (str): ID de la cuenta.
+
+        Returns:
+            dict: Datos de la cuenta.
+            None: Si no está en caché o la caché está desactivada.
+        """
+        if self.backend is None:
+            return None
+        account = self.backend.get(self._account_key(account_id))
+        return dict(account) if account is not None else None
+
+    def get_account_id(self, account_number: str):
+        """
+        Resuelve un número de cuenta a su ID.
+
+        Args:
+            account_number (str): Número de la cuenta.
+
+        Returns:
+            str: ID de la cuenta, o ``None`` si no se conoce.
+        """
+        if self.backend is None:
+            return None
+        return self.backend.get(self._number_key(account_number))
+
+    def begin_fill(self, account_id: str):
+        """
+        Registra el inicio de una lectura del repositorio para ``account_id``.
+
+        Args:
+            account_id (str): ID de la cuenta que se va a leer.
+
+        Returns:
+            object: Ficha a presentar en ``fill``.
+        """
+        token = object()
+        self._fills.setdefault(account_id, set()).add(token)
+        return token
+
+    def fill(self, account_id: str, account, token):
+        """
+        Guarda el resultado de una lectura si no hubo escrituras mientras tanto.
+
+        Debe llamarse siempre tras ``begin_fill``, con ``account=None`` si la
+        lectura falló, para liberar la ficha.
+
+        Args:
+            account_id (str): ID de la cuenta leída.
+            account (dict): Datos leídos del repositorio, o ``None``.
+            token (object): Ficha retornada por ``begin_fill``.
+        """
+        tokens = self._fills.get(account_id)
+        if not tokens or token not in tokens:
+            return
+        tokens.discard(token)
+        if not tokens:
+            del self._fills[account_id]
+        if account is not None:
+            self.store(account)
+
+    def store(self, account: dict):
+        """
+        Guarda una cuenta completa (con ``id``) en la caché.
+
+        Args:
+            account (dict): Datos de la cuenta.
+        """
+        if self.backend is None:
+            return
+        self.backend.set(self._account_key(account["id"]), dict(account))
+        self.store_account_id(account["account_number"], account["id"])
+
+    def store_account_id(self, account_number: str, account_id: str):
+        """
+        Guarda la relación entre un número de cuenta y su ID.
+
+        Args:
+            account_number (str): Número de la cuenta.
+            account_id (str): ID de la cuenta.
+        """
+        if self.backend is not None:
+            self.backend.set(self._number_key(account_number), account_id)
+
+    def invalidate(self, account_id: str):
+        """
+        Elimina una cuenta de la caché tras una escritura sobre ella.
+
+        Args:
+            account_id (str): ID de la cuenta modificada.
+        """
+        self._fills.pop(account_id, None)
+        if self.backend is not None:
+            self.backend.delete(self._account_key(account_id))
+
+    def stats(self) -> dict:
+        """
+        Retorna los contadores de la caché.
+
+        Returns:
+            dict: Contadores del backend, o ``{"backend": None}`` si está desactivada.
+        """
+        if self.backend is None:
+            return {"backend": None}
+        return self.backend.stats()
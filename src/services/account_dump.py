@@ -0,0 +1,269 @@
+from repositories import account_query
+from models import account_model
+from services import account_service
+from pydantic import ValidationError
+from fastapi.concurrency import run_in_threadpool
+import codecs
+import csv
+import io
+import orjson
+import zlib
+
+# Volcado e importación de cuentas en NDJSON o CSV, opcionalmente con gzip.
+# Todo se procesa por lotes y bloques: la memoria usada depende del tamaño de
+# lote y de bloque, no del número de cuentas. Lo usan las rutas
+# /accounts/export y /accounts/import y el CLI accounts_cli.py.
+
+FORMATS = ("ndjson", "csv")
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Tamaño máximo de cada bloque descomprimido, para que una entrada muy
+# comprimida no se expanda de golpe en memoria
+GUNZIP_BLOCK_SIZE = 1 << 20
+
+def csv_columns(query: account_model.AccountQuery) -> list[str]:
+    """
+    Retorna las columnas del CSV de un volcado, en el orden de la proyección.
+
+    Args:
+        query (AccountQuery): Filtros, orden y campos del volcado.
+
+    Returns:
+        list[str]: Nombres de las columnas (``id`` primero).
+    """
+    return [name for name in account_query.build_projection(query) if name != "_id"]
+
+async def encode_accounts(batches, format: str = "ndjson", columns: list[str] | None = None):
+    """
+    Codifica lotes de cuentas como bloques NDJSON o CSV.
+
+    Args:
+        batches (AsyncIterator[list[dict]]): Lotes de cuentas proyectadas.
+        format (str): "ndjson" o "csv".
+        columns (list[str], opcional): Columnas del CSV (ver ``csv_columns``).
+
+    Yields:
+        bytes: Un bloque por lote; en CSV el primero empieza con la cabecera.
+    """
+    if format == "ndjson":
+        async for batch in batches:
+            yield b"".join(orjson.dumps(account) + b"\n" for account in batch)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    async for batch in batches:
+        writer.writerows([account.get(column) for column in columns] for account in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Volcado sin cuentas: solo la cabecera
+        yield buffer.getvalue().encode()
+
+async def gzip_chunks(chunks, level: int = 6):
+    """
+    Comprime al vuelo una secuencia de bloques en formato gzip.
+
+    La compresión se ejecuta en el threadpool (zlib libera el GIL), de modo que
+    un volcado comprimido no bloquea el event loop.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Bloques sin comprimir.
+        level (int): Nivel de compresión (1-9).
+
+    Yields:
+        bytes: Bloques del flujo gzip.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = await run_in_threadpool(compressor.compress, chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+async def gunzip_chunks(chunks):
+    """
+    Descomprime al vuelo un flujo gzip (o zlib) en bloques acotados.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Bloques comprimidos.
+
+    Yields:
+        bytes: Bloques descomprimidos de como mucho ``GUNZIP_BLOCK_SIZE`` bytes.
+
+    Raises:
+        ValueError: Si la entrada no es un flujo gzip válido.
+    """
+    # 32 + MAX_WBITS detecta la cabecera gzip o zlib
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    try:
+        async for chunk in chunks:
+            data = decompressor.decompress(chunk, GUNZIP_BLOCK_SIZE)
+            while data:
+                yield data
+                data = decompressor.decompress(decompressor.unconsumed_tail, GUNZIP_BLOCK_SIZE)
+        data = decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f"Invalid gzip input: {e}")
+    if data:
+        yield data
+
+def _parse_ndjson_line(line: bytes):
+    """
+    Decodifica una línea NDJSON; las líneas inválidas se entregan como ``None``
+    para que se reporten como error de validación de su elemento.
+    """
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+
+async def ndjson_records(chunks):
+    """
+    Lee los elementos de un flujo NDJSON a medida que llegan sus bloques.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Bloques del flujo.
+
+    Yields:
+        Any: Cada línea decodificada, o ``None`` si no es JSON válido.
+    """
+    pending = b""
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(line)
+    if pending.strip():
+        yield _parse_ndjson_line(pending)
+
+async def csv_records(chunks):
+    """
+    Lee las filas de un flujo CSV con cabecera a medida que llegan sus bloques.
+
+    Un registro termina en un salto de línea fuera de comillas; las filas se
+    entregan como diccionarios por nombre de columna (las columnas que no son
+    de ``CreateAccount``, como ``id``, se ignoran al validar).
+
+    Args:
+        chunks (AsyncIterator[bytes]): Bloques del flujo, en UTF-8.
+
+    Yields:
+        dict: Cada fila por nombre de columna.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    header = None
+    pending = ""
+    final = False
+    chunks = aiter(chunks)
+    while not final:
+        chunk = await anext(chunks, None)
+        final = chunk is None
+        *lines, pending = (pending + decoder.decode(chunk or b"", final)).split("\n")
+        if final:
+            lines.append(pending)
+            pending = ""
+        # Las líneas de un registro con saltos de línea entre comillas se unen
+        # hasta que el número de comillas es par
+        complete, partial, quotes = [], [], 0
+        for line in lines:
+            partial.append(line)
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                complete.append("\n".join(partial))
+                partial, quotes = [], 0
+        if partial and final:
+            # Comillas sin cerrar al final de la entrada: el lector CSV decide
+            complete.append("\n".join(partial))
+        elif partial:
+            pending = "\n".join(partial + [pending])
+        for row in csv.reader(complete):
+            if not row:
+                continue
+            if header is None:
+                header = row
+                continue
+            yield dict(zip(header, row))
+
+def records(chunks, format: str = "ndjson", compressed: bool = False):
+    """
+    Construye el lector de elementos de una entrada de importación.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Bloques de la entrada.
+        format (str): "ndjson" o "csv".
+        compressed (bool): Si la entrada está comprimida con gzip.
+
+    Returns:
+        AsyncIterator: Elementos de la entrada.
+    """
+    if compressed:
+        chunks = gunzip_chunks(chunks)
+    return csv_records(chunks) if format == "csv" else ndjson_records(chunks)
+
+def export_accounts(query: account_model.AccountExportQuery):
+    """
+    Vuelca las cuentas que cumplen la consulta leyendo del cursor por lotes.
+
+    Args:
+        query (AccountExportQuery): Filtros, orden, campos, formato y compresión.
+
+    Returns:
+        AsyncIterator[bytes]: Bloques del volcado.
+    """
+    batches = account_service.stream_accounts(query.batch_size, query)
+    chunks = encode_accounts(batches, query.format, csv_columns(query))
+    return gzip_chunks(chunks) if query.gzip else chunks
+
+async def import_accounts(items, chunk_size: int = 1000):
+    """
+    Importa cuentas validándolas con ``CreateAccount`` e insertándolas por bloques.
+
+    Cada bloque de ``chunk_size`` elementos de la entrada se inserta con una
+    inserción no ordenada y produce un avance con los contadores acumulados y
+    solo los rechazos de ese bloque, de modo que ni la entrada ni el informe se
+    retienen en memoria.
+
+    Args:
+        items (AsyncIterable[Any]): Elementos de la entrada (ver ``records``).
+        chunk_size (int): Número de elementos por bloque.
+
+    Yields:
+        ImportProgress: Avance tras cada bloque; el último tiene ``done=True``.
+    """
+    processed = created = rejected = 0
+    chunk, rejects = [], []
+
+    async def flush():
+        nonlocal created, rejected
+        if chunk:
+            outcomes = await account_service.create_accounts([account for _, account in chunk])
+            if outcomes is None:
+                outcomes = [{"error": "database", "detail": "Error creating accounts in database"}] * len(chunk)
+            for (index, _), outcome in zip(chunk, outcomes):
+                if "id" in outcome:
+                    created += 1
+                else:
+                    rejects.append(account_model.BulkAccountResult(index=index, **outcome))
+        rejected += len(rejects)
+        progress = account_model.ImportProgress(
+            processed=processed, created=created, rejected=rejected, rejects=sorted(rejects, key=lambda r: r.index)
+        )
+        chunk.clear()
+        rejects.clear()
+        return progress
+
+    async for item in items:
+        try:
+            chunk.append((processed, account_model.CreateAccount.model_validate(item)))
+        except ValidationError as e:
+            rejects.append(account_model.BulkAccountResult(index=processed, error="validation", detail=str(e)))
+        processed += 1
+        if processed % chunk_size == 0:
+            yield await flush()
+    progress = await flush()
+    progress.done = True
+    yield progress
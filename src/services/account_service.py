@@ -1,10 +1,129 @@
-from repositories import account_repository
+from repositories import account_repository as sync_account_repository
+from repositories import async_account_repository
+from repositories import memory_account_repository
+from repositories import account_query, account_totals, ledger
 from models import account_model
+from services.account_cache import AccountCache, LRUCache
+from services.balance_coalescer import BalanceCoalescer
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from pydantic import ValidationError
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+import hashlib
+import inspect
+import logging
+import math
+import orjson
+import time
 
-def create_account(account_data: account_model.CreateAccount):
+logger = logging.getLogger(__name__)
+
+REPOSITORY_BACKENDS = {
+    "sync": sync_account_repository,
+    "async": async_account_repository,
+    "memory": memory_account_repository,
+}
+
+# Implementación activa del repositorio; se selecciona al arranque con configure_repository
+account_repository = sync_account_repository
+
+def configure_repository(backend: str, database=None):
+    """
+    Selecciona la implementación del repositorio usada por los servicios.
+    
+    Args:
+        backend (str): Nombre del backend: "async" (cliente asíncrono nativo),
+            "sync" (pymongo síncrono ejecutado en el threadpool) o "memory"
+            (almacenamiento en proceso para benchmarks y pruebas).
+        database (Database | AsyncDatabase, opcional): Base de datos del cliente
+            correspondiente al backend, que se inyecta en el repositorio.
+        
+    Raises:
+        ValueError: Si el backend no existe.
+    """
+    global account_repository
+    if backend not in REPOSITORY_BACKENDS:
+        raise ValueError(f"Unknown repository backend: {backend}")
+    account_repository = REPOSITORY_BACKENDS[backend]
+    if database is not None:
+        account_repository.configure(database)
+
+# Caché de lectura de cuentas; se configura al arranque con configure_cache
+account_cache = AccountCache(LRUCache())
+
+def configure_cache(max_entries: int = 10000, ttl: float = 5.0, backend=None):
+    """
+    Configura la caché de lectura de cuentas.
+    
+    Args:
+        max_entries (int): Tamaño máximo de la caché LRU en proceso; 0 la desactiva.
+        ttl (float): Segundos de validez de cada entrada.
+        backend (CacheBackend, opcional): Backend compartido a usar en lugar de la LRU.
+    """
+    global account_cache
+    if backend is None and max_entries > 0:
+        backend = LRUCache(max_entries, ttl)
+    account_cache = AccountCache(backend)
+
+# Caché de páginas del listado ya codificadas, por ETag, y vida máxima de un ETag;
+# se configuran al arranque con configure_list_cache
+list_cache = None
+etag_max_age = 60.0
+
+def configure_list_cache(max_entries: int = 128, ttl: float = 5.0, max_age: float = 60.0):
+    """
+    Configura la caché de páginas codificadas y los ETag del listado de cuentas.
+    
+    Args:
+        max_entries (int): Número máximo de páginas guardadas; 0 la desactiva.
+        ttl (float): Segundos de validez de cada página; acota cuánto puede
+            servirse una página si el incremento de la versión falla.
+        max_age (float): Segundos máximos durante los que un ETag valida (304);
+            acota las respuestas 304 si la versión no avanza. 0 sin límite.
+    """
+    global list_cache, etag_max_age
+    list_cache = LRUCache(max_entries, ttl) if max_entries > 0 else None
+    etag_max_age = max_age
+
+# Agrupador de incrementos de saldo; desactivado salvo que se configure una ventana
+balance_coalescer = None
+
+def configure_coalescing(window: float = 0.0, max_batch: int = 1000):
+    """
+    Activa o desactiva la agrupación de incrementos de saldo por cuenta.
+    
+    Args:
+        window (float): Segundos de espera para agrupar incrementos; 0 la desactiva.
+        max_batch (int): Número de incrementos que fuerza la escritura del grupo.
+    """
+    global balance_coalescer
+    balance_coalescer = BalanceCoalescer(window, max_batch) if window > 0 else None
+
+async def _call(func, *args):
+    """
+    Ejecuta una función del repositorio sin bloquear el event loop.
+    
+    Las funciones asíncronas se esperan directamente; las síncronas se
+    ejecutan en el threadpool.
+    
+    Args:
+        func (Callable): Función del repositorio a ejecutar.
+        *args: Argumentos de la función.
+        
+    Returns:
+        Any: Resultado de la función.
+    """
+    if inspect.iscoroutinefunction(func):
+        return await func(*args)
+    return await run_in_threadpool(func, *args)
+
+async def create_account(account_data: account_model.CreateAccount):
     """
     Crea una nueva cuenta bancaria con validaciones de negocio.
     
+    La unicidad del número de cuenta la garantiza el índice único sobre
+    ``account_number``, por lo que basta con una única inserción.
+    
     Args:
         account_data (CreateAccount): Datos de la cuenta a crear.
         
@@ -14,16 +133,87 @@ def create_account(account_data: account_model.CreateAccount):
     Raises:
         ValueError: Si ya existe una cuenta con el número proporcionado.
     """
-    # Validar que no exista una cuenta con el mismo número
-    if account_repository.get_account_by_account_number(account_data.account_number):
+    try:
+        account = await _call(account_repository.create_account, account_data)
+    except DuplicateKeyError:
         raise ValueError("Account with this account number already exists.")
-    account = account_repository.create_account(account_data)
+    if account is not None:
+        account_cache.store({"id": account.id, **account_data.model_dump()})
     return account
 
-def update_account_balance(account_data: account_model.UpdateAccountBalance):
+async def create_accounts_bulk(items, chunk_size: int = 1000):
+    """
+    Crea cuentas bancarias de forma masiva a partir de un iterable de elementos.
+    
+    Cada elemento se valida con ``CreateAccount`` a medida que llega; los válidos
+    se acumulan y se insertan por bloques de ``chunk_size`` con una inserción no
+    ordenada, de modo que la memoria depende del tamaño del bloque y no del total.
+    
+    Args:
+        items (AsyncIterable[Any]): Elementos de entrada (diccionarios JSON).
+        chunk_size (int): Número de cuentas por inserción masiva.
+        
+    Returns:
+        BulkCreateAccountsResponse: Resumen y resultado por elemento.
+    """
+    results = []
+    chunk = []
+
+    async def flush():
+        indexes = [index for index, _ in chunk]
+        outcomes = await _call(account_repository.create_accounts, [account for _, account in chunk])
+        if outcomes is None:
+            outcomes = [{"error": "database", "detail": "Error creating accounts in database"}] * len(chunk)
+        for index, outcome in zip(indexes, outcomes):
+            results.append(account_model.BulkAccountResult(index=index, **outcome))
+        chunk.clear()
+
+    index = 0
+    async for item in items:
+        try:
+            chunk.append((index, account_model.CreateAccount.model_validate(item)))
+        except ValidationError as e:
+            results.append(account_model.BulkAccountResult(
+                index=index, error="validation", detail=str(e)
+            ))
+        index += 1
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+
+    results.sort(key=lambda result: result.index)
+    created = sum(1 for result in results if result.id is not None)
+    return account_model.BulkCreateAccountsResponse(
+        created=created,
+        failed=len(results) - created,
+        results=results
+    )
+
+async def create_accounts(accounts: list[account_model.CreateAccount]):
+    """
+    Inserta un bloque de cuentas ya validadas con una inserción no ordenada.
+    
+    Args:
+        accounts (list[CreateAccount]): Cuentas a crear.
+        
+    Returns:
+        list[dict]: Por cada cuenta, en el mismo orden, ``{"id": ...}`` si se creó
+            o ``{"error": ..., "detail": ...}`` si fue rechazada.
+        None: Si ocurre un error que impide procesar el bloque.
+    """
+    return await _call(account_repository.create_accounts, accounts)
+
+async def update_account_balance(account_data: account_model.UpdateAccountBalance):
     """
     Actualiza el saldo de una cuenta existente.
     
+    La existencia de la cuenta se deduce del resultado de la actualización
+    atómica, sin una consulta previa a la base de datos. Si la agrupación está
+    activa, los incrementos concurrentes sobre la misma cuenta se combinan en
+    una sola escritura, con un movimiento del libro por incremento (ver
+    ``BalanceCoalescer``).
+    
     Args:
         account_data (UpdateAccountBalance): Datos para actualizar el saldo.
         
@@ -33,18 +223,430 @@ def update_account_balance(account_data: account_model.UpdateAccountBalance):
     Raises:
         ValueError: Si no se encuentra la cuenta con el ID proporcionado.
     """
-    # Validar que la cuenta existe
-    if not account_repository.get_account_by_id(account_data.id):
+    try:
+        if balance_coalescer is not None:
+            result = await balance_coalescer.submit(account_data.id, account_data.balance, _apply_increments)
+        else:
+            result = await _call(account_repository.update_balance, account_data)
+    finally:
+        account_cache.invalidate(account_data.id)
+    if result is None:
         raise ValueError("Account not found.")
-    result = account_repository.update_balance(account_data)
     return result
 
-def get_all_accounts():
+async def _apply_increments(account_id: str, amounts: list[float]):
+    """
+    Aplica los incrementos agrupados por el agrupador de saldos.
+    
+    Se escriben juntos, con un movimiento del libro por incremento.
+    
+    Args:
+        account_id (str): ID de la cuenta.
+        amounts (list[float]): Incrementos agrupados en orden de llegada.
+        
+    Returns:
+        dict: ID y saldo posterior a cada incremento (``balances``).
+        None: Si no se encuentra la cuenta.
+    """
+    return await _call(account_repository.update_balance_sequence, account_id, amounts)
+
+async def get_account(account_id: str):
+    """
+    Obtiene una cuenta por su ID, sirviéndola desde la caché cuando es posible.
+    
+    Args:
+        account_id (str): ID de la cuenta.
+        
+    Returns:
+        dict: Datos de la cuenta.
+        
+    Raises:
+        ValueError: Si no se encuentra la cuenta.
+    """
+    account = account_cache.get_account(account_id)
+    if account is not None:
+        return account
+
+    token = account_cache.begin_fill(account_id)
+    account = None
+    try:
+        account = await _call(account_repository.get_account_by_id, account_id)
+    finally:
+        account_cache.fill(account_id, account, token)
+    if account is None:
+        raise ValueError("Account not found.")
+    return account
+
+async def get_account_by_number(account_number: str):
+    """
+    Obtiene una cuenta por su número, sirviéndola desde la caché cuando es posible.
+    
+    Args:
+        account_number (str): Número de la cuenta.
+        
+    Returns:
+        dict: Datos de la cuenta.
+        
+    Raises:
+        ValueError: Si no se encuentra la cuenta.
+    """
+    account_id = account_cache.get_account_id(account_number)
+    if account_id is not None:
+        return await get_account(account_id)
+
+    account = await _call(account_repository.get_account_by_account_number, account_number)
+    if account is None:
+        raise ValueError("Account not found.")
+    # Solo se guarda la relación número -> ID, que no cambia; el documento se cachea
+    # por get_account, que descarta lecturas concurrentes con una escritura
+    account_cache.store_account_id(account_number, account["id"])
+    return account
+
+async def apply_postings(items, chunk_size: int = 1000):
+    """
+    Aplica un lote de asientos de saldo por bloques.
+    
+    Dentro de cada bloque los asientos de una misma cuenta se suman en un único
+    incremento y el bloque se escribe con una sola operación masiva. Los
+    resultados se entregan bloque a bloque, por lo que la memoria depende del
+    tamaño del bloque y no del total de asientos.
+    
+    Args:
+        items (AsyncIterable[Any]): Asientos de entrada (diccionarios JSON).
+        chunk_size (int): Número de asientos por escritura masiva.
+        
+    Yields:
+        list[PostingResult]: Resultados de cada bloque, en el orden de entrada.
+    """
+    chunk = []
+
+    async def flush():
+        increments = {}
+        for _, posting, _ in chunk:
+            if posting is not None:
+                increments[posting.id] = increments.get(posting.id, 0) + posting.amount
+
+        missing = set()
+        if increments:
+            try:
+                missing = await _call(account_repository.apply_balance_increments, increments)
+            finally:
+                for account_id in increments:
+                    account_cache.invalidate(account_id)
+
+        results = []
+        for index, posting, error in chunk:
+            if posting is None:
+                result = account_model.PostingResult(index=index, status="invalid", detail=error)
+            elif missing is None:
+                result = account_model.PostingResult(
+                    index=index, id=posting.id, status="database",
+                    detail="Error applying postings in database"
+                )
+            elif posting.id in missing:
+                result = account_model.PostingResult(index=index, id=posting.id, status="not_found")
+            else:
+                result = account_model.PostingResult(index=index, id=posting.id, status="applied")
+            results.append(result)
+        chunk.clear()
+        return results
+
+    index = 0
+    async for item in items:
+        posting, error = None, None
+        try:
+            posting = account_model.Posting.model_validate(item)
+            if not ObjectId.is_valid(posting.id):
+                posting, error = None, "Invalid account id."
+        except ValidationError as e:
+            error = str(e)
+        chunk.append((index, posting, error))
+        index += 1
+        if len(chunk) >= chunk_size:
+            yield await flush()
+    if chunk:
+        yield await flush()
+
+async def transfer(transfer_data: account_model.Transfer):
+    """
+    Transfiere un importe entre dos cuentas de forma atómica.
+    
+    Args:
+        transfer_data (Transfer): Cuentas de origen y destino e importe.
+        
+    Returns:
+        TransferResult: Resultado con el ID de la transferencia y los saldos resultantes.
+        
+    Raises:
+        ValueError: Si alguna cuenta no existe, tienen distinta moneda o el
+            origen no tiene saldo suficiente.
+    """
+    try:
+        (result,) = await _call(account_repository.apply_transfers, [transfer_data])
+    finally:
+        account_cache.invalidate(transfer_data.from_id)
+        account_cache.invalidate(transfer_data.to_id)
+    if result["status"] == "not_found":
+        raise ValueError("Account not found.")
+    if result["status"] == "currency_mismatch":
+        raise ValueError("Accounts have different currencies.")
+    if result["status"] == "insufficient_funds":
+        raise ValueError("Insufficient funds.")
+    return account_model.TransferResult(**result)
+
+async def transfer_batch(items, chunk_size: int = 100):
     """
-    Obtiene todas las cuentas bancarias registradas.
+    Liquida un lote de transferencias por bloques, un bloque por transacción.
     
+    Las transferencias de un bloque se aplican en orden de entrada, cada una con
+    los saldos que dejaron las anteriores; las rechazadas no afectan al resto.
+    Un error de base de datos solo afecta a las transferencias de su bloque.
+    
+    Args:
+        items (AsyncIterable[Any]): Transferencias de entrada (diccionarios JSON).
+        chunk_size (int): Número de transferencias por transacción.
+        
     Returns:
-        Accounts: Objeto que contiene la lista de todas las cuentas.
+        TransfersResponse: Resumen y resultado por transferencia.
     """
-    accounts = account_repository.get_all_accounts()
+    results = []
+    chunk = []
+
+    async def flush():
+        try:
+            outcomes = await _call(account_repository.apply_transfers, [transfer for _, transfer in chunk])
+        except Exception:
+            # El detalle del driver va al log, no a la respuesta
+            logger.exception("Error applying transfers")
+            outcomes = [{"status": "database", "detail": "Error applying transfers in database"}] * len(chunk)
+        finally:
+            for _, transfer in chunk:
+                account_cache.invalidate(transfer.from_id)
+                account_cache.invalidate(transfer.to_id)
+        for (index, _), outcome in zip(chunk, outcomes):
+            results.append(account_model.TransferResult(index=index, **outcome))
+        chunk.clear()
+
+    index = 0
+    async for item in items:
+        try:
+            chunk.append((index, account_model.Transfer.model_validate(item)))
+        except ValidationError as e:
+            results.append(account_model.TransferResult(index=index, status="invalid", detail=str(e)))
+        index += 1
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+
+    results.sort(key=lambda result: result.index)
+    completed = sum(1 for result in results if result.status == "completed")
+    return account_model.TransfersResponse(
+        completed=completed,
+        failed=len(results) - completed,
+        results=results
+    )
+
+async def get_all_accounts(limit: int = 100, after: str | None = None, query: account_model.AccountQuery | None = None):
+    """
+    Obtiene una página de cuentas bancarias registradas.
+    
+    Args:
+        limit (int): Número máximo de cuentas a retornar.
+        after (str, opcional): Cursor retornado por la página anterior.
+        query (AccountQuery, opcional): Filtros, orden y campos del listado.
+        
+    Returns:
+        dict: Página con la forma de ``Accounts`` (cuentas y siguiente cursor).
+        
+    Raises:
+        ValueError: Si el cursor proporcionado no es válido.
+    """
+    query = query or account_model.AccountQuery()
+    if after is not None:
+        # El cursor depende del orden: se valida antes de consultar
+        account_query.decode_cursor(after, query)
+    accounts = await _call(account_repository.get_all_accounts, limit, after, query)
     return accounts
+
+def _list_etag(version: int, limit: int, after: str | None, query: account_model.AccountQuery) -> str:
+    """
+    Construye el ETag de una página del listado a partir de la versión y la consulta.
+    
+    Es débil: dos respuestas con la misma versión y consulta son equivalentes,
+    aunque no se garantiza que sean idénticas byte a byte. Incluye la época de la
+    versión del proceso y el intervalo de ``etag_max_age`` en curso, de modo que
+    un ETag deja de validar si la versión se invalidó o cuando vence el intervalo.
+    """
+    window = int(time.time() // etag_max_age) if etag_max_age > 0 else 0
+    key = f"{limit}|{after}|{query.model_dump_json(include=set(account_model.AccountQuery.model_fields))}"
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'W/"{version}.{account_totals.version_epoch}.{window}-{digest}"'
+
+async def get_accounts_etag(limit: int = 100, after: str | None = None, query: account_model.AccountQuery | None = None):
+    """
+    Obtiene el ETag actual de una página del listado sin leer las cuentas.
+    
+    Args:
+        limit (int): Número máximo de cuentas a retornar.
+        after (str, opcional): Cursor retornado por la página anterior.
+        query (AccountQuery, opcional): Filtros, orden y campos del listado.
+        
+    Returns:
+        str: ETag derivado de la versión de la colección y de la consulta.
+        
+    Raises:
+        ValueError: Si el cursor proporcionado no es válido.
+        Exception: Si no se puede leer la versión de la colección.
+    """
+    query = query or account_model.AccountQuery()
+    if after is not None:
+        account_query.decode_cursor(after, query)
+    version = await _call(account_repository.get_accounts_version)
+    return _list_etag(version, limit, after, query)
+
+async def get_encoded_accounts(limit: int = 100, after: str | None = None,
+                               query: account_model.AccountQuery | None = None, etag: str | None = None):
+    """
+    Obtiene una página del listado codificada en JSON, desde la caché si está.
+    
+    Si la página de ``etag`` no está en la caché se lee junto con la versión
+    que refleja; su ETag puede ser posterior a ``etag`` si hubo una escritura
+    entretanto, y la página se guarda bajo el ETag nuevo.
+    
+    Args:
+        limit (int): Número máximo de cuentas a retornar.
+        after (str, opcional): Cursor retornado por la página anterior.
+        query (AccountQuery, opcional): Filtros, orden y campos del listado.
+        etag (str, opcional): ETag actual, retornado por ``get_accounts_etag``.
+        
+    Returns:
+        tuple[str, bytes]: ETag y cuerpo JSON con la forma de ``Accounts``.
+        None: Si ocurre un error durante la consulta.
+    """
+    query = query or account_model.AccountQuery()
+    if etag is not None and list_cache is not None:
+        body = list_cache.get(etag)
+        if body is not None:
+            return etag, body
+    result = await _call(account_repository.get_versioned_accounts, limit, after, query)
+    if result is None:
+        return None
+    version, page = result
+    etag = _list_etag(version, limit, after, query)
+    body = orjson.dumps(page)
+    if list_cache is not None:
+        list_cache.set(etag, body)
+    return etag, body
+
+def stream_accounts(batch_size: int = 1000, query: account_model.AccountQuery | None = None):
+    """
+    Recorre todas las cuentas bancarias por lotes sin cargarlas completas en memoria.
+    
+    Args:
+        batch_size (int): Número de documentos por lote leído de la base de datos.
+        query (AccountQuery, opcional): Filtros, orden y campos del recorrido.
+        
+    Returns:
+        AsyncIterator[list[dict]]: Iterador asíncrono sobre lotes de cuentas.
+    """
+    batches = account_repository.iter_account_batches(batch_size, query or account_model.AccountQuery())
+    if inspect.isasyncgen(batches):
+        return batches
+    # Con el backend síncrono cada lote se lee en el threadpool
+    return iterate_in_threadpool(batches)
+
+async def get_account_totals():
+    """
+    Obtiene el saldo total y el número de cuentas por moneda y tipo de cuenta.
+    
+    Los totales se mantienen con deltas en cada escritura, por lo que la lectura
+    no depende del número de cuentas.
+    
+    Returns:
+        AccountTotals: Totales por moneda y tipo de cuenta.
+    """
+    rows = await _call(account_repository.get_totals)
+    return account_model.AccountTotals(totals=rows)
+
+async def check_totals_drift(reconcile: bool = False):
+    """
+    Compara los totales mantenidos con un recálculo completo desde las cuentas.
+    
+    Los saldos se comparan con tolerancia, ya que la suma de flotantes depende
+    del orden. Las escrituras concurrentes con la comprobación pueden aparecer
+    como desviación transitoria.
+    
+    Args:
+        reconcile (bool): Si es ``True`` y hay desviación, sustituye los totales
+            mantenidos por los recalculados.
+        
+    Returns:
+        TotalsDriftReport: Combinaciones desviadas y si se concilió.
+    """
+    stored = {(row["currency"], row["account_type"]): row for row in await _call(account_repository.get_totals)}
+    actual_rows = await _call(account_repository.recompute_totals)
+    actual = {(row["currency"], row["account_type"]): row for row in actual_rows}
+
+    drift = []
+    empty = {"accounts": 0, "balance": 0.0}
+    for currency, account_type in sorted(stored.keys() | actual.keys()):
+        stored_row = stored.get((currency, account_type), empty)
+        actual_row = actual.get((currency, account_type), empty)
+        if stored_row["accounts"] != actual_row["accounts"] or not math.isclose(
+            stored_row["balance"], actual_row["balance"], rel_tol=1e-9, abs_tol=1e-6
+        ):
+            drift.append(account_model.TotalsDrift(
+                currency=currency,
+                account_type=account_type,
+                stored_accounts=stored_row["accounts"],
+                actual_accounts=actual_row["accounts"],
+                stored_balance=stored_row["balance"],
+                actual_balance=actual_row["balance"]
+            ))
+
+    reconciled = False
+    if drift and reconcile:
+        await _call(account_repository.replace_totals, actual_rows)
+        reconciled = True
+    return account_model.TotalsDriftReport(in_sync=not drift, drift=drift, reconciled=reconciled)
+
+async def get_transactions(account_id: str, query: account_model.TransactionQuery):
+    """
+    Obtiene una página del historial de movimientos de una cuenta.
+    
+    Args:
+        account_id (str): ID de la cuenta.
+        query (TransactionQuery): Paginación y rango de fechas.
+        
+    Returns:
+        dict: Página con la forma de ``Transactions``.
+        
+    Raises:
+        ValueError: Si no se encuentra la cuenta.
+    """
+    since = ledger.as_utc(query.since) if query.since is not None else None
+    until = ledger.as_utc(query.until) if query.until is not None else None
+    page = await _call(account_repository.get_transactions, account_id, query.limit, query.after, since, until)
+    if page is None:
+        raise ValueError("Account not found.")
+    return page
+
+async def get_balance_at(account_id: str, at):
+    """
+    Obtiene el saldo que tenía una cuenta en una fecha.
+    
+    Args:
+        account_id (str): ID de la cuenta.
+        at (datetime): Fecha consultada; sin zona horaria se toma como UTC.
+        
+    Returns:
+        dict: Saldo con la forma de ``BalanceAt``.
+        
+    Raises:
+        ValueError: Si no se encuentra la cuenta o no existía en esa fecha.
+    """
+    balance = await _call(account_repository.get_balance_at, account_id, ledger.as_utc(at))
+    if balance is None:
+        raise ValueError("Account not found.")
+    return balance
@@ -0,0 +1,150 @@
+from repositories import index_manager
+from services import account_service, change_feed, idempotency
+from fastapi.concurrency import run_in_threadpool
+import admission
+import asyncio
+import database as mongo
+import logging
+import slow_log
+
+logger = logging.getLogger(__name__)
+
+# Base de datos del cliente asíncrono usada para comprobar la disponibilidad;
+# None con el repositorio en memoria
+readiness_database = None
+
+# Si los índices requeridos ya están creados. El alta de cuentas detecta los
+# duplicados solo con el índice único de ``account_number``, así que el worker no
+# está disponible hasta que ensure_indexes() termina
+indexes_ready = True
+
+def configure(database, async_database=None):
+    """
+    Inyecta las bases de datos usadas por las tareas de administración.
+    
+    Args:
+        database (Database): Base de datos del cliente síncrono creado en el arranque.
+        async_database (AsyncDatabase, opcional): Base de datos del cliente
+            asíncrono, usada por la comprobación de disponibilidad.
+    """
+    global readiness_database, indexes_ready
+    index_manager.configure(database)
+    readiness_database = async_database
+    indexes_ready = async_database is None
+
+async def check_readiness(timeout: float = 1.0):
+    """
+    Comprueba si MongoDB responde, con un ``ping`` acotado por ``timeout``, y si
+    los índices requeridos ya están creados.
+    
+    Args:
+        timeout (float): Segundos máximos de espera de la respuesta.
+        
+    Returns:
+        dict: ``{"ready": bool, "mongo": estado}``, con ``"indexes"`` ("ok" o
+            "pending") si MongoDB responde; con el repositorio en memoria el
+            estado es "disabled" y el worker siempre está disponible.
+    """
+    if readiness_database is None:
+        return {"ready": True, "mongo": "disabled"}
+    try:
+        await asyncio.wait_for(readiness_database.command("ping"), timeout)
+    except Exception as e:
+        # El detalle (hosts, topología) va al log: la sonda no requiere autenticación
+        logger.warning("MongoDB readiness check failed: %s", str(e) or type(e).__name__)
+        return {"ready": False, "mongo": "unreachable"}
+    if not indexes_ready:
+        return {"ready": False, "mongo": "ok", "indexes": "pending"}
+    return {"ready": True, "mongo": "ok", "indexes": "ok"}
+
+async def ensure_indexes():
+    """
+    Crea de forma idempotente los índices requeridos por la aplicación y marca
+    el worker como disponible en cuanto a índices.
+    
+    Returns:
+        dict: Nombres de los índices asegurados por colección.
+        
+    Raises:
+        Exception: Si MongoDB no puede crear algún índice.
+    """
+    global indexes_ready
+    created = await run_in_threadpool(index_manager.ensure_indexes)
+    indexes_ready = True
+    return created
+
+async def get_index_report():
+    """
+    Obtiene el reporte de índices faltantes, no declarados y sin uso.
+    
+    Returns:
+        dict: Reporte de índices por colección.
+    """
+    return await run_in_threadpool(index_manager.report_indexes)
+
+
+def get_cache_stats():
+    """
+    Obtiene los contadores de la caché de lectura de cuentas.
+    
+    Returns:
+        dict: Aciertos, fallos, expulsiones y ocupación de la caché.
+    """
+    return account_service.account_cache.stats()
+
+def get_idempotency_stats():
+    """
+    Obtiene los contadores del almacén de claves de idempotencia.
+    
+    Returns:
+        dict: Backend duradero, peticiones en curso y contadores de la caché de respuestas.
+    """
+    return idempotency.store.stats()
+
+def get_admission_stats():
+    """
+    Obtiene la ocupación de los límites de admisión.
+    
+    Returns:
+        dict: Límite, peticiones admitidas y en espera por presupuesto y por ruta.
+    """
+    return admission.stats()
+
+def get_change_feed_stats():
+    """
+    Obtiene los contadores del feed de cambios.
+    
+    Returns:
+        dict: Origen de los eventos, suscriptores, eventos publicados y retenidos
+            y suscriptores dados de baja.
+    """
+    return {"source": change_feed.source, **change_feed.bus.stats()}
+
+def get_pool_stats():
+    """
+    Obtiene las estadísticas de los pools de conexiones a MongoDB.
+    
+    Returns:
+        dict: Conexiones abiertas y en uso, checkouts, fallos y tiempos de espera
+            por tipo de cliente y servidor.
+    """
+    return mongo.get_pool_stats()
+
+def get_read_stats():
+    """
+    Obtiene la preferencia de lectura por operación y dónde se atendieron las lecturas.
+    
+    Returns:
+        dict: Modo por operación, ``max_staleness_seconds`` y comandos de lectura
+            por operación y tipo de servidor.
+    """
+    return mongo.get_read_stats()
+
+def get_slow_operations():
+    """
+    Obtiene la configuración del log de operaciones lentas y sus últimos registros.
+    
+    Returns:
+        dict: Umbral, muestreo de explain y comandos lentos recientes.
+    """
+    return slow_log.slow_commands.stats()
@@ -0,0 +1,113 @@
+import asyncio
+
+
+class BalanceCoalescer:
+    """
+    Agrupa incrementos de saldo concurrentes sobre una misma cuenta.
+
+    El primer incremento que llega para una cuenta abre una ventana de
+    ``window`` segundos; los incrementos que llegan durante la ventana se
+    aplican juntos con una sola escritura, que los registra como movimientos
+    consecutivos en orden de llegada. Cada petición recibe el saldo de su propio
+    movimiento.
+
+    Semántica de durabilidad: ninguna petición recibe respuesta hasta que la
+    escritura combinada es confirmada por MongoDB con el write concern del
+    cliente, así que un incremento confirmado nunca se pierde. Las peticiones
+    de un mismo grupo se aplican juntas o no se aplica ninguna; si el proceso
+    termina antes de escribir, ninguna de ellas fue confirmada. La agrupación es
+    por proceso: distintos workers no combinan sus incrementos entre sí. Una
+    petición cancelada antes de la escritura se retira del grupo; si se cancela
+    durante la escritura, su incremento queda aplicado y registrado.
+
+    Attributes:
+        window (float): Segundos que se esperan para agrupar incrementos.
+        max_batch (int): Número de incrementos que fuerza la escritura antes de
+            que termine la ventana.
+    """
+
+    def __init__(self, window: float = 0.002, max_batch: int = 1000):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}
+        self._tasks = set()
+        self.batches = 0
+        self.coalesced = 0
+
+    async def submit(self, account_id: str, amount: float, apply):
+        """
+        Encola un incremento y espera el saldo posterior correspondiente.
+
+        Args:
+            account_id (str): ID de la cuenta.
+            amount (float): Importe a sumar.
+            apply (Callable): Corrutina ``apply(account_id, amounts)`` que aplica
+                los incrementos en orden y retorna ``{"id", "balances"}`` (saldo
+                posterior a cada uno) o ``None``.
+
+        Returns:
+            dict: Diccionario con id y el saldo posterior a este incremento.
+            None: Si la cuenta no existe.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(account_id)
+        if batch is None:
+            batch = self._pending[account_id] = []
+            loop.call_later(self.window, self._flush, account_id, batch, apply)
+        batch.append((amount, future))
+        if len(batch) >= self.max_batch:
+            self._flush(account_id, batch, apply)
+        return await future
+
+    def _flush(self, account_id: str, batch: list, apply):
+        """
+        Cierra el grupo de ``account_id`` y programa su escritura.
+        """
+        if self._pending.get(account_id) is not batch:
+            return
+        del self._pending[account_id]
+        task = asyncio.ensure_future(self._apply(account_id, batch, apply))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _apply(self, account_id: str, batch: list, apply):
+        """
+        Aplica los incrementos del grupo y entrega a cada petición su saldo posterior.
+        """
+        # Las peticiones canceladas durante la ventana no se aplican
+        batch = [(amount, future) for amount, future in batch if not future.done()]
+        if not batch:
+            return
+        self.batches += 1
+        self.coalesced += len(batch)
+        try:
+            result = await apply(account_id, [amount for amount, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        balances = result["balances"] if result is not None else [None] * len(batch)
+        for (_, future), balance in zip(batch, balances):
+            if future.done():
+                # La petición se canceló durante la escritura: su movimiento ya está registrado
+                continue
+            if result is None:
+                future.set_result(None)
+            else:
+                future.set_result({"id": result["id"], "balance": balance})
+
+    def stats(self) -> dict:
+        """
+        Retorna los contadores de agrupación.
+
+        Returns:
+            dict: Ventana, escrituras realizadas e incrementos agrupados.
+        """
+        return {
+            "window_ms": self.window * 1000,
+            "batches": self.batches,
+            "increments": self.coalesced,
+        }
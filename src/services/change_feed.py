@@ -0,0 +1,331 @@
+from repositories import change_events, ledger
+from collections import deque
+import asyncio
+import itertools
+import logging
+import metrics
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("local", "change_stream", "off")
+
+
+class ResumeTokenExpired(Exception):
+    """El token de reanudación no está en el historial retenido por el feed."""
+
+
+class SubscriberDropped(Exception):
+    """El suscriptor no consumió a tiempo y se desconectó del feed."""
+
+
+class Subscription:
+    """
+    Suscripción al feed de cambios con un buffer acotado.
+
+    El bus entrega cada evento sin esperar al suscriptor. Si el buffer está lleno,
+    el suscriptor se da de baja: recibe los eventos que ya tenía en el buffer y
+    después ``SubscriberDropped``, y puede reconectarse con el token del último
+    evento recibido.
+
+    Attributes:
+        account_ids (frozenset, opcional): IDs de cuenta a recibir; None para todas.
+        currencies (frozenset, opcional): Monedas a recibir; None para todas.
+        max_buffer (int): Eventos pendientes a partir de los que se da de baja.
+        dropped (bool): Si el suscriptor fue dado de baja por lento.
+    """
+
+    def __init__(self, bus, account_ids=None, currencies=None, max_buffer: int = 1000):
+        self.account_ids = frozenset(account_ids) if account_ids else None
+        self.currencies = frozenset(currencies) if currencies else None
+        self.max_buffer = max_buffer
+        self.dropped = False
+        self._bus = bus
+        self._items = deque()
+        self._ready = asyncio.Event()
+
+    def matches(self, event: dict) -> bool:
+        """
+        Indica si un evento pasa los filtros de la suscripción.
+        """
+        if self.account_ids is not None and event["account_id"] not in self.account_ids:
+            return False
+        if self.currencies is not None and event["currency"] not in self.currencies:
+            return False
+        return True
+
+    def _push(self, token: str, event: dict):
+        if len(self._items) >= self.max_buffer:
+            self.dropped = True
+            self._bus._drop(self)
+        else:
+            self._items.append((token, event))
+        self._ready.set()
+
+    async def get(self) -> tuple[str, dict]:
+        """
+        Espera el siguiente evento.
+
+        Returns:
+            tuple: Token de reanudación y evento.
+
+        Raises:
+            SubscriberDropped: Si el suscriptor fue dado de baja y ya no quedan
+                eventos en su buffer.
+        """
+        while not self._items:
+            if self.dropped:
+                raise SubscriberDropped("Subscriber was too slow and was dropped from the change feed.")
+            self._ready.clear()
+            await self._ready.wait()
+        return self._items.popleft()
+
+    def close(self):
+        """
+        Da de baja la suscripción.
+        """
+        self._bus._remove(self)
+
+
+class ChangeBus:
+    """
+    Reparto en proceso de los eventos de cambio de cuentas a los suscriptores.
+
+    Publicar un evento no espera a ningún suscriptor: se añade al buffer acotado
+    de cada suscripción que lo acepta, y las que no consumen a tiempo se dan de
+    baja en lugar de frenar la publicación o acumular memoria. Los últimos
+    ``history`` eventos se retienen para que un suscriptor pueda reanudar desde
+    el token del último evento que recibió.
+
+    Los repositorios síncronos publican desde los hilos del threadpool; esas
+    publicaciones se trasladan al event loop del bus.
+
+    Attributes:
+        history (int): Eventos retenidos para reanudar.
+        buffer (int): Tamaño del buffer de cada suscripción.
+    """
+
+    def __init__(self, history: int = 10000, buffer: int = 1000):
+        self.history = history
+        self.buffer = buffer
+        self.published = 0
+        self.dropped = 0
+        self._events = deque()
+        self._positions = {}
+        self._position = 0
+        self._subscribers = set()
+        # Los tokens en proceso llevan un prefijo por instancia, de modo que un
+        # token de otro proceso o de antes de un reinicio no coincide con otro evento
+        self._prefix = uuid.uuid4().hex[:12]
+        self._loop = None
+
+    def bind(self, loop):
+        """
+        Fija el event loop en el que se reparten los eventos.
+
+        Args:
+            loop (AbstractEventLoop): Event loop de la aplicación.
+        """
+        self._loop = loop
+
+    def publish(self, events: list[dict], tokens: list[str] | None = None):
+        """
+        Publica eventos; puede llamarse desde el event loop o desde otro hilo.
+
+        Args:
+            events (list[dict]): Eventos construidos con ``change_events``.
+            tokens (list[str], opcional): Token de reanudación de cada evento
+                (p. ej. del change stream); por defecto se generan en proceso.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._loop is None or loop is self._loop:
+            self._dispatch(events, tokens)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, events, tokens)
+
+    def _dispatch(self, events: list[dict], tokens: list[str] | None):
+        for i, event in enumerate(events):
+            self._position += 1
+            token = tokens[i] if tokens is not None else f"{self._prefix}-{self._position}"
+            self._events.append((self._position, token, event))
+            self._positions[token] = self._position
+            if len(self._events) > self.history:
+                _, expired, _ = self._events.popleft()
+                del self._positions[expired]
+            for subscription in list(self._subscribers):
+                if subscription.matches(event):
+                    subscription._push(token, event)
+            metrics.CHANGE_FEED_EVENTS.inc(event["type"])
+        self.published += len(events)
+
+    def subscribe(self, account_ids=None, currencies=None, resume_after: str | None = None) -> Subscription:
+        """
+        Crea una suscripción, opcionalmente reanudando tras un token.
+
+        Los eventos retenidos posteriores al token se entregan antes que los
+        nuevos, sin contar para el límite del buffer.
+
+        Args:
+            account_ids (Iterable[str], opcional): IDs de cuenta a recibir.
+            currencies (Iterable[str], opcional): Monedas a recibir.
+            resume_after (str, opcional): Token del último evento recibido.
+
+        Returns:
+            Subscription: Suscripción activa; debe cerrarse con ``close``.
+
+        Raises:
+            ResumeTokenExpired: Si el token no está en el historial retenido.
+        """
+        subscription = Subscription(self, account_ids, currencies, self.buffer)
+        if resume_after is not None:
+            position = self._positions.get(resume_after)
+            if position is None:
+                raise ResumeTokenExpired("Resume token is unknown or no longer retained; resubscribe without it.")
+            start = position - self._events[0][0] + 1
+            for _, token, event in itertools.islice(self._events, start, None):
+                if subscription.matches(event):
+                    subscription._items.append((token, event))
+            subscription.max_buffer += len(subscription._items)
+        self._subscribers.add(subscription)
+        metrics.CHANGE_FEED_SUBSCRIBERS.inc()
+        return subscription
+
+    def _remove(self, subscription: Subscription):
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            metrics.CHANGE_FEED_SUBSCRIBERS.dec()
+
+    def _drop(self, subscription: Subscription):
+        self._remove(subscription)
+        self.dropped += 1
+        metrics.CHANGE_FEED_DROPPED.inc()
+
+    def stats(self) -> dict:
+        """
+        Retorna los contadores del bus.
+
+        Returns:
+            dict: Suscriptores, eventos publicados y retenidos y suscriptores dados de baja.
+        """
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "retained": len(self._events),
+            "dropped": self.dropped,
+        }
+
+
+async def watch_change_streams(database, bus: ChangeBus, retry_delay: float = 1.0):
+    """
+    Publica en el bus las altas de cuentas y los movimientos del libro leídos de
+    un change stream de MongoDB.
+
+    A diferencia de la publicación en proceso, recibe las escrituras de todos los
+    procesos. Requiere un replica set. El token de cada evento es el token de
+    reanudación del change stream, con el que se reabre tras un error.
+
+    Args:
+        database (AsyncDatabase): Base de datos del cliente asíncrono.
+        bus (ChangeBus): Bus en el que se publican los eventos.
+        retry_delay (float): Segundos de espera antes de reabrir tras un error.
+    """
+    pipeline = [{"$match": {
+        "operationType": "insert",
+        "ns.coll": {"$in": ["accounts", ledger.LEDGER_COLLECTION]},
+    }}]
+    database = database.with_options(codec_options=ledger.CODEC_OPTIONS)
+    resume_token = None
+    while True:
+        try:
+            async with await database.watch(pipeline, resume_after=resume_token) as stream:
+                async for change in stream:
+                    document = change["fullDocument"]
+                    if change["ns"]["coll"] == "accounts":
+                        event = change_events.account_created(document["_id"], document)
+                    else:
+                        event = change_events.balance_changed(document)
+                    resume_token = change["_id"]
+                    bus.publish([event], [resume_token["_data"]])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("MongoDB change stream error: %s", e)
+            await asyncio.sleep(retry_delay)
+
+
+# Bus activo y origen de sus eventos; se configuran al arranque con configure y start
+bus = ChangeBus()
+source = "local"
+_watcher = None
+
+def configure(source_name: str = "local", history: int = 10000, buffer: int = 1000):
+    """
+    Configura el feed de cambios.
+
+    Args:
+        source_name (str): Origen de los eventos: "local" (publicados por los
+            repositorios de este proceso), "change_stream" (change streams de
+            MongoDB, ven las escrituras de todos los procesos) u "off".
+        history (int): Eventos retenidos para reanudar.
+        buffer (int): Tamaño del buffer de cada suscripción.
+
+    Raises:
+        ValueError: Si el origen no existe.
+    """
+    global bus, source
+    if source_name not in SOURCES:
+        raise ValueError(f"Unknown change feed source: {source_name}")
+    source = source_name
+    bus = ChangeBus(history, buffer)
+
+async def start(database=None):
+    """
+    Empieza a publicar eventos en el bus según el origen configurado.
+
+    Args:
+        database (AsyncDatabase, opcional): Base de datos del cliente asíncrono;
+            necesaria con el origen "change_stream".
+    """
+    global _watcher
+    bus.bind(asyncio.get_running_loop())
+    if source == "local":
+        change_events.set_sink(bus.publish)
+    elif source == "change_stream" and database is not None:
+        _watcher = asyncio.create_task(watch_change_streams(database, bus))
+
+async def stop():
+    """
+    Deja de publicar eventos en el bus.
+    """
+    global _watcher
+    change_events.set_sink(None)
+    if _watcher is not None:
+        _watcher.cancel()
+        try:
+            await _watcher
+        except asyncio.CancelledError:
+            pass
+        _watcher = None
+
+def subscribe(account_ids=None, currencies=None, resume_after: str | None = None) -> Subscription:
+    """
+    Suscribe al feed de cambios activo.
+
+    Args:
+        account_ids (Iterable[str], opcional): IDs de cuenta a recibir.
+        currencies (Iterable[str], opcional): Monedas a recibir.
+        resume_after (str, opcional): Token del último evento recibido.
+
+    Returns:
+        Subscription: Suscripción activa; debe cerrarse con ``close``.
+
+    Raises:
+        ValueError: Si el feed está desactivado.
+        ResumeTokenExpired: Si el token no está en el historial retenido.
+    """
+    if source == "off":
+        raise ValueError("Change feed is disabled.")
+    return bus.subscribe(account_ids, currencies, resume_after)
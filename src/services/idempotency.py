@@ -0,0 +1,201 @@
+from repositories import idempotency_repository
+from services.account_cache import LRUCache
+import asyncio
+import metrics
+import uuid
+
+
+class IdempotencyKeyReused(Exception):
+    """La clave ya se usó con un cuerpo de petición distinto."""
+
+
+class IdempotencyInProgress(Exception):
+    """Otra petición con la misma clave sigue en curso en otro proceso."""
+
+
+class IdempotencyStore:
+    """
+    Almacén de respuestas por clave de idempotencia.
+
+    Delante del almacén duradero (la colección de MongoDB con índice TTL de
+    ``idempotency_repository``) hay una caché LRU en proceso con las respuestas
+    completadas, de modo que una repetición reciente se responde sin ninguna
+    operación de base de datos. Para una clave nueva el coste es una consulta a la
+    caché en proceso y un ``insert_one`` que la reserva.
+
+    Las peticiones duplicadas concurrentes del mismo proceso esperan a que la
+    primera termine y reciben su respuesta; las de otros procesos ven la reserva
+    pendiente en MongoDB y consultan hasta que se completa o se agota
+    ``wait_timeout``. Sin repositorio configurado (backend en memoria) el almacén
+    es solo de proceso.
+
+    Attributes:
+        ttl (float): Segundos durante los que se conserva cada respuesta.
+        lock_timeout (float): Segundos tras los que una reserva sin completar se
+            considera abandonada por un proceso que terminó.
+        wait_timeout (float): Segundos que un duplicado espera a otro proceso.
+        poll_interval (float): Segundos entre consultas al esperar a otro proceso.
+        repository (module, opcional): Repositorio duradero de claves.
+    """
+
+    def __init__(self, ttl: float = 86400.0, max_entries: int = 10000, lock_timeout: float = 30.0,
+                 wait_timeout: float = 10.0, poll_interval: float = 0.05, repository=None):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.repository = repository
+        self._completed = LRUCache(max_entries, ttl)
+        self._inflight = {}
+
+    @staticmethod
+    def _check(record: dict, fingerprint: str) -> dict:
+        if record["fingerprint"] != fingerprint:
+            metrics.IDEMPOTENCY_REQUESTS.inc("reused")
+            raise IdempotencyKeyReused("Idempotency key was already used with a different request body.")
+        metrics.IDEMPOTENCY_REQUESTS.inc("replayed")
+        return record
+
+    async def begin(self, key: str, fingerprint: str):
+        """
+        Reserva una clave o retorna la respuesta guardada para ella.
+
+        Si retorna una ficha, el llamador debe ejecutar la petición y terminar
+        siempre con ``complete`` o ``release``.
+
+        Args:
+            key (str): Clave de idempotencia con su ámbito (método y ruta).
+            fingerprint (str): Huella del cuerpo de la petición.
+
+        Returns:
+            tuple: ``(ficha, None)`` si la clave quedó reservada, o
+                ``(None, registro)`` con ``status_code`` y ``body`` guardados.
+
+        Raises:
+            IdempotencyKeyReused: Si la clave se usó con otro cuerpo.
+            IdempotencyInProgress: Si otro proceso no terminó a tiempo.
+        """
+        while True:
+            record = self._completed.get(key)
+            if record is not None:
+                return None, self._check(record, fingerprint)
+
+            pending = self._inflight.get(key)
+            if pending is not None:
+                # Duplicado del mismo proceso: se espera a la primera petición
+                await asyncio.shield(pending)
+                continue
+
+            owner = uuid.uuid4().hex
+            future = self._inflight[key] = asyncio.get_running_loop().create_future()
+            if self.repository is None:
+                metrics.IDEMPOTENCY_REQUESTS.inc("new")
+                return owner, None
+            try:
+                existing = await self.repository.claim(key, owner, fingerprint, self.ttl, self.lock_timeout)
+            except BaseException:
+                self._finish(key, future)
+                raise
+            if existing is None:
+                metrics.IDEMPOTENCY_REQUESTS.inc("new")
+                return owner, None
+
+            self._finish(key, future)
+            if existing["status"] == "completed":
+                self._completed.set(key, existing)
+                return None, self._check(existing, fingerprint)
+            return None, self._check(await self._wait(key), fingerprint)
+
+    async def _wait(self, key: str) -> dict:
+        """
+        Espera a que otro proceso complete la reserva de ``key``.
+        """
+        deadline = asyncio.get_running_loop().time() + self.wait_timeout
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            record = await self.repository.find(key)
+            if record is not None and record["status"] == "completed":
+                self._completed.set(key, record)
+                return record
+        metrics.IDEMPOTENCY_REQUESTS.inc("in_progress")
+        raise IdempotencyInProgress("A request with this idempotency key is still in progress.")
+
+    def _finish(self, key: str, future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.done():
+            future.set_result(None)
+
+    async def complete(self, key: str, owner: str, fingerprint: str, status_code: int, body):
+        """
+        Guarda la respuesta de la petición que reservó ``key`` y despierta a los duplicados.
+
+        Args:
+            key (str): Clave de idempotencia con su ámbito.
+            owner (str): Ficha retornada por ``begin``.
+            fingerprint (str): Huella del cuerpo de la petición.
+            status_code (int): Código de estado de la respuesta.
+            body (Any): Contenido JSON de la respuesta.
+        """
+        self._completed.set(key, {"fingerprint": fingerprint, "status_code": status_code, "body": body})
+        try:
+            if self.repository is not None:
+                await self.repository.complete(key, owner, status_code, body)
+        finally:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._finish(key, future)
+
+    async def release(self, key: str, owner: str):
+        """
+        Libera la reserva de una petición que falló para que pueda reintentarse.
+
+        Args:
+            key (str): Clave de idempotencia con su ámbito.
+            owner (str): Ficha retornada por ``begin``.
+        """
+        try:
+            if self.repository is not None:
+                await self.repository.release(key, owner)
+        finally:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._finish(key, future)
+
+    def stats(self) -> dict:
+        """
+        Retorna los contadores del almacén.
+
+        Returns:
+            dict: Backend duradero, peticiones en curso y contadores de la caché en proceso.
+        """
+        return {
+            "durable": self.repository is not None,
+            "in_flight": len(self._inflight),
+            "front_cache": self._completed.stats(),
+        }
+
+
+# Almacén activo; se configura al arranque con configure y configure_repository
+store = IdempotencyStore()
+
+def configure(ttl: float = 86400.0, max_entries: int = 10000):
+    """
+    Configura el almacén de claves de idempotencia.
+
+    Args:
+        ttl (float): Segundos durante los que se conserva cada respuesta.
+        max_entries (int): Tamaño de la caché de respuestas en proceso.
+    """
+    global store
+    store = IdempotencyStore(ttl, max_entries, repository=store.repository)
+
+def configure_repository(database):
+    """
+    Activa el almacén duradero en MongoDB.
+
+    Args:
+        database (AsyncDatabase): Base de datos del cliente asíncrono.
+    """
+    idempotency_repository.configure(database)
+    store.repository = idempotency_repository
@@ -0,0 +1,251 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import monitoring
+from repositories import read_routing
+import logging
+import logs
+import metrics
+import random
+import threading
+import time
+
+# Log de operaciones lentas de MongoDB: cada comando que tarda al menos
+# ``threshold_ms`` se registra con la ruta que lo lanzó, el comando, la colección,
+# la forma del filtro (claves y operadores, con los valores redactados) y la
+# duración. Una fracción ``explain_sample_rate`` de los comandos lentos se vuelve
+# a ejecutar con ``explain`` (executionStats) en un hilo aparte para añadir los
+# documentos y claves examinados y el plan elegido.
+
+logger = logging.getLogger(__name__)
+
+# Comandos que admiten explain; el resto se registran sin documentos examinados
+EXPLAINABLE = frozenset({"find", "aggregate", "count", "distinct", "findAndModify"})
+
+# Campos de sesión, transacción y enrutado que no forman parte del comando explicado
+_SESSION_FIELDS = frozenset({
+    "lsid", "txnNumber", "startTransaction", "autocommit", "readConcern", "writeConcern",
+})
+
+# Valor que sustituye a los literales de un filtro
+REDACTED = "?"
+
+def redact(value):
+    """
+    Retorna la forma de un filtro o pipeline con los valores redactados.
+
+    Se conservan las claves y los operadores; cada literal se sustituye por
+    ``"?"`` y las listas se reducen a sus formas distintas (``{"$in": ["?"]}``).
+
+    Args:
+        value (Any): Filtro, pipeline o documento de actualización.
+
+    Returns:
+        Any: Forma del valor, sin datos de los documentos.
+    """
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = redact(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return REDACTED
+
+def filter_shape(command_name: str, command: dict):
+    """
+    Extrae la forma redactada del filtro de un comando.
+
+    Args:
+        command_name (str): Nombre del comando.
+        command (dict): Documento del comando.
+
+    Returns:
+        Any: Forma del filtro (o del pipeline en ``aggregate``), o ``None`` si el
+            comando no tiene filtro.
+    """
+    if command_name == "find":
+        return redact(command.get("filter", {}))
+    if command_name == "aggregate":
+        return redact(command.get("pipeline", []))
+    if command_name in ("count", "distinct", "findAndModify"):
+        return redact(command.get("query", {}))
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or []
+        return redact([statement.get("q", {}) for statement in statements])
+    return None
+
+def _execution_stats(explain: dict) -> dict | None:
+    """
+    Busca ``executionStats`` en una respuesta de explain, que en ``aggregate``
+    aparece dentro de la primera etapa.
+    """
+    if "executionStats" in explain:
+        return explain["executionStats"]
+    for stage in explain.get("stages", ()):
+        stats = _execution_stats(stage.get("$cursor", {}))
+        if stats is not None:
+            return stats
+    return None
+
+def _plan_stages(plan: dict) -> str:
+    """
+    Resume un plan de ejecución como sus etapas de fuera a dentro (``FETCH>IXSCAN``).
+    """
+    stages = []
+    while plan:
+        stages.append(plan.get("stage", "?"))
+        inputs = plan.get("inputStages")
+        plan = plan.get("inputStage") or (inputs[0] if inputs else None)
+    return ">".join(stages)
+
+class SlowCommandLog(monitoring.CommandListener):
+    """
+    Listener de comandos de pymongo que registra los comandos lentos.
+
+    Guarda cada comando al empezar (solo si el log está activo) para poder
+    describirlo al terminar, y retiene los últimos ``history`` registros para
+    ``GET /admin/slow-operations``.
+
+    Attributes:
+        threshold_ms (float): Duración mínima de un comando lento; 0 desactiva el log.
+        explain_sample_rate (float): Fracción de comandos lentos explicados (0-1).
+    """
+
+    def __init__(self, threshold_ms: float = 0, explain_sample_rate: float = 0, history: int = 100):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.recent = deque(maxlen=history)
+        self._commands = {}
+        self._lock = threading.Lock()
+        self._client = None
+        self._explaining = threading.Semaphore(1)
+        self._executor = None
+
+    def configure(self, threshold_ms: float, explain_sample_rate: float = 0, history: int = 100):
+        """
+        Configura el umbral, el muestreo de explain y los registros retenidos.
+
+        Args:
+            threshold_ms (float): Duración mínima de un comando lento; 0 desactiva el log.
+            explain_sample_rate (float): Fracción de comandos lentos explicados (0-1).
+            history (int): Número de registros retenidos para ``stats``.
+
+        Raises:
+            ValueError: Si el umbral es negativo o la fracción no está entre 0 y 1.
+        """
+        if threshold_ms < 0:
+            raise ValueError("Slow operation threshold must be >= 0.")
+        if not 0 <= explain_sample_rate <= 1:
+            raise ValueError("Explain sample rate must be between 0 and 1.")
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.recent = deque(self.recent, maxlen=history)
+
+    def configure_explain(self, client):
+        """
+        Inyecta el cliente síncrono con el que se ejecutan los explain muestreados.
+
+        Args:
+            client (MongoClient | None): Cliente síncrono; ``None`` desactiva el explain.
+        """
+        self._client = client
+        if client is not None and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-log-explain")
+
+    def started(self, event):
+        if not self.threshold_ms:
+            return
+        # Solo se guardan referencias: la ruta y la forma del filtro se calculan
+        # al terminar y únicamente si el comando fue lento
+        context = (read_routing.current_operation.get(), logs.current_request.get())
+        with self._lock:
+            self._commands[(event.connection_id, event.request_id)] = (event.command, event.database_name, context)
+
+    def succeeded(self, event):
+        self._finished(event, "success")
+
+    def failed(self, event):
+        self._finished(event, "failure")
+
+    def _finished(self, event, outcome: str):
+        if not self._commands:
+            return
+        with self._lock:
+            started = self._commands.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or not self.threshold_ms or duration_ms < self.threshold_ms:
+            return
+        command, database_name, (operation, request) = started
+        name = event.command_name
+        collection = command.get(name)
+        entry = {
+            "command": name,
+            "collection": collection if isinstance(collection, str) else None,
+            "filter": filter_shape(name, command),
+            "duration_ms": round(duration_ms, 3),
+            "outcome": outcome,
+            **logs.request_fields(request),
+        }
+        if operation is not None:
+            entry["read_operation"] = operation
+        if isinstance(getattr(event, "reply", None), dict) and "n" in event.reply:
+            entry["n"] = event.reply["n"]
+        metrics.MONGO_SLOW_COMMANDS.inc(name)
+        if self._should_explain(name, command) and self._explaining.acquire(blocking=False):
+            # El explain vuelve a ejecutar la consulta: se hace fuera del hilo del
+            # comando y de uno en uno; los que llegan mientras tanto no se explican
+            self._executor.submit(self._explain, entry, database_name, command)
+            return
+        self._record(entry)
+
+    def _should_explain(self, name: str, command: dict) -> bool:
+        if self._client is None or name not in EXPLAINABLE or not self.explain_sample_rate:
+            return False
+        if name == "aggregate" and any("$out" in stage or "$merge" in stage for stage in command.get("pipeline", ())):
+            return False
+        return random.random() < self.explain_sample_rate
+
+    def _explain(self, entry: dict, database_name: str, command: dict):
+        try:
+            explained = {
+                key: value for key, value in command.items()
+                if not key.startswith("$") and key not in _SESSION_FIELDS
+            }
+            started = time.perf_counter()
+            explain = self._client[database_name].command({"explain": explained, "verbosity": "executionStats"})
+            entry["explain_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            stats = _execution_stats(explain) or {}
+            entry["docs_examined"] = stats.get("totalDocsExamined")
+            entry["keys_examined"] = stats.get("totalKeysExamined")
+            entry["docs_returned"] = stats.get("nReturned")
+            planner = explain.get("queryPlanner") or explain.get("stages", [{}])[0].get("$cursor", {}).get("queryPlanner", {})
+            entry["plan"] = _plan_stages(planner.get("winningPlan", {}).get("queryPlan") or planner.get("winningPlan", {}))
+        except Exception as e:
+            entry["explain_error"] = str(e)
+        finally:
+            self._explaining.release()
+        self._record(entry)
+
+    def _record(self, entry: dict):
+        self.recent.append(entry)
+        logger.warning("Slow MongoDB operation", extra={"slow_operation": entry})
+
+    def stats(self) -> dict:
+        """
+        Retorna la configuración y los últimos comandos lentos registrados.
+
+        Returns:
+            dict: ``threshold_ms``, ``explain_sample_rate``, si el explain está
+                disponible y los registros más recientes primero.
+        """
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "explain_available": self._client is not None,
+            "recent": list(reversed(self.recent)),
+        }
+
+# Compartido por ambos clientes; se configura al arranque desde el entorno
+slow_commands = SlowCommandLog()
@@ -0,0 +1,16 @@
+"""
+Configuración compartida de pytest para las pruebas de la API.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    """
+    Fixture que fija asyncio como event loop de las pruebas asíncronas.
+    
+    Returns:
+        str: Nombre del backend de anyio.
+    """
+    return "asyncio"
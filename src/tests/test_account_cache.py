@@ -0,0 +1,195 @@
+"""
+Módulo de pruebas para la caché de lectura de cuentas.
+
+Valida la expulsión LRU y la expiración por TTL de la caché en proceso, y que
+el servicio de cuentas sirva las lecturas desde la caché sin entregar nunca un
+saldo anterior a una escritura hecha en el mismo proceso.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from services import account_service
+from services.account_cache import AccountCache, CacheBackend, LRUCache
+from models.account_model import UpdateAccountBalance
+
+
+@pytest.fixture
+def account():
+    """
+    Fixture que proporciona los datos de una cuenta tal como los retorna el repositorio.
+    
+    Returns:
+        dict: Datos de la cuenta con su ID.
+    """
+    return {
+        "id": "64b000000000000000000001",
+        "account_number": "123456789",
+        "holder_name": "John Doe",
+        "account_type": "saving",
+        "balance": 1000.0,
+        "currency": "USD"
+    }
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    """
+    Fixture que reinicia la caché del servicio antes de cada prueba.
+    """
+    account_service.configure_cache(max_entries=100, ttl=60)
+    yield
+    account_service.configure_cache()
+
+def test_lru_eviction_and_ttl():
+    """
+    Prueba que valida la expulsión por tamaño y la expiración por TTL.
+    
+    Escenario:
+    - Caché de dos entradas con TTL de 10 segundos y reloj controlado
+    
+    Verifica:
+    - Que se expulse la entrada menos usada al superar el tamaño
+    - Que una entrada expirada cuente como fallo
+    - Que los contadores reflejen aciertos, fallos, expulsiones y expiraciones
+    """
+    now = [0.0]
+    cache = LRUCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    now[0] = 11
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (1, 2, 1, 1)
+
+@pytest.mark.anyio
+async def test_get_account_served_from_cache(account):
+    """
+    Prueba que valida que las lecturas repetidas se sirven desde la caché.
+    
+    Escenario:
+    - Se consulta dos veces la misma cuenta por ID y una vez por número
+    
+    Args:
+        account: Datos de la cuenta retornados por el repositorio
+        
+    Verifica:
+    - Que el repositorio se consulte una sola vez
+    - Que la consulta por número se resuelva con la caché
+    """
+    with patch("services.account_service.account_repository.get_account_by_id") as mock_get_by_id, \
+        patch("services.account_service.account_repository.get_account_by_account_number") as mock_get_by_number:
+        mock_get_by_id.return_value = dict(account)
+
+        first = await account_service.get_account(account["id"])
+        second = await account_service.get_account(account["id"])
+        by_number = await account_service.get_account_by_number(account["account_number"])
+
+        assert first == second == by_number == account
+        mock_get_by_id.assert_called_once_with(account["id"])
+        mock_get_by_number.assert_not_called()
+
+@pytest.mark.anyio
+async def test_update_balance_invalidates_cache(account):
+    """
+    Prueba que valida que una actualización de saldo invalida la cuenta en caché.
+    
+    Escenario:
+    - La cuenta está en caché y se actualiza su saldo
+    
+    Args:
+        account: Datos de la cuenta retornados por el repositorio
+        
+    Verifica:
+    - Que la lectura posterior a la escritura vuelva al repositorio con el saldo nuevo
+    """
+    with patch("services.account_service.account_repository.get_account_by_id") as mock_get_by_id, \
+        patch("services.account_service.account_repository.update_balance") as mock_update_balance:
+        mock_get_by_id.return_value = dict(account)
+        await account_service.get_account(account["id"])
+
+        mock_update_balance.return_value = {"id": account["id"], "balance": 1500.0}
+        await account_service.update_account_balance(UpdateAccountBalance(id=account["id"], balance=500))
+        mock_get_by_id.return_value = dict(account, balance=1500.0)
+
+        result = await account_service.get_account(account["id"])
+
+        assert result["balance"] == 1500.0
+        assert mock_get_by_id.call_count == 2
+
+@pytest.mark.anyio
+async def test_read_in_flight_during_write_is_not_cached(account):
+    """
+    Prueba que valida que una lectura concurrente con una escritura no llena la caché.
+    
+    Escenario:
+    - Una lectura del repositorio está en curso con el saldo anterior
+    - Una actualización de saldo termina antes que la lectura
+    
+    Args:
+        account: Datos de la cuenta retornados por el repositorio
+        
+    Verifica:
+    - Que el saldo anterior no quede en caché tras la escritura
+    """
+    release = asyncio.Event()
+
+    async def slow_read(account_id):
+        await release.wait()
+        return dict(account)
+
+    try:
+        account_service.configure_repository("async")
+        with patch("services.account_service.account_repository.get_account_by_id", new=slow_read), \
+            patch("services.account_service.account_repository.update_balance", new_callable=AsyncMock) as mock_update_balance:
+            mock_update_balance.return_value = {"id": account["id"], "balance": 1500.0}
+
+            read = asyncio.create_task(account_service.get_account(account["id"]))
+            await asyncio.sleep(0)
+            await account_service.update_account_balance(UpdateAccountBalance(id=account["id"], balance=500))
+            release.set()
+            await read
+
+            assert account_service.account_cache.get_account(account["id"]) is None
+    finally:
+        account_service.configure_repository("sync")
+
+def test_disabled_cache():
+    """
+    Prueba que valida que la caché puede desactivarse.
+    
+    Verifica:
+    - Que sin backend no se guarde ni se sirva ninguna cuenta
+    """
+    cache = AccountCache(None)
+    cache.store({"id": "1", "account_number": "123456789"})
+
+    assert cache.get_account("1") is None
+    assert cache.stats() == {"backend": None}
+
+def test_incomplete_backend_cannot_be_created():
+    """
+    Prueba que valida que un backend que no implementa toda la interfaz falla al crearse.
+    
+    Verifica:
+    - Que instanciar un backend sin ``stats`` lance TypeError
+    """
+    class NoStats(CacheBackend):
+        def get(self, key):
+            return None
+
+        def set(self, key, value):
+            pass
+
+        def delete(self, key):
+            pass
+
+        def clear(self):
+            pass
+
+    with pytest.raises(TypeError):
+        NoStats()
@@ -0,0 +1,146 @@
+"""
+Módulo de pruebas del volcado e importación de cuentas.
+
+Valida las rutas /accounts/export y /accounts/import con el repositorio en
+memoria: el formato de los volcados NDJSON y CSV, la compresión gzip, la
+lectura incremental de la entrada y el informe de avance y rechazos.
+"""
+
+import csv
+import gzip
+import io
+
+import httpx
+import orjson
+import pytest
+from fastapi import FastAPI
+
+from repositories import memory_account_repository
+from routers import accounts
+from services import account_service
+
+
+def account_row(i: int, **overrides) -> dict:
+    """
+    Construye los datos de una cuenta válida para la importación.
+
+    Args:
+        i (int): Número de la cuenta.
+
+    Returns:
+        dict: Datos de ``CreateAccount`` con ``overrides`` aplicados.
+    """
+    return {
+        "account_number": f"{i:09d}",
+        "holder_name": f"Holder {i}",
+        "account_type": "saving",
+        "balance": 10.0 * i,
+        "currency": "USD",
+        **overrides,
+    }
+
+
+async def split(data: bytes, size: int):
+    """
+    Entrega ``data`` en bloques de ``size`` bytes, como llega un cuerpo por la red.
+    """
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+@pytest.fixture
+def client():
+    """
+    Fixture con un cliente HTTP de la API sobre el repositorio en memoria.
+
+    Returns:
+        AsyncClient: Cliente contra una app con el router de cuentas.
+    """
+    account_service.configure_repository("memory")
+    app = FastAPI()
+    app.include_router(accounts.router)
+    yield httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    memory_account_repository.configure()
+    account_service.configure_repository("sync")
+
+
+@pytest.mark.anyio
+async def test_export_import_round_trip(client):
+    """
+    Prueba que un volcado CSV comprimido se reimporta sin pérdidas.
+
+    Escenario:
+    - Se importan 5 cuentas en NDJSON, una con saltos de línea y comillas en el nombre
+    - Se vuelcan en CSV con gzip y en NDJSON con un filtro y campos
+    - Se vacía el repositorio y se importa el CSV comprimido en bloques pequeños
+
+    Verifica:
+    - Que el CSV tenga cabecera con las columnas de la proyección y una fila por cuenta
+    - Que el NDJSON respete filtros y campos
+    - Que la reimportación cree las mismas cuentas con los mismos datos
+    """
+    rows = [account_row(i) for i in range(4)] + [account_row(4, holder_name='Ana "Nana"\nGarcía, Jr.', currency="EUR")]
+    body = b"".join(orjson.dumps(row) + b"\n" for row in rows)
+    async with client:
+        imported = await client.post("/accounts/import", params={"chunk_size": 2}, content=body)
+        exported = await client.get("/accounts/export", params={"format": "csv", "gzip": True, "batch_size": 2})
+        filtered = await client.get("/accounts/export", params={"currency": "EUR", "fields": "account_number,holder_name"})
+
+        memory_account_repository.configure()
+        reimported = await client.post(
+            "/accounts/import", params={"format": "csv", "chunk_size": 3},
+            content=split(exported.content, 7), headers={"Content-Encoding": "gzip"}
+        )
+        listed = await client.get("/accounts", params={"sort": "account_number"})
+
+    progress = [orjson.loads(line) for line in imported.text.splitlines()]
+    assert [(step["processed"], step["created"], step["done"]) for step in progress] == [(2, 2, False), (4, 4, False), (5, 5, True)]
+
+    assert exported.headers["content-type"] == "application/gzip"
+    assert exported.headers["content-disposition"] == 'attachment; filename="accounts.csv.gz"'
+    table = list(csv.reader(io.StringIO(gzip.decompress(exported.content).decode())))
+    assert table[0] == ["id", "account_number", "holder_name", "account_type", "balance", "currency"]
+    assert len(table) == 6
+
+    assert filtered.headers["content-type"] == "application/x-ndjson"
+    (eur,) = [orjson.loads(line) for line in filtered.content.splitlines()]
+    assert eur.pop("id") and eur == {"account_number": "000000004", "holder_name": rows[4]["holder_name"]}
+
+    final = [orjson.loads(line) for line in reimported.text.splitlines()][-1]
+    assert final == {"processed": 5, "created": 5, "rejected": 0, "rejects": [], "done": True}
+    assert [{key: account[key] for key in rows[0]} for account in listed.json()["accounts"]] == rows
+
+
+@pytest.mark.anyio
+async def test_import_reports_rejects(client):
+    """
+    Prueba que la importación informa los rechazos con su posición en la entrada.
+
+    Escenario:
+    - Un CSV con una fila válida, una con moneda no admitida, un duplicado de la
+      primera en otro bloque y otra válida
+    - Un NDJSON con una línea que no es JSON
+    - Un cuerpo marcado como gzip que no lo es
+
+    Verifica:
+    - Que cada avance incluya solo los rechazos de su bloque, con índice y tipo de error
+    - Que las filas válidas se creen aunque haya rechazos
+    - Que una entrada corrupta se informe con una línea de error
+    """
+    header = "account_number,holder_name,account_type,balance,currency\n"
+    body = header + "000000001,Ana,saving,10,USD\n000000002,Bea,saving,5,GBP\n000000001,Ana,saving,10,USD\n000000003,Carla,checking,1,EUR\n"
+    async with client:
+        response = await client.post("/accounts/import", params={"format": "csv", "chunk_size": 2}, content=body)
+        ndjson = await client.post("/accounts/import", content=orjson.dumps(account_row(7)) + b"\n{not json\n")
+        corrupt = await client.post("/accounts/import", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+
+    # El último avance, sin elementos pendientes, solo marca el final
+    first, second, last = [orjson.loads(line) for line in response.text.splitlines()]
+    assert [(reject["index"], reject["error"]) for reject in first["rejects"]] == [(1, "validation")]
+    assert [(reject["index"], reject["error"]) for reject in second["rejects"]] == [(2, "duplicate")]
+    assert last["rejects"] == []
+    assert (last["processed"], last["created"], last["rejected"], last["done"]) == (4, 2, 2, True)
+
+    final = orjson.loads(ndjson.text.splitlines()[-1])
+    assert (final["created"], final["rejected"], final["rejects"][0]["index"]) == (1, 1, 1)
+    assert orjson.loads(corrupt.text.splitlines()[-1])["error"] == "invalid_input"
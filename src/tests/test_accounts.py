@@ -10,9 +10,17 @@ y verificar que la lógica de negocio funcione correctamente.
 """
 
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from services import account_service
-from models.account_model import CreateAccount, UpdateAccountBalance, Account, Accounts
+from repositories import account_repository, memory_account_repository
+from routers import accounts
+from fastapi import FastAPI
+import httpx
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from repositories import account_query, account_totals, index_manager
+from bson import ObjectId
+from models.account_model import CreateAccount, CreateAccountResponse, UpdateAccountBalance, Account, Accounts, AccountQuery, Transfer
 
 
 @pytest.fixture
@@ -73,7 +81,8 @@ def valid_get_accounts_data():
         ]
     )
 
-def test_create_account_success(valid_account_data):
+@pytest.mark.anyio
+async def test_create_account_success(valid_account_data):
     """
     Prueba que valida la creación exitosa de una cuenta bancaria.
     
@@ -86,55 +95,51 @@ def test_create_account_success(valid_account_data):
         
     Verifica:
     - Que se retorne el número de cuenta correctamente
-    - Que se realice la verificación de duplicados
-    - Que se ejecute la creación de la cuenta
+    - Que la creación sea una única inserción, sin consulta previa de duplicados
     """
     with patch("services.account_service.account_repository.get_account_by_account_number") as mock_get_by_number, \
         patch("services.account_service.account_repository.create_account") as mock_create_account:
         
-        mock_get_by_number.return_value = None
-        mock_create_account.return_value = "123456789"
+        mock_create_account.return_value = CreateAccountResponse(id="123456789")
         
-        result = account_service.create_account(valid_account_data)
+        result = await account_service.create_account(valid_account_data)
 
-        assert result == "123456789"
-        mock_get_by_number.assert_called_once_with("123456789")
+        assert result.id == "123456789"
+        mock_get_by_number.assert_not_called()
         mock_create_account.assert_called_once_with(valid_account_data)
 
-def test_create_account_duplicate(valid_account_data):
+@pytest.mark.anyio
+async def test_create_account_duplicate(valid_account_data):
     """
     Prueba que valida el manejo de error cuando se intenta crear una cuenta duplicada.
     
     Escenario:
     - Ya existe una cuenta con el número proporcionado
-    - El sistema debe lanzar una excepción
+    - El índice único rechaza la inserción con DuplicateKeyError
     
     Args:
         valid_account_data: Datos válidos para crear una cuenta bancaria
         
     Verifica:
     - Que se lance una excepción ValueError con el mensaje correcto
-    - Que se verifique la existencia de la cuenta
-    - Que NO se ejecute la creación
+    - Que se intente la inserción una sola vez
     """
-    with patch("services.account_service.account_repository.get_account_by_account_number") as mock_get_by_number, \
-        patch("services.account_service.account_repository.create_account") as mock_create_account:
+    with patch("services.account_service.account_repository.create_account") as mock_create_account:
 
-        mock_get_by_number.return_value = "123456789"
+        mock_create_account.side_effect = DuplicateKeyError("E11000 duplicate key error")
 
         with pytest.raises(ValueError) as exc_info:
-            account_service.create_account(valid_account_data)
+            await account_service.create_account(valid_account_data)
 
         assert str(exc_info.value) == "Account with this account number already exists."
-        mock_get_by_number.assert_called_once_with("123456789")
-        mock_create_account.assert_not_called()
+        mock_create_account.assert_called_once_with(valid_account_data)
 
-def test_create_account_db_error(valid_account_data):
+@pytest.mark.anyio
+async def test_create_account_db_error(valid_account_data):
     """
     Prueba que valida el manejo de errores de base de datos durante la creación de cuenta.
     
     Escenario:
-    - No existe una cuenta duplicada
     - La operación de creación en la base de datos falla
     
     Args:
@@ -142,85 +147,345 @@ def test_create_account_db_error(valid_account_data):
         
     Verifica:
     - Que se propague la excepción de base de datos
-    - Que se verifique la no existencia de duplicados
     - Que se intente la creación de la cuenta
     """
-    with patch("services.account_service.account_repository.get_account_by_account_number") as mock_get_by_number, \
-        patch("services.account_service.account_repository.create_account") as mock_create_account:
+    with patch("services.account_service.account_repository.create_account") as mock_create_account:
         
-        mock_get_by_number.return_value = None
         mock_create_account.side_effect = Exception("DB error")
 
         with pytest.raises(Exception) as exc_info:
-            account_service.create_account(valid_account_data)
+            await account_service.create_account(valid_account_data)
 
         assert str(exc_info.value) == "DB error"
-        mock_get_by_number.assert_called_once_with("123456789")
         mock_create_account.assert_called_once_with(valid_account_data)
 
-def test_update_account_balance_success(update_account_data):
+@pytest.mark.anyio
+async def test_create_accounts_bulk(valid_account_data):
+    """
+    Prueba que valida la creación masiva de cuentas por bloques.
+    
+    Escenario:
+    - La entrada contiene cuentas válidas, un elemento inválido y un duplicado
+    - El tamaño de bloque obliga a dos inserciones masivas
+    
+    Args:
+        valid_account_data: Datos válidos para crear una cuenta bancaria
+        
+    Verifica:
+    - Que los elementos inválidos se reporten sin llegar a la base de datos
+    - Que los duplicados se reporten con su índice original
+    - Que se hagan tantas inserciones como bloques
+    """
+    items = [
+        valid_account_data.model_dump(),
+        {"account_number": "1"},
+        valid_account_data.model_dump(),
+        valid_account_data.model_dump() | {"account_number": "555555555"},
+    ]
+
+    async def source():
+        for item in items:
+            yield item
+
+    with patch("services.account_service.account_repository.create_accounts") as mock_create_accounts:
+        mock_create_accounts.side_effect = [
+            [{"id": "a"}, {"error": "duplicate", "detail": "E11000"}],
+            [{"id": "b"}],
+        ]
+
+        result = await account_service.create_accounts_bulk(source(), chunk_size=2)
+
+        assert (result.created, result.failed) == (2, 2)
+        assert [(r.index, r.id, r.error) for r in result.results] == [
+            (0, "a", None),
+            (1, None, "validation"),
+            (2, None, "duplicate"),
+            (3, "b", None),
+        ]
+        assert mock_create_accounts.call_count == 2
+
+def test_create_accounts_unordered_insert(valid_account_data):
+    """
+    Prueba que valida que el repositorio inserta el lote sin orden y mapea los duplicados.
+    
+    Escenario:
+    - La inserción masiva falla para el segundo documento por clave duplicada
+    
+    Args:
+        valid_account_data: Datos válidos para crear una cuenta bancaria
+        
+    Verifica:
+    - Que se use insert_many no ordenado
+    - Que el duplicado se reporte en su posición y el resto con su ID
+    """
+    def insert_many(documents, ordered):
+        for document in documents:
+            document["_id"] = ObjectId()
+        raise BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "E11000"}]})
+
+    with patch("repositories.account_repository.collection") as mock_collection:
+        mock_collection.insert_many.side_effect = insert_many
+
+        result = account_repository.create_accounts([valid_account_data, valid_account_data])
+
+        assert "id" in result[0]
+        assert result[1] == {"error": "duplicate", "detail": "E11000"}
+        assert mock_collection.insert_many.call_args.kwargs == {"ordered": False}
+
+@pytest.mark.anyio
+async def test_apply_postings_merges_adjustments():
+    """
+    Prueba que valida la aplicación por bloques de un lote de asientos.
+    
+    Escenario:
+    - Dos asientos sobre la misma cuenta, uno sobre una cuenta inexistente y uno inválido
+    
+    Verifica:
+    - Que los asientos de una misma cuenta se sumen en un único incremento
+    - Que se reporte applied, not_found o invalid por asiento y en orden
+    """
+    existing, missing = str(ObjectId()), str(ObjectId())
+    items = [
+        {"id": existing, "amount": 100},
+        {"id": missing, "amount": 5},
+        {"id": existing, "amount": -30},
+        {"id": "not-an-id", "amount": 1},
+    ]
+
+    async def source():
+        for item in items:
+            yield item
+
+    with patch("services.account_service.account_repository.apply_balance_increments") as mock_apply:
+        mock_apply.return_value = {missing}
+
+        chunks = [chunk async for chunk in account_service.apply_postings(source(), chunk_size=10)]
+
+        assert [r.status for r in chunks[0]] == ["applied", "not_found", "applied", "invalid"]
+        mock_apply.assert_called_once_with({existing: 70, missing: 5})
+
+def test_apply_balance_increments_single_bulk_write():
+    """
+    Prueba que valida que el repositorio aplica los incrementos con un único bulk_write.
+    
+    Escenario:
+    - Una de las dos cuentas no existe
+    
+    Verifica:
+    - Que se use un bulk_write no ordenado con una operación por cuenta dentro de la transacción
+    - Que la cuenta que no aparece en la lectura posterior se reporte como inexistente
+    - Que se registre un movimiento solo para la cuenta existente, con su saldo y seq
+    - Que los totales reciban en la transacción solo el incremento de la cuenta existente y su versión
+    """
+    existing, missing = ObjectId(), ObjectId()
+    with patch("repositories.account_repository.collection") as mock_collection, \
+        patch("repositories.account_repository.totals_collection") as mock_totals, \
+        patch("repositories.account_repository.ledger_collection") as mock_ledger:
+        session = mock_collection.database.client.start_session.return_value.__enter__.return_value
+        session.with_transaction.side_effect = lambda callback: callback(session)
+        mock_collection.find.return_value = [
+            {"_id": existing, "balance": 110.0, "seq": 7, "currency": "USD", "account_type": "saving"}
+        ]
+
+        result = account_repository.apply_balance_increments({str(existing): 10, str(missing): 5})
+
+        assert result == {str(missing)}
+        (operations,), kwargs = mock_collection.bulk_write.call_args
+        assert len(operations) == 2
+        assert kwargs == {"ordered": False, "session": session}
+        mock_collection.find.assert_called_once()
+        (entries,), _ = mock_ledger.insert_many.call_args
+        assert [(e["account_id"], e["seq"], e["amount"], e["balance"]) for e in entries] == [(existing, 7, 10, 110.0)]
+        (totals,), kwargs = mock_totals.bulk_write.call_args
+        assert kwargs == {"ordered": False, "session": session}
+        assert [op._doc for op in totals] == [{"$inc": {"accounts": 0, "balance": 10.0, "version": 1}}]
+
+def test_update_balance_sequence_records_each_increment():
+    """
+    Prueba que valida que varios incrementos de una cuenta se escriben juntos con un movimiento cada uno.
+    
+    Escenario:
+    - Tres incrementos agrupados; la cuenta queda con saldo 160 y seq 7
+    
+    Verifica:
+    - Que se use un único $inc con la suma y tantos seq como incrementos
+    - Que se registre un movimiento por incremento con seq y saldo consecutivos
+    - Que se retorne el saldo posterior a cada incremento
+    """
+    account_id = ObjectId()
+    with patch("repositories.account_repository.collection") as mock_collection, \
+        patch("repositories.account_repository.totals_collection"), \
+        patch("repositories.account_repository.ledger_collection") as mock_ledger, \
+        patch("repositories.account_repository.snapshots_collection"):
+        session = mock_collection.database.client.start_session.return_value.__enter__.return_value
+        session.with_transaction.side_effect = lambda callback: callback(session)
+        mock_collection.find_one_and_update.return_value = {
+            "_id": account_id, "balance": 160.0, "seq": 7, "currency": "USD", "account_type": "saving"
+        }
+
+        result = account_repository.update_balance_sequence(str(account_id), [10, 20, 30])
+
+        assert result == {"id": str(account_id), "balances": [110.0, 130.0, 160.0]}
+        (_, update), _ = mock_collection.find_one_and_update.call_args
+        assert update == {"$inc": {"balance": 60, "seq": 3}}
+        (entries,), kwargs = mock_ledger.insert_many.call_args
+        assert kwargs == {"session": session}
+        assert [(e["seq"], e["amount"], e["balance"]) for e in entries] == [(5, 10, 110.0), (6, 20, 130.0), (7, 30, 160.0)]
+
+def test_apply_transfers_single_transaction_in_id_order():
+    """
+    Prueba que valida que el repositorio liquida un lote de transferencias en una transacción.
+    
+    Escenario:
+    - Dos transferencias en sentidos opuestos entre las mismas cuentas
+    
+    Verifica:
+    - Que las cuentas se lean y escriban en orden de _id dentro de la misma sesión
+    - Que cada cuenta se escriba una vez con su saldo y seq finales
+    - Que se registren el cargo y el abono de cada transferencia
+    """
+    low, high = sorted([ObjectId(), ObjectId()])
+    with patch("repositories.account_repository.collection") as mock_collection, \
+        patch("repositories.account_repository.totals_collection"), \
+        patch("repositories.account_repository.ledger_collection") as mock_ledger:
+        session = mock_collection.database.client.start_session.return_value.__enter__.return_value
+        session.with_transaction.side_effect = lambda callback: callback(session)
+        mock_collection.find.return_value.sort.return_value = [
+            {"_id": low, "balance": 10.0, "seq": 4, "currency": "USD", "account_type": "saving"},
+            {"_id": high, "balance": 50.0, "currency": "USD", "account_type": "checking"},
+        ]
+
+        results = account_repository.apply_transfers([
+            Transfer(from_id=str(high), to_id=str(low), amount=30),
+            Transfer(from_id=str(low), to_id=str(high), amount=35),
+        ])
+
+        assert [result["status"] for result in results] == ["completed", "completed"]
+        (query, _), kwargs = mock_collection.find.call_args
+        assert query == {"_id": {"$in": [low, high]}} and kwargs == {"session": session}
+        mock_collection.find.return_value.sort.assert_called_once_with("_id", 1)
+        (operations,), kwargs = mock_collection.bulk_write.call_args
+        assert kwargs == {"session": session}
+        assert [(op._filter, op._doc) for op in operations] == [
+            ({"_id": low}, {"$set": {"balance": 5.0, "seq": 6}}),
+            ({"_id": high}, {"$set": {"balance": 55.0, "seq": 2}}),
+        ]
+        (entries,), _ = mock_ledger.insert_many.call_args
+        assert [(e["account_id"], e["amount"]) for e in entries] == [(high, -30), (low, 30), (low, -35), (high, 35)]
+
+@pytest.mark.anyio
+async def test_transfer_db_error_hides_driver_detail(caplog):
+    """
+    Prueba que valida que un error de base de datos en una transferencia no expone el detalle del driver.
+    
+    Escenario:
+    - La liquidación de la transferencia falla con un error de MongoDB
+    
+    Verifica:
+    - Que la respuesta sea 500 con un mensaje fijo
+    - Que el error del driver quede en el log
+    """
+    app = FastAPI()
+    app.include_router(accounts.router)
+    transfer = {"from_id": str(ObjectId()), "to_id": str(ObjectId()), "amount": 10}
+    with patch("services.account_service.transfer", new=AsyncMock(side_effect=Exception("host mongo-0:27017 refused"))):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/transfers", json=transfer)
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Error applying transfer in database"}
+    assert "mongo-0" in caplog.text
+
+@pytest.mark.anyio
+async def test_transfer_batch_db_error_hides_driver_detail(caplog):
+    """
+    Prueba que valida que un error de base de datos en un lote de transferencias no expone el detalle del driver.
+    
+    Escenario:
+    - La liquidación del bloque falla con un error de MongoDB
+    
+    Verifica:
+    - Que cada transferencia del bloque se reporte como error de base de datos con un mensaje fijo
+    - Que el error del driver quede en el log
+    """
+    async def items():
+        for _ in range(2):
+            yield {"from_id": str(ObjectId()), "to_id": str(ObjectId()), "amount": 10}
+
+    with patch("services.account_service.account_repository.apply_transfers",
+               side_effect=Exception("host mongo-0:27017 refused")):
+        response = await account_service.transfer_batch(items())
+
+    assert response.failed == 2
+    assert {(result.status, result.detail) for result in response.results} == {
+        ("database", "Error applying transfers in database")
+    }
+    assert "mongo-0" in caplog.text
+
+@pytest.mark.anyio
+async def test_update_account_balance_success(update_account_data):
     """
     Prueba que valida la actualización exitosa del saldo de una cuenta.
     
     Escenario:
     - Existe una cuenta con el ID proporcionado
-    - La operación de actualización se ejecuta correctamente
+    - La actualización atómica retorna el documento actualizado
     
     Args:
         update_account_data: Datos válidos para actualizar el saldo de una cuenta
         
     Verifica:
     - Que se retorne el resultado con el nuevo saldo
-    - Que se verifique la existencia de la cuenta
-    - Que se ejecute la actualización del saldo
+    - Que se ejecute una única operación de actualización
+    - Que NO se consulte la cuenta antes de actualizarla
     """
     with patch("services.account_service.account_repository.get_account_by_id") as mock_get_by_id, \
         patch("services.account_service.account_repository.update_balance") as mock_update_balance:
 
-        mock_get_by_id.return_value = {"_id": update_account_data.id, "balance": 1000.0}
         mock_update_balance.return_value = {"id": update_account_data.id, "balance": update_account_data.balance}
 
-        result = account_service.update_account_balance(update_account_data)
+        result = await account_service.update_account_balance(update_account_data)
 
         assert result == {
             "id": update_account_data.id,
             "balance": update_account_data.balance
         }
 
-        mock_get_by_id.assert_called_once_with(update_account_data.id)
         mock_update_balance.assert_called_once_with(update_account_data)
+        mock_get_by_id.assert_not_called()
 
-def test_update_account_balance_not_found(update_account_data):
+@pytest.mark.anyio
+async def test_update_account_balance_not_found(update_account_data):
     """
     Prueba que valida el manejo de error cuando se intenta actualizar una cuenta inexistente.
     
     Escenario:
     - No existe una cuenta con el ID proporcionado
-    - El sistema debe lanzar una excepción
+    - La actualización atómica no encuentra documento
     
     Args:
         update_account_data: Datos para actualizar el saldo de una cuenta
         
     Verifica:
     - Que se lance una excepción ValueError con el mensaje correcto
-    - Que se verifique la inexistencia de la cuenta
-    - Que NO se ejecute la actualización del saldo
+    - Que se haya intentado la actualización una sola vez
     """
-    with patch("services.account_service.account_repository.get_account_by_id") as mock_get_by_id:
-        mock_get_by_id.return_value = None
+    with patch("services.account_service.account_repository.update_balance") as mock_update_balance:
+        mock_update_balance.return_value = None
 
         with pytest.raises(ValueError) as exc_info:
-            account_service.update_account_balance(update_account_data)
+            await account_service.update_account_balance(update_account_data)
 
         assert str(exc_info.value) == "Account not found."
-        mock_get_by_id.assert_called_once_with(update_account_data.id)
+        mock_update_balance.assert_called_once_with(update_account_data)
 
-def test_update_account_balance_db_error(update_account_data):
+@pytest.mark.anyio
+async def test_update_account_balance_db_error(update_account_data):
     """
     Prueba que valida el manejo de errores de base de datos durante la actualización de saldo.
     
     Escenario:
-    - Existe una cuenta con el ID proporcionado
     - La operación de actualización en la base de datos falla
     
     Args:
@@ -228,24 +493,69 @@ def test_update_account_balance_db_error(update_account_data):
         
     Verifica:
     - Que se propague la excepción de base de datos
-    - Que se verifique la existencia de la cuenta
     - Que se intente la actualización del saldo
     """
-    with patch("services.account_service.account_repository.get_account_by_id") as mock_get_by_id, \
-        patch("services.account_service.account_repository.update_balance") as mock_update_balance:
-
-        mock_get_by_id.return_value = {"_id": update_account_data.id, "balance": 1000.0}
-
+    with patch("services.account_service.account_repository.update_balance") as mock_update_balance:
         mock_update_balance.side_effect = Exception("DB error")
 
         with pytest.raises(Exception) as exc_info:
-            account_service.update_account_balance(update_account_data)
+            await account_service.update_account_balance(update_account_data)
 
         assert str(exc_info.value) == "DB error"
-        mock_get_by_id.assert_called_once_with(update_account_data.id)
         mock_update_balance.assert_called_once_with(update_account_data)
 
-def test_get_all_accounts(valid_get_accounts_data):
+def test_update_balance_records_ledger_entry():
+    """
+    Prueba que valida que el repositorio actualiza el saldo y registra el movimiento
+    en la misma transacción.
+    
+    Escenario:
+    - La colección retorna el documento posterior a la actualización
+    
+    Verifica:
+    - Que se use find_one_and_update con $inc del saldo y del seq dentro de la transacción
+    - Que se inserte el movimiento con el seq y el saldo leídos de la misma operación
+    - Que se retorne el saldo leído de la misma operación
+    - Que el total de (moneda, tipo) se incremente en la transacción, en el mismo importe y en una versión
+    """
+    account_id = ObjectId()
+    with patch("repositories.account_repository.collection") as mock_collection, \
+        patch("repositories.account_repository.totals_collection") as mock_totals, \
+        patch("repositories.account_repository.ledger_collection") as mock_ledger, \
+        patch("repositories.account_repository.snapshots_collection") as mock_snapshots:
+        session = mock_collection.database.client.start_session.return_value.__enter__.return_value
+        session.with_transaction.side_effect = lambda callback: callback(session)
+        mock_collection.find_one_and_update.return_value = {
+            "_id": account_id, "balance": 2500.0, "seq": 3, "currency": "EUR", "account_type": "checking"
+        }
+
+        result = account_repository.update_balance(
+            UpdateAccountBalance(id=str(account_id), balance=1500)
+        )
+
+        assert result == {"id": str(account_id), "balance": 2500.0}
+        mock_collection.find_one_and_update.assert_called_once_with(
+            {"_id": account_id},
+            {"$inc": {"balance": 1500, "seq": 1}},
+            projection={"_id": 1, "balance": 1, "seq": 1, "currency": 1, "account_type": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        mock_collection.find_one.assert_not_called()
+        (entries,), kwargs = mock_ledger.insert_many.call_args
+        assert kwargs == {"session": session}
+        assert {key: entries[0][key] for key in ("account_id", "seq", "amount", "balance")} == {
+            "account_id": account_id, "seq": 3, "amount": 1500, "balance": 2500.0
+        }
+        # seq 3 no es múltiplo del intervalo de fotos
+        mock_snapshots.insert_many.assert_not_called()
+        (totals,), kwargs = mock_totals.bulk_write.call_args
+        assert kwargs["session"] is session
+        assert totals[0]._filter["_id"]["currency"] == "EUR"
+        assert totals[0]._doc == {"$inc": {"accounts": 0, "balance": 1500.0, "version": 1}}
+
+@pytest.mark.anyio
+async def test_get_all_accounts(valid_get_accounts_data):
     """
     Prueba que valida la consulta exitosa de todas las cuentas bancarias.
     
@@ -262,11 +572,287 @@ def test_get_all_accounts(valid_get_accounts_data):
     - Que se ejecute la consulta a la base de datos
     """
     with patch("services.account_service.account_repository.get_all_accounts") as mock_get_all:
-        mock_get_all.return_value = valid_get_accounts_data
+        mock_get_all.return_value = valid_get_accounts_data.model_dump()
+
+        result = await account_service.get_all_accounts()
+
+        assert len(result["accounts"]) == 2
+        assert result["accounts"][0]["id"] == "1"
+        assert result["accounts"][1]["id"] == "2"
+        mock_get_all.assert_called_once_with(100, None, AccountQuery())
+
+def test_get_all_accounts_projects_in_database():
+    """
+    Prueba que valida que la página de cuentas se proyecte en MongoDB.
+    
+    Escenario:
+    - Se pide una página de una cuenta y la base de datos retorna dos
+    
+    Verifica:
+    - Que el _id se convierta a id con $toString dentro de la agregación
+    - Que los documentos se retornen tal cual, sin procesarlos en Python
+    - Que el documento extra se use solo para calcular el siguiente cursor
+    """
+    projected = [
+        {"id": "1", "account_number": "12345", "holder_name": "Juan Pérez",
+         "account_type": "saving", "balance": 100.0, "currency": "USD"},
+        {"id": "2", "account_number": "67890", "holder_name": "María García",
+         "account_type": "checking", "balance": 200.0, "currency": "EUR"},
+    ]
+    mock_collection = MagicMock()
+    with patch.dict(account_repository.readers, {"list": mock_collection}):
+        mock_collection.aggregate.return_value = iter(projected)
+
+        result = account_repository.get_all_accounts(limit=1)
+
+        pipeline = mock_collection.aggregate.call_args.args[0]
+        assert pipeline[-1] == {"$project": account_query.ACCOUNT_PROJECTION}
+        assert account_query.ACCOUNT_PROJECTION["id"] == {"$toString": "$_id"}
+        assert {"$limit": 2} in pipeline
+        assert result == {"accounts": projected[:1], "next_cursor": "1"}
+        assert result["accounts"][0] is projected[0]
+
+@pytest.mark.anyio
+async def test_get_all_accounts_invalid_cursor():
+    """
+    Prueba que valida el rechazo de un cursor de paginación inválido.
+    
+    Escenario:
+    - Se solicita una página con un cursor que no es un ObjectId
+    
+    Verifica:
+    - Que se lance una excepción ValueError con el mensaje correcto
+    - Que NO se consulte la base de datos
+    """
+    with patch("services.account_service.account_repository.get_all_accounts") as mock_get_all:
+        with pytest.raises(ValueError) as exc_info:
+            await account_service.get_all_accounts(10, "not-a-cursor")
+
+        assert str(exc_info.value) == "Invalid cursor."
+        mock_get_all.assert_not_called()
+
+def test_account_query_pushdown():
+    """
+    Prueba que valida la traducción de filtros, orden, cursor y campos a MongoDB.
+    
+    Escenario:
+    - Se piden cuentas USD de tipo checking con saldo mínimo, ordenadas por
+      saldo descendente, solo con el número de cuenta y desde un cursor
+    
+    Verifica:
+    - Que los filtros se conviertan en condiciones de igualdad y rango
+    - Que el cursor pagine por (saldo, _id) en la dirección del orden
+    - Que la proyección incluya el id, los campos pedidos y el campo de orden
+    - Que exista un índice compuesto para igualdad + orden/rango por saldo
+    """
+    query = AccountQuery(currency="USD", account_type="checking", min_balance=10,
+                         sort="-balance", fields="account_number")
+    last = {"id": str(ObjectId()), "account_number": "12345", "balance": 50.0}
+    cursor = account_query.encode_cursor(last, query)
+
+    pipeline = account_query.build_pipeline(query, cursor, 11)
+
+    conditions, page = pipeline[0]["$match"]["$and"]
+    assert conditions == {"currency": "USD", "account_type": "checking", "balance": {"$gte": 10}}
+    assert page == {"$or": [
+        {"balance": {"$lt": 50.0}},
+        {"balance": 50.0, "_id": {"$lt": ObjectId(last["id"])}},
+    ]}
+    assert pipeline[1] == {"$sort": {"balance": -1, "_id": -1}}
+    assert pipeline[2] == {"$limit": 11}
+    assert pipeline[3] == {"$project": {
+        "_id": 0, "id": {"$toString": "$_id"}, "account_number": 1, "balance": 1,
+    }}
+    keys = [index.document["key"] for index in index_manager.REQUIRED_INDEXES["accounts"]]
+    assert {"currency": 1, "account_type": 1, "balance": 1, "_id": 1} in [dict(key) for key in keys]
+
+    with pytest.raises(ValueError):
+        account_query.decode_cursor(last["id"], query)
+
+@pytest.mark.anyio
+async def test_stream_accounts(valid_get_accounts_data):
+    """
+    Prueba que valida el recorrido en streaming de las cuentas bancarias.
+    
+    Escenario:
+    - El repositorio síncrono entrega lotes de cuentas desde el cursor de MongoDB
+    
+    Args:
+        valid_get_accounts_data: Datos de prueba que simulan la respuesta de la base de datos
+        
+    Verifica:
+    - Que los lotes se entreguen en orden a través de un iterador asíncrono
+    - Que se respete el tamaño de lote solicitado
+    """
+    raw_accounts = [acc.model_dump() for acc in valid_get_accounts_data.accounts]
+    with patch("services.account_service.account_repository.iter_account_batches") as mock_iter:
+        mock_iter.return_value = iter([raw_accounts[:1], raw_accounts[1:]])
+
+        batches = [batch async for batch in account_service.stream_accounts(1)]
+
+        assert [[acc["id"] for acc in batch] for batch in batches] == [["1"], ["2"]]
+        mock_iter.assert_called_once_with(1, AccountQuery())
+
+
+@pytest.mark.anyio
+async def test_get_accounts_conditional(valid_account_data):
+    """
+    Prueba que valida el ETag y las peticiones condicionales del listado.
+    
+    Escenario:
+    - Se lista una página dos veces, la segunda con If-None-Match
+    - Se pide la misma página sin If-None-Match y después se actualiza un saldo
+    
+    Args:
+        valid_account_data: Datos válidos para crear una cuenta bancaria
+        
+    Verifica:
+    - Que la respuesta condicional sea 304 sin leer las cuentas
+    - Que la página sin cambios se sirva desde la caché de páginas codificadas
+    - Que una escritura cambie el ETag
+    - Que otra consulta tenga otro ETag
+    """
+    account_service.configure_repository("memory")
+    account_service.configure_list_cache(max_entries=16, ttl=60)
+    app = FastAPI()
+    app.include_router(accounts.router)
+    try:
+        created = await account_service.create_account(valid_account_data)
+        with patch.object(memory_account_repository, "get_versioned_accounts",
+                          wraps=memory_account_repository.get_versioned_accounts) as spy:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                first = await client.get("/accounts")
+                etag = first.headers["ETag"]
+                not_modified = await client.get("/accounts", headers={"If-None-Match": etag})
+                cached = await client.get("/accounts")
+                assert spy.call_count == 1
+
+                await account_service.update_account_balance(UpdateAccountBalance(id=created.id, balance=10))
+                changed = await client.get("/accounts", headers={"If-None-Match": etag})
+                other_query = await client.get("/accounts", params={"currency": "USD"})
+    finally:
+        account_service.configure_list_cache()
+        memory_account_repository.configure()
+        account_service.configure_repository("sync")
+
+    assert first.status_code == 200 and first.json()["accounts"][0]["id"] == created.id
+    assert not_modified.status_code == 304 and not_modified.headers["ETag"] == etag
+    assert not_modified.content == b""
+    assert cached.content == first.content
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert changed.json()["accounts"][0]["balance"] == valid_account_data.balance + 10
+    assert other_query.headers["ETag"] not in (etag, changed.headers["ETag"])
+
+
+@pytest.mark.anyio
+async def test_list_etag_invalidation_and_max_age():
+    """
+    Prueba que valida que un ETag del listado deja de validar sin que avance la versión.
+    
+    Escenario:
+    - Vida máxima de los ETag de 30 segundos y versión de la colección fija
+    - Se invalida la versión del proceso y después pasa el intervalo en curso
+    
+    Verifica:
+    - Que el ETag sea estable mientras no cambia nada
+    - Que cambie al invalidar la versión y al vencer su intervalo
+    """
+    account_service.configure_repository("memory")
+    account_service.configure_list_cache(max_age=30)
+    try:
+        with patch("services.account_service.time.time", return_value=3000.0):
+            etag = await account_service.get_accounts_etag()
+            same = await account_service.get_accounts_etag()
+            account_totals.invalidate_version()
+            invalidated = await account_service.get_accounts_etag()
+        with patch("services.account_service.time.time", return_value=3030.0):
+            expired = await account_service.get_accounts_etag()
+    finally:
+        account_service.configure_list_cache()
+        account_service.configure_repository("sync")
+
+    assert same == etag
+    assert len({etag, invalidated, expired}) == 3
+
+@pytest.mark.anyio
+async def test_async_repository_backend(update_account_data):
+    """
+    Prueba que valida el uso del repositorio asíncrono nativo seleccionado al arranque.
+    
+    Escenario:
+    - Se selecciona el backend "async"
+    - El repositorio asíncrono retorna el saldo actualizado
+    
+    Args:
+        update_account_data: Datos para actualizar el saldo de una cuenta
+        
+    Verifica:
+    - Que el servicio espere directamente la corrutina del repositorio
+    - Que un backend desconocido sea rechazado
+    """
+    try:
+        account_service.configure_repository("async")
+        with patch("services.account_service.account_repository.update_balance", new_callable=AsyncMock) as mock_update_balance:
+            mock_update_balance.return_value = {"id": update_account_data.id, "balance": 2500.0}
+
+            result = await account_service.update_account_balance(update_account_data)
+
+            assert result == {"id": update_account_data.id, "balance": 2500.0}
+            mock_update_balance.assert_awaited_once_with(update_account_data)
+
+        with pytest.raises(ValueError):
+            account_service.configure_repository("unknown")
+    finally:
+        account_service.configure_repository("sync")
+
+def test_ensure_indexes_declares_unique_account_number():
+    """
+    Prueba que valida la creación idempotente del índice único sobre account_number.
+    
+    Escenario:
+    - Se aseguran los índices declarados al arranque
+    
+    Verifica:
+    - Que se cree el índice declarado en la colección de cuentas
+    - Que el índice sea único sobre account_number
+    """
+    with patch("repositories.index_manager.database") as mock_database:
+        mock_collection = mock_database.get_collection.return_value
+        mock_collection.create_indexes.return_value = ["account_number_unique"]
+
+        result = index_manager.ensure_indexes()
+
+        assert result["accounts"] == ["account_number_unique"]
+        (indexes,), _ = mock_collection.create_indexes.call_args_list[0]
+        assert indexes[0].document["key"] == {"account_number": 1}
+        assert indexes[0].document["unique"] is True
+
+def test_report_indexes_missing_and_unused():
+    """
+    Prueba que valida el reporte de índices faltantes, no declarados y sin uso.
+    
+    Escenario:
+    - Falta el índice único declarado
+    - Existe un índice no declarado sin accesos
+    
+    Verifica:
+    - Que el índice declarado aparezca como faltante
+    - Que el índice no declarado aparezca como no declarado y sin uso
+    """
+    with patch("repositories.index_manager.REQUIRED_INDEXES", {"accounts": index_manager.REQUIRED_INDEXES["accounts"][:1]}), \
+        patch("repositories.index_manager.database") as mock_database:
+        mock_collection = mock_database.get_collection.return_value
+        mock_collection.index_information.return_value = {"_id_": {}, "legacy_idx": {}}
+        mock_collection.aggregate.return_value = [
+            {"name": "_id_", "accesses": {"ops": 0}},
+            {"name": "legacy_idx", "accesses": {"ops": 0}},
+        ]
 
-        result = account_service.get_all_accounts()
+        report = index_manager.report_indexes()
 
-        assert len(result.accounts) == 2
-        assert result.accounts[0].id == "1"
-        assert result.accounts[1].id == "2"
-        mock_get_all.assert_called_once()
+        assert report["accounts"] == {
+            "missing": ["account_number_unique"],
+            "undeclared": ["legacy_idx"],
+            "unused": ["legacy_idx"],
+        }
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Módulo de pruebas para el control de admisión.
+
+Valida la cola acotada y el plazo de espera del limitador, el rechazo con 503 y
+Retry-After de las rutas sin capacidad y la plaza de las respuestas en streaming.
+"""
+
+import asyncio
+import httpx
+import orjson
+import pytest
+from fastapi import APIRouter, FastAPI
+import admission
+import metrics
+from repositories import memory_account_repository
+from routers import accounts
+from services import account_service
+
+
+@pytest.mark.anyio
+async def test_limiter_queues_then_sheds():
+    """
+    Prueba que valida la cola y el rechazo del limitador.
+    
+    Escenario:
+    - Un limitador de 1 plaza con cola de 1 recibe tres peticiones
+    - Se libera la plaza y después se agota el plazo de una nueva espera
+    
+    Verifica:
+    - Que la segunda petición espere y reciba la plaza liberada
+    - Que la tercera se rechace al instante por cola llena
+    - Que una espera que supera el plazo se rechace
+    """
+    limiter = admission.AdmissionLimiter("test", limit=1, queue_size=1, queue_timeout=0.05)
+    await limiter.acquire()
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(admission.Overloaded):
+        await limiter.acquire()
+    limiter.release()
+    await waiting
+    assert limiter.stats() == {"limit": 1, "active": 1, "queued": 0}
+
+    with pytest.raises(admission.Overloaded):
+        await limiter.acquire()
+    limiter.release()
+    assert limiter.stats() == {"limit": 1, "active": 0, "queued": 0}
+
+@pytest.mark.anyio
+async def test_route_sheds_with_retry_after():
+    """
+    Prueba que valida el rechazo de una ruta sin capacidad.
+    
+    Escenario:
+    - Una ruta de escritura con límite propio de 1 plaza y sin cola está ocupada
+    - Las lecturas tienen su propio presupuesto
+    
+    Verifica:
+    - Que la escritura responda 503 con Retry-After
+    - Que la lectura se admita
+    - Que se cuenten las peticiones rechazadas
+    """
+    router = APIRouter(route_class=admission.AdmissionRoute)
+    release = asyncio.Event()
+
+    @router.post("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @router.get("/slow")
+    async def read():
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(router)
+    admission.configure(read_limit=10, write_limit=10, queue_size=0, routes={"POST /slow": 1}, retry_after_seconds=2)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.post("/slow"))
+            while admission.stats()["POST /slow"]["active"] == 0:
+                await asyncio.sleep(0)
+
+            shed = await client.post("/slow")
+            read = await client.get("/slow")
+            release.set()
+            assert (await first).status_code == 200
+    finally:
+        admission.configure(read_limit=0, write_limit=0)
+
+    assert shed.status_code == 503 and shed.headers["Retry-After"] == "2"
+    assert read.status_code == 200
+    assert 'admission_requests_total{limit="POST /slow",outcome="shed_queue_full"} 1' in metrics.REGISTRY.render()
+
+@pytest.mark.anyio
+async def test_streaming_import_holds_write_slot():
+    """
+    Prueba que una importación en streaming ocupa su plaza de escritura hasta terminar.
+
+    Escenario:
+    - Presupuesto de escritura de 1 plaza y repositorio en memoria
+    - Una importación NDJSON cuyo cuerpo se detiene tras la primera cuenta,
+      cuando la respuesta ya se está transmitiendo
+
+    Verifica:
+    - Que la plaza siga ocupada mientras se importa
+    - Que se libere al terminar la importación
+    """
+    account_service.configure_repository("memory")
+    admission.configure(read_limit=0, write_limit=1)
+    app = FastAPI()
+    app.include_router(accounts.router)
+    resume = asyncio.Event()
+
+    async def body():
+        for i in (1, 2):
+            if i == 2:
+                await resume.wait()
+            yield orjson.dumps({"account_number": f"{i:09d}", "holder_name": "Holder", "account_type": "saving",
+                                "balance": 10.0, "currency": "USD"}) + b"\n"
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = asyncio.ensure_future(client.post("/accounts/import", params={"chunk_size": 1}, content=body()))
+            while not memory_account_repository.documents:
+                await asyncio.sleep(0)
+            during = admission.stats()["write"]["active"]
+            resume.set()
+            response = await response
+        after = admission.stats()["write"]["active"]
+    finally:
+        admission.configure(read_limit=0, write_limit=0)
+        memory_account_repository.configure()
+        account_service.configure_repository("sync")
+
+    assert response.status_code == 200
+    assert orjson.loads(response.text.splitlines()[-1])["done"] is True
+    assert during == 1 and after == 0
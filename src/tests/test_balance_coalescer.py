@@ -0,0 +1,112 @@
+"""
+Módulo de pruebas para la agrupación de incrementos de saldo.
+
+Valida que los incrementos concurrentes sobre una misma cuenta se apliquen con
+una sola escritura y que cada petición reciba el saldo posterior que le
+corresponde según su orden de llegada.
+"""
+
+import asyncio
+import pytest
+from services.balance_coalescer import BalanceCoalescer
+
+
+@pytest.mark.anyio
+async def test_concurrent_increments_single_write():
+    """
+    Prueba que valida la combinación de incrementos concurrentes.
+    
+    Escenario:
+    - Tres incrementos concurrentes sobre la misma cuenta con saldo inicial 100
+    
+    Verifica:
+    - Que se haga una única escritura con los incrementos en orden de llegada
+    - Que cada petición reciba el saldo posterior de su incremento
+    """
+    writes = []
+
+    async def apply(account_id, amounts):
+        writes.append((account_id, amounts))
+        balances = [100 + sum(amounts[:i + 1]) for i in range(len(amounts))]
+        return {"id": account_id, "balances": balances}
+
+    coalescer = BalanceCoalescer(window=0.01)
+    results = await asyncio.gather(
+        coalescer.submit("a", 10, apply),
+        coalescer.submit("a", 20, apply),
+        coalescer.submit("a", 30, apply),
+    )
+
+    assert writes == [("a", [10, 20, 30])]
+    assert [result["balance"] for result in results] == [110, 130, 160]
+    assert coalescer.stats()["batches"] == 1
+
+@pytest.mark.anyio
+async def test_separate_accounts_and_not_found():
+    """
+    Prueba que valida que las cuentas se agrupan por separado y el caso de cuenta inexistente.
+    
+    Escenario:
+    - Incrementos sobre una cuenta existente y otra inexistente
+    
+    Verifica:
+    - Que se haga una escritura por cuenta
+    - Que las peticiones de la cuenta inexistente reciban None
+    """
+    async def apply(account_id, amounts):
+        if account_id == "missing":
+            return None
+        return {"id": account_id, "balances": [sum(amounts)]}
+
+    coalescer = BalanceCoalescer(window=0.01)
+    found, missing = await asyncio.gather(
+        coalescer.submit("a", 5, apply),
+        coalescer.submit("missing", 5, apply),
+    )
+
+    assert found == {"id": "a", "balance": 5}
+    assert missing is None
+    assert coalescer.stats()["batches"] == 2
+
+@pytest.mark.anyio
+async def test_write_error_propagates_to_every_request():
+    """
+    Prueba que valida que un error de escritura se propaga a todas las peticiones del grupo.
+    
+    Verifica:
+    - Que ninguna petición del grupo se considere aplicada
+    """
+    async def apply(account_id, amounts):
+        raise RuntimeError("DB error")
+
+    coalescer = BalanceCoalescer(window=0.01)
+    results = await asyncio.gather(
+        coalescer.submit("a", 1, apply),
+        coalescer.submit("a", 2, apply),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+@pytest.mark.anyio
+async def test_cancelled_request_is_not_applied():
+    """
+    Prueba que valida que una petición cancelada durante la ventana no se aplica.
+
+    Verifica:
+    - Que la escritura solo incluya los incrementos de las peticiones vivas
+    """
+    writes = []
+
+    async def apply(account_id, amounts):
+        writes.append(amounts)
+        return {"id": account_id, "balances": [sum(amounts)]}
+
+    coalescer = BalanceCoalescer(window=0.01)
+    cancelled = asyncio.ensure_future(coalescer.submit("a", 1, apply))
+    kept = asyncio.ensure_future(coalescer.submit("a", 2, apply))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await kept == {"id": "a", "balance": 2}
+    assert writes == [[2]]
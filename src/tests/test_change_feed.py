@@ -0,0 +1,97 @@
+"""
+Módulo de pruebas para el feed de cambios de cuentas.
+
+Valida el reparto de eventos a los suscriptores con filtros, la baja de los
+suscriptores lentos, la reanudación desde un token y la publicación de los
+eventos desde el repositorio tras cada escritura.
+"""
+
+import asyncio
+import pytest
+from repositories import change_events, memory_account_repository
+from services.change_feed import ChangeBus, ResumeTokenExpired, SubscriberDropped
+from models import account_model
+
+
+def _event(account_id: str, currency: str = "USD", balance: float = 100.0) -> dict:
+    return {"type": change_events.BALANCE_CHANGED, "account_id": account_id, "currency": currency, "balance": balance}
+
+@pytest.mark.anyio
+async def test_filters_drop_slow_consumer_and_resume():
+    """
+    Prueba que valida los filtros, la baja por lentitud y la reanudación.
+    
+    Escenario:
+    - Un suscriptor filtra por moneda y otro, con buffer de 2 eventos, no consume
+    - Se publican tres eventos y se reanuda tras el primero
+    
+    Verifica:
+    - Que el filtro por moneda descarte los eventos de otras monedas
+    - Que el suscriptor lento reciba su buffer y después SubscriberDropped
+    - Que la reanudación entregue solo los eventos posteriores al token
+    - Que un token desconocido se rechace
+    """
+    bus = ChangeBus(history=10, buffer=2)
+    euros = bus.subscribe(currencies=["EUR"])
+    slow = bus.subscribe()
+
+    bus.publish([_event("a"), _event("b", "EUR"), _event("c")])
+
+    token, event = await euros.get()
+    assert event["account_id"] == "b"
+    assert [(await slow.get())[1]["account_id"] for _ in range(2)] == ["a", "b"]
+    with pytest.raises(SubscriberDropped):
+        await slow.get()
+    assert bus.stats()["dropped"] == 1 and bus.stats()["subscribers"] == 1
+
+    first_token = bus._events[0][1]
+    resumed = bus.subscribe(resume_after=first_token)
+    assert [(await resumed.get())[1]["account_id"] for _ in range(2)] == ["b", "c"]
+    with pytest.raises(ResumeTokenExpired):
+        bus.subscribe(resume_after="unknown")
+
+@pytest.mark.anyio
+async def test_publish_from_thread_is_delivered_on_event_loop():
+    """
+    Prueba que valida la publicación desde un hilo del threadpool.
+    
+    Escenario:
+    - Un repositorio síncrono publica desde un hilo distinto al del event loop
+    
+    Verifica:
+    - Que el evento se entregue al suscriptor a través del event loop del bus
+    """
+    bus = ChangeBus()
+    bus.bind(asyncio.get_running_loop())
+    subscription = bus.subscribe(account_ids=["a"])
+
+    await asyncio.to_thread(bus.publish, [_event("a")])
+
+    token, event = await asyncio.wait_for(subscription.get(), 1)
+    assert event["account_id"] == "a" and token.endswith("-1")
+
+@pytest.mark.anyio
+async def test_repository_publishes_committed_writes():
+    """
+    Prueba que valida la publicación de eventos desde el repositorio.
+    
+    Escenario:
+    - Con un destino registrado se crea una cuenta y se actualiza su saldo
+    
+    Verifica:
+    - Que se publique el alta y después el cambio de saldo con importe, saldo y seq
+    """
+    published = []
+    memory_account_repository.configure()
+    change_events.set_sink(published.extend)
+    try:
+        created = await memory_account_repository.create_account(account_model.CreateAccount(
+            account_number="ACC00001", holder_name="Ana", account_type="saving", balance=100.0, currency="EUR"
+        ))
+        await memory_account_repository.update_balance(account_model.UpdateAccountBalance(id=created.id, balance=25.0))
+    finally:
+        change_events.set_sink(None)
+
+    assert [event["type"] for event in published] == [change_events.ACCOUNT_CREATED, change_events.BALANCE_CHANGED]
+    assert published[1]["account_id"] == created.id
+    assert (published[1]["currency"], published[1]["amount"], published[1]["balance"], published[1]["seq"]) == ("EUR", 25.0, 125.0, 1)
@@ -0,0 +1,126 @@
+"""
+Módulo de pruebas para la configuración de la conexión a MongoDB.
+
+Valida que las opciones del pool se lean del entorno, que el monitor de pool
+acumule correctamente las estadísticas a partir de los eventos de pymongo y que
+las lecturas se enruten y contabilicen por operación.
+"""
+
+from types import SimpleNamespace
+from pymongo import MongoClient
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from repositories import read_routing
+import database
+import pytest
+
+
+def test_mongo_client_options_from_env(monkeypatch):
+    """
+    Prueba que valida la lectura de las opciones del pool desde el entorno.
+    
+    Escenario:
+    - Se definen tamaño del pool, timeouts y compresión
+    - No se define el tamaño mínimo del pool
+    
+    Verifica:
+    - Que las opciones definidas se conviertan al tipo esperado
+    - Que las no definidas se omitan para usar los valores por defecto de pymongo
+    """
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "200")
+    monkeypatch.delenv("MONGO_MIN_POOL_SIZE", raising=False)
+    monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "250")
+    monkeypatch.setenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "2000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zstd,snappy")
+
+    assert database.mongo_client_options() == {
+        "maxPoolSize": 200,
+        "waitQueueTimeoutMS": 250,
+        "serverSelectionTimeoutMS": 2000,
+        "compressors": "zstd,snappy",
+    }
+
+def test_pool_monitor_stats():
+    """
+    Prueba que valida las estadísticas del monitor de pool.
+    
+    Escenario:
+    - Se crean dos conexiones, se hacen dos checkouts y se devuelve una
+    - Un checkout falla por timeout
+    
+    Verifica:
+    - Que se cuenten conexiones abiertas y en uso
+    - Que se calculen la espera media y máxima del checkout
+    - Que los fallos se agrupen por motivo
+    """
+    monitor = database.PoolMonitor()
+    address = ("localhost", 27017)
+    for connection_id in (1, 2):
+        monitor.connection_created(SimpleNamespace(address=address, connection_id=connection_id))
+    monitor.connection_checked_out(SimpleNamespace(address=address, duration=0.002))
+    monitor.connection_checked_out(SimpleNamespace(address=address, duration=0.004))
+    monitor.connection_checked_in(SimpleNamespace(address=address))
+    monitor.connection_check_out_failed(SimpleNamespace(address=address, reason="timeout"))
+
+    stats = monitor.stats()["localhost:27017"]
+
+    assert stats["connections_open"] == 2
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 2
+    assert round(stats["checkout_wait_avg_ms"], 3) == 3.0
+    assert round(stats["checkout_wait_max_ms"], 3) == 4.0
+    assert stats["checkout_failures"] == {"timeout": 1}
+
+def test_read_routing_per_operation():
+    """
+    Prueba que valida la preferencia de lectura aplicada a cada operación.
+    
+    Escenario:
+    - Los listados se leen de secundarios con una antigüedad máxima de 120 s
+    - Las consultas puntuales quedan en el primario por defecto
+    
+    Verifica:
+    - Que la vista de lectura de cada operación tenga su preferencia
+    - Que se rechacen una antigüedad menor que el mínimo y un modo desconocido
+    """
+    client = MongoClient("mongodb://localhost:27017", connect=False)
+    collection = client.get_database("api_bank").get_collection("accounts")
+    try:
+        read_routing.configure({"list": "secondaryPreferred"}, max_staleness_seconds=120)
+
+        assert read_routing.reader(collection, "list").read_preference == SecondaryPreferred(max_staleness=120)
+        assert read_routing.reader(collection, "lookup").read_preference == Primary()
+        with pytest.raises(ValueError):
+            read_routing.configure(max_staleness_seconds=30)
+        with pytest.raises(ValueError):
+            read_routing.configure(read_routing.parse_routes("lookup=fastest"))
+        assert read_routing.routes["list"] == "secondaryPreferred"
+    finally:
+        read_routing.configure()
+        client.close()
+
+def test_read_placement_by_operation():
+    """
+    Prueba que valida la contabilidad de dónde se atienden las lecturas.
+    
+    Escenario:
+    - Un replica set con un primario y un secundario
+    - Se ejecutan comandos dentro y fuera de una operación de lectura
+    
+    Verifica:
+    - Que cada lectura se atribuya a su operación y al tipo de servidor
+    - Que los comandos fuera de una operación de lectura no se cuenten
+    """
+    monitor = database.ReadPlacementMonitor()
+    primary, secondary = ("db1", 27017), ("db2", 27017)
+    for address, server_type in ((primary, "RSPrimary"), (secondary, "RSSecondary")):
+        description = SimpleNamespace(server_type_name=server_type)
+        monitor.description_changed(SimpleNamespace(server_address=address, new_description=description))
+
+    with read_routing.reading("list"):
+        monitor.started(SimpleNamespace(connection_id=secondary))
+        monitor.started(SimpleNamespace(connection_id=secondary))
+    with read_routing.reading("lookup"):
+        monitor.started(SimpleNamespace(connection_id=primary))
+    monitor.started(SimpleNamespace(connection_id=primary))
+
+    assert monitor.stats() == {"list": {"secondary": 2}, "lookup": {"primary": 1}}
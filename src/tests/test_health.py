@@ -0,0 +1,104 @@
+"""
+Módulo de pruebas para las sondas de salud.
+
+Valida que la sonda de liveness no dependa de MongoDB y que la de readiness
+responda 503 cuando MongoDB no contesta a tiempo o los índices aún no existen.
+"""
+
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from unittest.mock import MagicMock
+from routers import health
+from services import admin_service
+
+
+class HangingDatabase:
+    """Base de datos simulada cuyo ``ping`` nunca responde."""
+
+    async def command(self, name):
+        await asyncio.sleep(3600)
+
+
+@pytest.mark.anyio
+async def test_readiness_fails_when_mongo_hangs(monkeypatch):
+    """
+    Prueba que valida las sondas con MongoDB sin responder.
+    
+    Escenario:
+    - El ping de disponibilidad a MongoDB no responde
+    
+    Verifica:
+    - Que /health/live responda 200
+    - Que /health/ready responda 503 al agotar la espera, sin el detalle del error
+    """
+    monkeypatch.setattr(admin_service, "index_manager", MagicMock())
+    monkeypatch.setattr(health, "READINESS_TIMEOUT", 0.05)
+    admin_service.configure(MagicMock(), HangingDatabase())
+    app = FastAPI()
+    app.include_router(health.router)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            live = await client.get("/health/live")
+            ready = await client.get("/health/ready")
+    finally:
+        admin_service.configure(MagicMock(), None)
+
+    assert live.status_code == 200 and live.json() == {"status": "alive"}
+    assert ready.status_code == 503
+    assert ready.json() == {"status": "not_ready", "mongo": "unreachable"}
+
+class ReachableDatabase:
+    """Base de datos simulada que responde al ``ping``."""
+
+    async def command(self, name):
+        return {"ok": 1}
+
+
+@pytest.mark.anyio
+async def test_readiness_waits_for_indexes(monkeypatch):
+    """
+    Prueba que valida que el worker no está disponible hasta crear los índices.
+    
+    Escenario:
+    - MongoDB responde; la primera creación de índices falla y la segunda no
+    
+    Verifica:
+    - Que /health/ready responda 503 con los índices pendientes tras el fallo
+    - Que responda 200 una vez creados
+    """
+    index_manager = MagicMock()
+    index_manager.ensure_indexes.side_effect = [RuntimeError("build failed"), {"accounts": ["account_number_1"]}]
+    monkeypatch.setattr(admin_service, "index_manager", index_manager)
+    admin_service.configure(MagicMock(), ReachableDatabase())
+    app = FastAPI()
+    app.include_router(health.router)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            with pytest.raises(RuntimeError):
+                await admin_service.ensure_indexes()
+            pending = await client.get("/health/ready")
+            await admin_service.ensure_indexes()
+            ready = await client.get("/health/ready")
+    finally:
+        admin_service.configure(MagicMock(), None)
+
+    assert pending.status_code == 503
+    assert pending.json() == {"status": "not_ready", "mongo": "ok", "indexes": "pending"}
+    assert ready.status_code == 200 and ready.json()["indexes"] == "ok"
+
+@pytest.mark.anyio
+async def test_readiness_without_mongo():
+    """
+    Prueba que valida la readiness con el repositorio en memoria.
+    
+    Escenario:
+    - No hay cliente de MongoDB configurado
+    
+    Verifica:
+    - Que el worker se considere disponible
+    """
+    assert await admin_service.check_readiness() == {"ready": True, "mongo": "disabled"}
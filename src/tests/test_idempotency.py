@@ -0,0 +1,134 @@
+"""
+Módulo de pruebas para el almacén de claves de idempotencia.
+
+Valida que las repeticiones reciban la respuesta guardada sin volver a ejecutar
+la escritura, que los duplicados concurrentes esperen a la primera petición y
+que las respuestas guardadas por otro proceso se lean del repositorio, y que un
+fallo al guardar la respuesta no se reporte como fallo de la escritura.
+"""
+
+import anyio
+import httpx
+import pytest
+from fastapi import FastAPI
+from unittest.mock import AsyncMock, patch
+from pymongo.errors import DuplicateKeyError
+from repositories import idempotency_repository, memory_account_repository
+from routers import accounts
+from services import account_service, idempotency
+from services.idempotency import IdempotencyKeyReused, IdempotencyStore
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicates_wait_for_first_request():
+    """
+    Prueba que valida que los duplicados concurrentes esperan a la primera petición.
+    
+    Escenario:
+    - Tres peticiones con la misma clave llegan mientras la primera se ejecuta
+    - Una cuarta llega con la misma clave y otro cuerpo
+    
+    Verifica:
+    - Que la escritura se ejecute una sola vez
+    - Que todas las peticiones reciban la misma respuesta
+    - Que reutilizar la clave con otro cuerpo se rechace
+    """
+    store = IdempotencyStore()
+    executions = 0
+    responses = []
+
+    async def request():
+        nonlocal executions
+        owner, record = await store.begin("PATCH /accounts/1 k", "fp")
+        if record is not None:
+            responses.append(record["body"])
+            return
+        executions += 1
+        await anyio.sleep(0.01)
+        await store.complete("PATCH /accounts/1 k", owner, "fp", 200, {"balance": 110.0})
+        responses.append({"balance": 110.0})
+
+    async with anyio.create_task_group() as group:
+        for _ in range(3):
+            group.start_soon(request)
+
+    assert executions == 1
+    assert responses == [{"balance": 110.0}] * 3
+    with pytest.raises(IdempotencyKeyReused):
+        await store.begin("PATCH /accounts/1 k", "other")
+
+@pytest.mark.anyio
+async def test_released_key_can_be_retried():
+    """
+    Prueba que valida que una petición fallida libera su clave.
+    
+    Escenario:
+    - La primera petición falla con un error de servidor y libera la clave
+    
+    Verifica:
+    - Que el reintento con la misma clave obtenga una nueva reserva
+    """
+    store = IdempotencyStore()
+    owner, _ = await store.begin("POST /accounts k", "fp")
+    await store.release("POST /accounts k", owner)
+
+    retry_owner, record = await store.begin("POST /accounts k", "fp")
+    assert record is None and retry_owner != owner
+
+@pytest.mark.anyio
+async def test_replay_from_repository_without_running_request():
+    """
+    Prueba que valida la lectura de una respuesta guardada por otro proceso.
+    
+    Escenario:
+    - La clave ya existe en MongoDB como completada y no está en la caché en proceso
+    
+    Verifica:
+    - Que la reserva falle por clave duplicada y no se pueda tomar
+    - Que se retorne la respuesta guardada y quede en la caché en proceso
+    """
+    stored = {"_id": "POST /accounts k", "fingerprint": "fp", "status": "completed",
+              "status_code": 200, "body": {"id": "abc"}}
+    with patch("repositories.idempotency_repository.collection") as mock_collection:
+        mock_collection.insert_one = AsyncMock(side_effect=DuplicateKeyError("dup", 11000))
+        mock_collection.find_one_and_update = AsyncMock(return_value=None)
+        mock_collection.find_one = AsyncMock(return_value=stored)
+        store = IdempotencyStore(repository=idempotency_repository)
+
+        owner, record = await store.begin("POST /accounts k", "fp")
+        again = await store.begin("POST /accounts k", "fp")
+
+        assert owner is None and record["body"] == {"id": "abc"}
+        assert again == (None, record)
+        mock_collection.insert_one.assert_awaited_once()
+
+@pytest.mark.anyio
+async def test_failed_completion_still_returns_result(caplog):
+    """
+    Prueba que valida que un fallo al guardar la respuesta no se reporta como fallo de la escritura.
+    
+    Escenario:
+    - Alta de cuenta con Idempotency-Key; guardar la respuesta en el almacén falla
+    
+    Verifica:
+    - Que la petición responda 200 con el ID de la cuenta creada
+    - Que el fallo quede en el log y la clave no se libere
+    """
+    account_service.configure_repository("memory")
+    app = FastAPI()
+    app.include_router(accounts.router)
+    account = {"account_number": "0000000001", "holder_name": "Juan Pérez", "account_type": "saving",
+               "balance": 100.0, "currency": "USD"}
+    try:
+        with patch.object(idempotency.store, "complete", AsyncMock(side_effect=RuntimeError("store down"))), \
+            patch.object(idempotency.store, "release", AsyncMock()) as release:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/accounts", json=account, headers={"Idempotency-Key": "k-complete"})
+    finally:
+        memory_account_repository.configure()
+        account_service.configure_repository("sync")
+
+    assert response.status_code == 200 and "id" in response.json()
+    assert "store down" in caplog.text
+    release.assert_not_awaited()
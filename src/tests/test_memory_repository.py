@@ -0,0 +1,214 @@
+"""
+Módulo de pruebas para el repositorio de cuentas en memoria.
+
+Valida que la implementación en memoria respete la interfaz y la semántica de
+los repositorios de MongoDB (índice único, paginación por cursor, incrementos,
+totales mantenidos, libro de movimientos, transferencias).
+"""
+
+import asyncio
+import pytest
+from datetime import timedelta
+from pymongo.errors import DuplicateKeyError
+from repositories import ledger, memory_account_repository
+from services import account_service
+from models.account_model import CreateAccount, Transfer, UpdateAccountBalance
+
+
+@pytest.fixture
+def repository():
+    """
+    Fixture que proporciona el repositorio en memoria vacío.
+    
+    Returns:
+        module: Repositorio en memoria reiniciado.
+    """
+    memory_account_repository.configure()
+    yield memory_account_repository
+    memory_account_repository.configure()
+
+def _account(number: str) -> CreateAccount:
+    return CreateAccount(
+        account_number=number.zfill(10),
+        holder_name="Juan Pérez",
+        account_type="saving",
+        balance=100.0,
+        currency="USD"
+    )
+
+@pytest.mark.anyio
+async def test_memory_repository_unique_account_number(repository):
+    """
+    Prueba que valida el índice único por número de cuenta.
+    
+    Escenario:
+    - Se crea una cuenta y luego un lote con un duplicado
+    
+    Verifica:
+    - Que la creación individual de un duplicado lance DuplicateKeyError
+    - Que en el lote el duplicado se reporte sin detener el resto
+    """
+    await repository.create_account(_account("1"))
+
+    with pytest.raises(DuplicateKeyError):
+        await repository.create_account(_account("1"))
+
+    results = await repository.create_accounts([_account("1"), _account("2")])
+    assert results[0]["error"] == "duplicate"
+    assert "id" in results[1]
+
+@pytest.mark.anyio
+async def test_memory_repository_pagination_and_balance(repository):
+    """
+    Prueba que valida la paginación por cursor y la actualización de saldo.
+    
+    Escenario:
+    - Se crean tres cuentas y se recorren en páginas de dos
+    - Se incrementa el saldo de una cuenta existente y de una inexistente
+    
+    Verifica:
+    - Que las páginas sigan el orden de creación y encadenen el cursor
+    - Que el incremento retorne el saldo actualizado y None si no existe
+    """
+    created = [(await repository.create_account(_account(str(i)))).id for i in range(3)]
+
+    first = await repository.get_all_accounts(limit=2)
+    second = await repository.get_all_accounts(limit=2, after=first["next_cursor"])
+
+    assert [acc["id"] for acc in first["accounts"] + second["accounts"]] == created
+    assert second["next_cursor"] is None
+
+    updated = await repository.update_balance(UpdateAccountBalance(id=created[0], balance=50))
+    assert updated == {"id": created[0], "balance": 150.0}
+    assert await repository.update_balance(UpdateAccountBalance(id="0" * 24, balance=1)) is None
+    assert await repository.apply_balance_increments({created[1]: 5, "0" * 24: 1}) == {"0" * 24}
+
+@pytest.mark.anyio
+async def test_memory_repository_totals_and_drift(repository, monkeypatch):
+    """
+    Prueba que valida el mantenimiento incremental de los totales y su conciliación.
+    
+    Escenario:
+    - Se crean cuentas, se cambia un saldo y se aplica un lote de incrementos
+    - Se desvía el total almacenado y se concilia
+    
+    Verifica:
+    - Que los totales coincidan con la suma de las cuentas
+    - Que la desviación se detecte y la conciliación la corrija
+    """
+    monkeypatch.setattr(account_service, "account_repository", repository)
+    created = [(await repository.create_account(_account(str(i)))).id for i in range(3)]
+    await repository.update_balance(UpdateAccountBalance(id=created[0], balance=50))
+    await repository.apply_balance_increments({created[1]: -25})
+
+    totals = await account_service.get_account_totals()
+    assert [total.model_dump() for total in totals.totals] == [
+        {"currency": "USD", "account_type": "saving", "accounts": 3, "balance": 325.0}
+    ]
+    assert (await account_service.check_totals_drift()).in_sync
+
+    repository.totals[("USD", "saving")][1] += 10
+    report = await account_service.check_totals_drift(reconcile=True)
+    assert not report.in_sync and report.reconciled
+    assert report.drift[0].stored_balance == 335.0
+    assert (await account_service.check_totals_drift()).in_sync
+
+@pytest.mark.anyio
+async def test_memory_repository_ledger_history_and_balance_at(repository, monkeypatch):
+    """
+    Prueba que valida el libro de movimientos, su paginación y el saldo en una fecha.
+    
+    Escenario:
+    - Se aplican cinco incrementos con fechas distintas y fotos cada dos movimientos
+    
+    Verifica:
+    - Que cada incremento registre su importe, saldo resultante y seq
+    - Que el historial se pagine por seq y se filtre por rango de fechas
+    - Que el saldo en una fecha use fotos y movimientos, y el de apertura antes del primero
+    """
+    monkeypatch.setattr(ledger, "SNAPSHOT_INTERVAL", 2)
+    account_id = (await repository.create_account(_account("1"))).id
+    start = ledger.now()
+    for i in range(5):
+        monkeypatch.setattr(ledger, "now", lambda i=i: start + timedelta(minutes=i + 1))
+        await repository.apply_balance_increments({account_id: 10})
+
+    first = await repository.get_transactions(account_id, limit=2)
+    assert [(e["seq"], e["amount"], e["balance"]) for e in first["transactions"]] == [(1, 10, 110.0), (2, 10, 120.0)]
+    second = await repository.get_transactions(account_id, limit=10, after=first["next_cursor"])
+    assert [e["seq"] for e in second["transactions"]] == [3, 4, 5]
+    assert second["next_cursor"] is None
+
+    window = await repository.get_transactions(
+        account_id, since=start + timedelta(minutes=2), until=start + timedelta(minutes=4)
+    )
+    assert [e["seq"] for e in window["transactions"]] == [2, 3]
+
+    at = await repository.get_balance_at(account_id, start + timedelta(minutes=3, seconds=30))
+    assert (at["balance"], at["seq"]) == (130.0, 3)
+    opening = await repository.get_balance_at(account_id, start)
+    assert (opening["balance"], opening["seq"]) == (100.0, 0)
+    assert len(repository.snapshots[repository.document_ids[0]]) == 2
+
+@pytest.mark.anyio
+async def test_memory_repository_transfers(repository):
+    """
+    Prueba que valida la liquidación de un lote de transferencias.
+    
+    Escenario:
+    - Un lote donde la segunda transferencia depende del saldo que deja la primera
+    - Transferencias con saldo insuficiente y con una cuenta inexistente
+    
+    Verifica:
+    - Que cada transferencia use los saldos que dejaron las anteriores del lote
+    - Que las rechazadas no modifiquen saldos ni libro
+    - Que el cargo y el abono compartan transfer_id en el libro
+    """
+    a, b, c = [(await repository.create_account(_account(str(i)))).id for i in range(3)]
+
+    results = await repository.apply_transfers([
+        Transfer(from_id=a, to_id=b, amount=100),
+        Transfer(from_id=b, to_id=c, amount=150),
+        Transfer(from_id=a, to_id=c, amount=1),
+        Transfer(from_id=c, to_id="0" * 24, amount=1),
+    ])
+
+    assert [result["status"] for result in results] == ["completed", "completed", "insufficient_funds", "not_found"]
+    assert (results[1]["from_balance"], results[1]["to_balance"]) == (50.0, 250.0)
+    balances = [(await repository.get_account_by_id(_id))["balance"] for _id in (a, b, c)]
+    assert balances == [0.0, 50.0, 250.0]
+
+    history = (await repository.get_transactions(b))["transactions"]
+    assert [(e["amount"], e["balance"]) for e in history] == [(100, 200.0), (-150, 50.0)]
+    debit = (await repository.get_transactions(a))["transactions"][0]
+    assert debit["transfer_id"] == history[0]["transfer_id"] == results[0]["id"]
+
+@pytest.mark.anyio
+async def test_coalesced_increments_record_one_entry_each(repository):
+    """
+    Prueba que valida que los incrementos agrupados registran un movimiento cada uno.
+    
+    Escenario:
+    - Agrupación activa y tres incrementos concurrentes sobre la misma cuenta
+    
+    Verifica:
+    - Que cada incremento tenga su movimiento, con seq consecutivos en orden de llegada
+    - Que el saldo devuelto a cada petición sea el de su movimiento
+    """
+    account_service.configure_repository("memory")
+    account_service.configure_coalescing(window=0.01)
+    try:
+        account_id = (await repository.create_account(_account("1"))).id
+        results = await asyncio.gather(*(
+            account_service.update_account_balance(UpdateAccountBalance(id=account_id, balance=amount))
+            for amount in (10, 20, 30)
+        ))
+        page = await repository.get_transactions(account_id, limit=10)
+    finally:
+        account_service.configure_coalescing()
+        account_service.configure_repository("sync")
+
+    assert [(e["seq"], e["amount"], e["balance"]) for e in page["transactions"]] == [
+        (1, 10, 110.0), (2, 20, 130.0), (3, 30, 160.0)
+    ]
+    assert [result["balance"] for result in results] == [110.0, 130.0, 160.0]
@@ -0,0 +1,108 @@
+"""
+Módulo de pruebas para el subsistema de métricas.
+
+Valida el formato de exposición de Prometheus, el etiquetado por plantilla de
+ruta del middleware y el registro de comandos de MongoDB.
+"""
+
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import metrics
+
+
+def test_histogram_render_cumulative_buckets():
+    """
+    Prueba que valida la exposición de un histograma.
+    
+    Escenario:
+    - Se observan tres valores en un histograma con dos límites
+    
+    Verifica:
+    - Que los buckets sean acumulativos e incluyan +Inf
+    - Que se expongan la suma y el conteo
+    """
+    histogram = metrics.Histogram("test_seconds", "Prueba.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/a")
+
+    lines = histogram.render()
+
+    assert '# TYPE test_seconds histogram' in lines
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{route="/a"} 5.55' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
+
+
+def test_pool_checkout_totals_are_counters():
+    """
+    Prueba que valida el tipo de los totales de checkouts del pool.
+    
+    Escenario:
+    - Se ejecutan los colectores del registro y se genera la exposición
+    
+    Verifica:
+    - Que los totales monótonos se declaren como counter
+    - Que las conexiones abiertas sigan siendo gauge
+    """
+    body = metrics.REGISTRY.render()
+
+    assert '# TYPE mongodb_pool_checkouts_total counter' in body
+    assert '# TYPE mongodb_pool_checkout_wait_seconds_total counter' in body
+    assert '# TYPE mongodb_pool_connections gauge' in body
+
+def test_middleware_labels_route_template():
+    """
+    Prueba que valida las métricas HTTP del middleware.
+    
+    Escenario:
+    - Se llama dos veces a una ruta con parámetro y una vez a una ruta inexistente
+    
+    Verifica:
+    - Que la ruta se etiquete con su plantilla y no con la URL concreta
+    - Que las rutas inexistentes se agrupen como "unmatched"
+    - Que el gauge de peticiones en curso vuelva a cero
+    """
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    exposition = metrics.REGISTRY.render()
+
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in exposition
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in exposition
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 2' in exposition
+    assert "http_requests_in_flight 0" in exposition
+
+def test_command_metrics_records_latency_and_reply_size():
+    """
+    Prueba que valida el listener de comandos de MongoDB.
+    
+    Escenario:
+    - Un comando find termina bien con muestreo de tamaño en cada respuesta
+    - Un comando update falla
+    
+    Verifica:
+    - Que se cuenten los comandos por resultado
+    - Que se registre la latencia y el tamaño de la respuesta
+    """
+    listener = metrics.CommandMetrics(reply_size_sample_every=1)
+    listener.succeeded(SimpleNamespace(command_name="find", duration_micros=1500, reply={"ok": 1}))
+    listener.failed(SimpleNamespace(command_name="update", duration_micros=800))
+
+    exposition = metrics.REGISTRY.render()
+
+    assert 'mongodb_commands_total{command="find",outcome="success"}' in exposition
+    assert 'mongodb_commands_total{command="update",outcome="failure"}' in exposition
+    assert 'mongodb_command_duration_seconds_count{command="find"}' in exposition
+    assert 'mongodb_reply_size_bytes_count{command="find"}' in exposition
@@ -0,0 +1,133 @@
+"""
+Módulo de pruebas del perfilado bajo demanda de peticiones.
+
+Valida la autorización con el token de administración (del perfilado y de las
+rutas /admin) y el informe del profiler de muestreo sobre una app mínima con los
+middlewares de la aplicación.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import logs
+import profiling
+from routers import admin
+
+
+def busy(seconds: float):
+    """
+    Ocupa la CPU durante ``seconds`` segundos.
+    """
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.fixture
+def client():
+    """
+    Fixture con un cliente HTTP de una app con una ruta que calcula y espera.
+
+    Returns:
+        AsyncClient: Cliente contra la app con los middlewares de perfilado y de contexto.
+    """
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        # El cálculo va en una tarea aparte, como el envío de una respuesta en streaming
+        await asyncio.create_task(asyncio.sleep(0.03))
+        await asyncio.create_task(calculate())
+        return {"ok": True}
+
+    async def calculate():
+        busy(0.05)
+
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.add_middleware(logs.RequestContextMiddleware)
+    yield httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    profiling.configure()
+
+
+@pytest.mark.anyio
+async def test_profiling_requires_admin_token(client):
+    """
+    Prueba que el perfilado solo se activa con un token de administración válido.
+
+    Escenario:
+    - Una petición sin perfilar, una perfilada sin token configurado y otra con
+      un token incorrecto
+
+    Verifica:
+    - Que la petición normal responda con su cuerpo y un X-Request-ID
+    - Que las peticiones perfiladas sin autorización respondan 403
+    """
+    async with client:
+        plain = await client.get("/work", headers={"X-Request-ID": "abc"})
+        disabled = await client.get("/work", params={"profile": 1})
+        profiling.configure(token="secret")
+        wrong = await client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "nope"})
+
+    assert plain.json() == {"ok": True} and plain.headers["X-Request-ID"] == "abc"
+    assert disabled.status_code == 403 and wrong.status_code == 403
+
+
+@pytest.mark.anyio
+async def test_profiled_request_returns_report(client):
+    """
+    Prueba que una petición perfilada devuelve el informe del profiler.
+
+    Escenario:
+    - Petición con ``?profile=1`` y el token de administración a una ruta que
+      espera 30 ms y calcula 50 ms en tareas lanzadas por la petición
+
+    Verifica:
+    - Que se devuelva el informe con el estado original de la respuesta
+    - Que el cálculo aparezca como tiempo propio de su función y la espera como ``[await]``
+    - Que las pilas plegadas terminen en la función que calcula
+    """
+    profiling.configure(token="secret")
+    async with client:
+        response = await client.get("/work", params={"profile": 1}, headers={"X-Admin-Token": "secret"})
+
+    report = response.json()
+    assert response.status_code == 200 and response.headers["X-Profiled-Status"] == "200"
+    assert report["status"] == 200 and report["samples"] > 0
+    functions = {item["function"].split(" ")[0]: item for item in report["functions"]}
+    assert functions["busy"]["self_ms"] >= 25
+    assert functions["[await]"]["self_ms"] >= 15
+    assert report["running_ms"] >= 25 and report["awaiting_ms"] >= 15
+    stacks = [stack["stack"].split(";") for stack in report["stacks"]]
+    assert any(".calculate " in stack[0] and stack[-1].startswith("busy ") for stack in stacks)
+
+
+@pytest.mark.anyio
+async def test_admin_routes_require_admin_token():
+    """
+    Prueba que las rutas /admin exigen el token de administración.
+
+    Escenario:
+    - Peticiones a /admin/cache sin token configurado, sin cabecera, con un
+      token incorrecto y con el correcto
+
+    Verifica:
+    - Que solo la petición con el token correcto se atienda
+    """
+    app = FastAPI()
+    app.include_router(admin.router)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            disabled = await client.get("/admin/cache", headers={"X-Admin-Token": ""})
+            profiling.configure(token="secret")
+            missing = await client.get("/admin/cache")
+            wrong = await client.get("/admin/cache", headers={"X-Admin-Token": "nope"})
+            allowed = await client.get("/admin/cache", headers={"X-Admin-Token": "secret"})
+    finally:
+        profiling.configure()
+
+    assert [response.status_code for response in (disabled, missing, wrong)] == [403, 403, 403]
+    assert allowed.status_code == 200
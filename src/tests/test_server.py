@@ -0,0 +1,26 @@
+"""
+Módulo de pruebas del punto de entrada de producción.
+
+Valida la comprobación del número de workers frente al feed de cambios.
+"""
+
+import pytest
+
+import server
+
+
+def test_multiple_workers_require_shared_change_feed():
+    """
+    Prueba que varios workers no arrancan con el feed de cambios local.
+
+    Escenario:
+    - Uno y dos workers con los feeds "local", "change_stream" y "off"
+
+    Verifica:
+    - Que solo se rechacen varios workers con el feed "local"
+    """
+    server.check_workers(1, "local")
+    server.check_workers(2, "change_stream")
+    server.check_workers(2, "off")
+    with pytest.raises(ValueError, match="CHANGE_FEED_SOURCE=change_stream"):
+        server.check_workers(2, "local")
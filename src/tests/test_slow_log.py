@@ -0,0 +1,120 @@
+"""
+Módulo de pruebas del log de operaciones lentas y del log estructurado.
+
+Simula los eventos de comandos de pymongo para validar el umbral, la redacción
+de los filtros, el contexto de la petición y el muestreo de explain.
+"""
+
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import orjson
+
+import logs
+from slow_log import SlowCommandLog
+
+
+def command_events(command: dict, duration_ms: float, request_id: int = 1, reply=None):
+    """
+    Construye los eventos de inicio y fin de un comando.
+
+    Args:
+        command (dict): Documento del comando; su primera clave es el nombre.
+        duration_ms (float): Duración del comando.
+        request_id (int): Identificador del comando en la conexión.
+        reply (dict, opcional): Respuesta del servidor.
+
+    Returns:
+        tuple: Eventos ``started`` y ``succeeded`` simulados.
+    """
+    name = next(iter(command))
+    started = SimpleNamespace(connection_id=("db", 27017), request_id=request_id, command=command,
+                              command_name=name, database_name="api_bank")
+    succeeded = SimpleNamespace(connection_id=("db", 27017), request_id=request_id, command_name=name,
+                                duration_micros=int(duration_ms * 1000), reply=reply or {"ok": 1})
+    return started, succeeded
+
+
+def test_slow_command_logged_with_redacted_filter(caplog):
+    """
+    Prueba que solo los comandos por encima del umbral se registran, sin valores.
+
+    Escenario:
+    - Umbral de 50 ms
+    - Un find rápido y un findAndModify lento lanzados durante una petición
+
+    Verifica:
+    - Que el comando rápido no se registre
+    - Que el lento se registre con la ruta, el comando, la colección y la forma
+      del filtro con los valores redactados
+    - Que la línea JSON del log incluya el registro y los campos de la petición
+    """
+    monitor = SlowCommandLog(threshold_ms=50)
+    scope = {"type": "http", "method": "PATCH", "path": "/accounts/123456789",
+             "route": SimpleNamespace(path="/accounts/{account_number}")}
+    fast = command_events({"find": "accounts", "filter": {"account_number": "123456789"}, "lsid": {"id": 1}}, 2, 1)
+    slow = command_events({
+        "findAndModify": "accounts",
+        "query": {"account_number": "123456789", "balance": {"$gte": 100}, "$or": [{"a": 1}, {"a": 2}]},
+        "update": {"$inc": {"balance": -100}},
+    }, 120, 2)
+
+    token = logs.current_request.set((scope, "req-1"))
+    try:
+        with caplog.at_level(logging.WARNING, logger="slow_log"):
+            for started, succeeded in (fast, slow):
+                monitor.started(started)
+                monitor.succeeded(succeeded)
+            (record,) = caplog.records
+            line = orjson.loads(logs.JsonFormatter().format(record))
+    finally:
+        logs.current_request.reset(token)
+
+    entry = record.slow_operation
+    assert entry["command"] == "findAndModify" and entry["collection"] == "accounts"
+    assert entry["filter"] == {"account_number": "?", "balance": {"$gte": "?"}, "$or": [{"a": "?"}]}
+    assert entry["duration_ms"] == 120 and entry["route"] == "/accounts/{account_number}"
+    assert "123456789" not in orjson.dumps(entry).decode()
+    assert [item["command"] for item in monitor.stats()["recent"]] == ["findAndModify"]
+    assert line["level"] == "warning" and line["message"] == "Slow MongoDB operation"
+    assert line["request_id"] == "req-1" and line["slow_operation"]["filter"] == entry["filter"]
+
+
+def test_slow_command_explain_sampling(caplog):
+    """
+    Prueba que los comandos lentos muestreados se explican en segundo plano.
+
+    Escenario:
+    - Fracción de explain 1 con un cliente simulado
+    - Un find lento con campos de sesión y de enrutado
+
+    Verifica:
+    - Que el explain se ejecute sin los campos de sesión ni los ``$`` del driver
+    - Que el registro incluya documentos y claves examinados y el plan
+    """
+    client = MagicMock()
+    client.__getitem__.return_value.command.return_value = {
+        "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}},
+        "executionStats": {"totalDocsExamined": 5000, "totalKeysExamined": 5000, "nReturned": 100},
+    }
+    monitor = SlowCommandLog(threshold_ms=10, explain_sample_rate=1)
+    monitor.configure_explain(client)
+    started, succeeded = command_events({
+        "find": "accounts", "filter": {"currency": "USD"}, "limit": 100,
+        "lsid": {"id": 1}, "$db": "api_bank", "$readPreference": {"mode": "secondaryPreferred"},
+    }, 80)
+
+    with caplog.at_level(logging.WARNING, logger="slow_log"):
+        monitor.started(started)
+        monitor.succeeded(succeeded)
+        monitor._executor.shutdown(wait=True)
+
+    client.__getitem__.assert_called_with("api_bank")
+    client.__getitem__.return_value.command.assert_called_once_with({
+        "explain": {"find": "accounts", "filter": {"currency": "USD"}, "limit": 100},
+        "verbosity": "executionStats",
+    })
+    entry = caplog.records[0].slow_operation
+    assert (entry["docs_examined"], entry["keys_examined"], entry["docs_returned"]) == (5000, 5000, 100)
+    assert entry["plan"] == "FETCH>IXSCAN" and entry["filter"] == {"currency": "?"}